@@ -1,17 +1,28 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse
-import shutil
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+import time
 from pathlib import Path
 import os
+from typing import List, Optional
 # from financial_advisor.src.financial_advisor.crew import CkdV3
 
-from crew import CkdV3
+from pydantic import BaseModel, Field
 
-import agentops
-import auth
 from auth import get_current_user
-
-import agentops
+from database import db_dependency
+import documents
+import warehouse
+from doc_index import get_index
+from extraction import extract_field_from_file
+from tables import compact_tables
+from navigation import get_navigator
+from jobs import (job_queue, run_crew_job, run_parse_job, run_query_job, run_warehouse_job, Job, QueueFullError, PoolUnavailableError, DONE, FAILED)
+from tools.parse_cache import parse_cache
+from answer_cache import answer_cache
+from uploads import store_upload, StoredUpload, UploadTooLargeError
 
 router = APIRouter(
     prefix="/analysis",
@@ -24,63 +35,535 @@ UPLOAD_DIR = BASE_DIR / "uploaded_files"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 
-@router.post("/upload-and-analyze")
+class DocumentQueryRequest(BaseModel):
+    input_field: str
+    user_query: str
+
+
+class ExtractRequest(BaseModel):
+    input_field: str
+
+
+class CompanyRequest(BaseModel):
+    company: str = Field(..., min_length=1)
+
+
+MAX_BATCH_DOCUMENTS = int(os.getenv("ANALYSIS_MAX_BATCH_DOCUMENTS", 500))
+MAX_BATCH_FIELDS = int(os.getenv("ANALYSIS_MAX_BATCH_FIELDS", 50))
+
+
+class BatchRequest(BaseModel):
+    document_ids: List[int] = Field(..., min_length=1)
+    input_fields: List[str] = Field(..., min_length=1)
+    use_llm: bool = True   # False: deterministic extraction only, unmatched cells stay null
+
+
+async def _save_upload(file: UploadFile) -> StoredUpload:
+    try:
+        return await store_upload(file, UPLOAD_DIR)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"File upload failed: {e}")
+
+
+def _submit(kind: str, fn, inputs: dict, user: dict) -> Job:
+    try:
+        return job_queue.submit(kind, fn, inputs, owner=user["username"])
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Analysis queue is full: {e}")
+    except PoolUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+async def _register_upload(db, upload: StoredUpload, user: dict, company: Optional[str]):
+    """Registry write off the event loop; a record that reused an existing parse gets its
+    warehouse facts from a worker job."""
+    document, created = await run_in_threadpool(documents.register_document, db, user["id"], upload.filename,
+                                                upload.sha256, str(upload.path), company=company)
+    if created and documents.is_parsed(document):
+        try:
+            job_queue.submit("warehouse", run_warehouse_job, {"document_id": document.id}, owner=user["username"])
+        except (QueueFullError, PoolUnavailableError):
+            pass  # `python warehouse.py` backfills documents without facts
+    return document
+
+
+def _job_links(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "status_url": f"{router.prefix}/jobs/{job.id}",
+        "result_url": f"{router.prefix}/jobs/{job.id}/result",
+        "events_url": f"{router.prefix}/jobs/{job.id}/events",
+    }
+
+
+# Job kinds that parse the document named by their "document_id" input.
+PARSE_JOB_KINDS = ("parse", "upload-and-analyze", "batch-metrics")
+
+
+def _parse_job(document, user: dict) -> Optional[Job]:
+    """The job parsing `document`: a live one, else a new parse job if the PDF is still stored.
+
+    Covers records with no usable parse: never parsed, FAILED, PARSING left by a
+    worker that died (no live job holds it) and PARSED whose JSON was evicted
+    from the parse cache. Only this API process's jobs are seen, so with several
+    API processes a document may occasionally be parsed twice (the parse cache
+    makes the second run cheap).
+    """
+    job = job_queue.live_job_for(document.id, PARSE_JOB_KINDS)
+    if job is None and document.pdf_path and Path(document.pdf_path).exists():
+        job = _submit("parse", run_parse_job, {"document_id": document.id, "pdf_path": document.pdf_path}, user)
+    return job
+
+
+def _require_parsed(document, user: dict):
+    """409 unless the document's parse is on disk; (re)starts its parse when none is running."""
+    if documents.is_parsed(document):
+        return
+    job = _parse_job(document, user)
+    status = document.parse_status
+    if status == documents.PARSED:
+        status = "evicted from the parse cache"
+    detail = f"Document is not parsed yet (status: {status})"
+    if job is not None:
+        detail += f"; parsing in job {job.id}, see {router.prefix}/jobs/{job.id}"
+    raise HTTPException(status_code=409, detail=detail)
+
+
+@router.post("/upload-and-analyze", status_code=202)
 async def upload_and_analyze(
+    db: db_dependency,
     user: dict = Depends(get_current_user),   # 🔐 JWT protected
     file: UploadFile = File(...),
     input_field: str = Form(...),
-    user_query: str = Form(...)
+    user_query: str = Form(...),
+    company: Optional[str] = Form(None),
 ):
     """
-    Upload PDF/DOCX → Run CkdV3 Crew → Return analysis result
+    Upload PDF/DOCX → Enqueue CkdV3 Crew job → Return job id immediately.
+    Poll /analysis/jobs/{job_id} for status and /analysis/jobs/{job_id}/result for the answer.
+    A question already answered for the same file returns the cached answer (200, cached=true).
     """
 
     # --------------------------------------------------------------------
-    # 1. SAVE THE UPLOADED FILE
+    # 1. SAVE + REGISTER THE UPLOADED FILE
     # --------------------------------------------------------------------
-    file_path = UPLOAD_DIR / file.filename
-
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"File upload failed: {e}")
-
+    upload = await _save_upload(file)
+    document = await _register_upload(db, upload, user, company)
 
     # --------------------------------------------------------------------
-    # 2. AGENTOPS — Proper tracing (NO end_session())
+    # 2. PREPARE CREWAI INPUTS
     # --------------------------------------------------------------------
-    agentops.init(os.getenv("AGENTOPS_API_KEY"))
-    agentops.start_trace("financial_analysis")
+    inputs = {
+        "input_field": input_field,
+        "user_query": user_query,
+        "sha256": upload.sha256,
+    }
 
+    cached = await run_in_threadpool(answer_cache.get, upload.sha256, input_field, user_query)
+    if cached is not None:
+        return JSONResponse(status_code=200, content={
+            "status": DONE,
+            "filename": file.filename,
+            "sha256": upload.sha256,
+            "document_id": document.id,
+            **cached,
+        })
 
     # --------------------------------------------------------------------
-    # 3. PREPARE CREWAI INPUTS
+    # 3. ENQUEUE — the crew (and its AgentOps trace) runs in a worker process.
+    #    Already-parsed filings skip ingestion and go straight to the crew.
     # --------------------------------------------------------------------
+    if documents.is_parsed(document):
+        job = _submit("document-query", run_query_job, {**inputs, "json_path": document.json_path}, user)
+    else:
+        job = _submit("upload-and-analyze", run_crew_job,
+                      {**inputs, "pdf_path": str(upload.path), "document_id": document.id}, user)
+
+    return {
+        "status": job.status,
+        "filename": file.filename,
+        "pdf_path": str(upload.path),
+        "sha256": upload.sha256,
+        "document_id": document.id,
+        **_job_links(job),
+    }
+
+
+# ---------------------------------------------------------------------------
+# DOCUMENT REGISTRY — parse once, query many
+# ---------------------------------------------------------------------------
+@router.post("/documents", status_code=202)
+async def upload_document(
+    db: db_dependency,
+    user: dict = Depends(get_current_user),
+    file: UploadFile = File(...),
+    company: Optional[str] = Form(None),
+):
+    """Upload a filing and parse it once; ask questions later via /documents/{id}/query.
+
+    `company` (ticker) labels the filing's facts in the metrics warehouse; it
+    defaults to the leading token of the filename.
+    """
+    upload = await _save_upload(file)
+    document = await _register_upload(db, upload, user, company)
+    response = documents.document_to_dict(document)
+    if not documents.is_parsed(document):
+        job = _parse_job(document, user)
+        if job is not None:
+            response.update(_job_links(job))
+    return response
+
+
+@router.get("/documents")
+async def get_documents(db: db_dependency, user: dict = Depends(get_current_user)):
+    found = await run_in_threadpool(documents.list_documents, db, user["id"])
+    return [documents.document_to_dict(d) for d in found]
+
+
+def _find_user_document(db, document_id: int, user: dict):
+    document = documents.get_document(db, document_id, user["id"])
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+
+async def _get_user_document(db, document_id: int, user: dict):
+    """The caller's document or 404; the query runs in the threadpool (sync session)."""
+    return await run_in_threadpool(_find_user_document, db, document_id, user)
+
+
+@router.get("/documents/{document_id}")
+async def get_document(document_id: int, db: db_dependency, user: dict = Depends(get_current_user)):
+    document = await _get_user_document(db, document_id, user)
+    return await run_in_threadpool(documents.document_to_dict, document, with_report=True)
+
+
+@router.post("/documents/{document_id}/query", status_code=202)
+async def query_document(
+    document_id: int,
+    request: DocumentQueryRequest,
+    db: db_dependency,
+    user: dict = Depends(get_current_user),
+):
+    """Run only the extraction + answer stages against an already-parsed document."""
+    document = await _get_user_document(db, document_id, user)
+    _require_parsed(document, user)
+
+    cached = await run_in_threadpool(answer_cache.get, document.sha256, request.input_field, request.user_query)
+    if cached is not None:
+        return JSONResponse(status_code=200, content={"status": DONE, "document_id": document.id, **cached})
+
     inputs = {
-        "pdf_path": str(file_path),
-        "input_field": input_field,
-        "user_query": user_query,
+        "json_path": document.json_path,
+        "input_field": request.input_field,
+        "user_query": request.user_query,
+        "sha256": document.sha256,
+    }
+    job = _submit("document-query", run_query_job, inputs, user)
+    return {"status": job.status, "document_id": document.id, **_job_links(job)}
+
+
+@router.post("/documents/{document_id}/extract")
+async def extract_document_field(
+    document_id: int,
+    request: ExtractRequest,
+    db: db_dependency,
+    user: dict = Depends(get_current_user),
+):
+    """Deterministic table/text lookup of input_field — no crew, no LLM."""
+    document = await _get_user_document(db, document_id, user)
+    _require_parsed(document, user)
+
+    start = time.perf_counter()
+    matches = await run_in_threadpool(extract_field_from_file, document.json_path, request.input_field)
+    return {
+        "document_id": document.id,
+        "input_field": request.input_field,
+        "found": bool(matches),
+        "matches": [m.to_dict() for m in matches],
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+@router.get("/documents/{document_id}/search")
+async def search_document(
+    document_id: int,
+    db: db_dependency,
+    q: str = Query(..., min_length=1),
+    match_all: bool = True,
+    limit: int = Query(20, ge=1, le=200),
+    user: dict = Depends(get_current_user),
+):
+    """Keyword lookup in the document's inverted index (texts + table cells with header context)."""
+    document = await _get_user_document(db, document_id, user)
+    _require_parsed(document, user)
+
+    start = time.perf_counter()
+    index = await run_in_threadpool(get_index, document.json_path)
+    hits = index.search(q, match_all=match_all, limit=limit)
+    return {
+        "document_id": document.id,
+        "query": q,
+        "hits": hits,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
     }
 
+
+@router.get("/documents/{document_id}/tables")
+async def get_document_tables(document_id: int, db: db_dependency, user: dict = Depends(get_current_user)):
+    """Parsed tables as row labels × period columns with typed values."""
+    document = await _get_user_document(db, document_id, user)
+    _require_parsed(document, user)
+
+    tables = await run_in_threadpool(compact_tables, document.json_path)
+    return {"document_id": document.id, "tables": [t.to_dict() for t in tables]}
+
+
+def _get_parsed_navigator(db, document_id: int, user: dict):
+    document = _find_user_document(db, document_id, user)
+    _require_parsed(document, user)
+    return document, get_navigator(document.json_path)
+
+
+@router.get("/documents/{document_id}/next")
+async def get_next_text_nodes(
+    document_id: int,
+    db: db_dependency,
+    after: str = Query(..., min_length=1),
+    count: int = Query(3, ge=1, le=50),
+    user: dict = Depends(get_current_user),
+):
+    """Text nodes following `after` in reading order (same lookup as the Find_Next_Text_Node tool)."""
+    start = time.perf_counter()
+    document, navigator = await run_in_threadpool(_get_parsed_navigator, db, document_id, user)
+    hits = [{"match": navigator.describe(ref), "next": navigator.describe_all(following)}
+            for ref, following in navigator.next_text_after(after, count)]
+    return {"document_id": document.id, "after": after, "hits": hits,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+
+@router.get("/documents/{document_id}/section")
+async def get_section(
+    document_id: int,
+    db: db_dependency,
+    header: str = Query(..., min_length=1),
+    user: dict = Depends(get_current_user),
+):
+    """Items under a section header and table cells under a column header named `header`."""
+    start = time.perf_counter()
+    document, navigator = await run_in_threadpool(_get_parsed_navigator, db, document_id, user)
+    sections = [{"header": navigator.describe(ref), "items": navigator.describe_all(navigator.section(ref))}
+                for ref in navigator.find(header) if navigator.header_level(ref) is not None]
+    return {"document_id": document.id, "header": header, "sections": sections,
+            "cells": navigator.column_cells(header),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+
+@router.get("/documents/{document_id}/pages/{page_no}")
+async def get_page_items(document_id: int, page_no: int, db: db_dependency,
+                         user: dict = Depends(get_current_user)):
+    """Everything on one page, in reading order."""
+    start = time.perf_counter()
+    document, navigator = await run_in_threadpool(_get_parsed_navigator, db, document_id, user)
+    return {"document_id": document.id, "page": page_no,
+            "items": navigator.describe_all(navigator.page(page_no)),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+
+@router.put("/documents/{document_id}/company")
+async def set_document_company(
+    document_id: int,
+    request: CompanyRequest,
+    db: db_dependency,
+    user: dict = Depends(get_current_user),
+):
+    """Relabel a filing's company, in the registry and the metrics warehouse."""
+    document = await _get_user_document(db, document_id, user)
+    facts = await run_in_threadpool(warehouse.set_company, db, document, request.company)
+    return {**documents.document_to_dict(document), "facts_updated": facts}
+
+
+# ---------------------------------------------------------------------------
+# METRICS WAREHOUSE — answered from the metric_facts indexes, no crew
+# ---------------------------------------------------------------------------
+@router.get("/metrics")
+async def list_warehouse_metrics(
+    db: db_dependency,
+    q: Optional[str] = None,
+    company: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    user: dict = Depends(get_current_user),
+):
+    """Metrics extracted from the user's filings, with company/period coverage."""
+    start = time.perf_counter()
+    metrics = await run_in_threadpool(warehouse.list_metrics, db, user["id"], q, company, limit)
+    return {"metrics": metrics, "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+
+@router.get("/metrics/timeseries")
+async def get_metric_timeseries(
+    db: db_dependency,
+    metric: str = Query(..., min_length=1),
+    company: Optional[str] = None,
+    start: Optional[str] = Query(None, description="first period, e.g. 2024-Q1 or Q1-2024"),
+    end: Optional[str] = Query(None, description="last period, e.g. 2025-Q2 or 2025-06-30"),
+    user: dict = Depends(get_current_user),
+):
+    """One metric over time, per company, across every filing the user parsed."""
+    started = time.perf_counter()
+    try:
+        result = await run_in_threadpool(warehouse.timeseries, db, user["id"], metric, company, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result["metric"] is None:
+        raise HTTPException(status_code=404, detail=f"No facts for metric '{metric}'")
+    return {"query": metric, **result, "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
+@router.get("/metrics/compare")
+async def compare_metric(
+    db: db_dependency,
+    metric: str = Query(..., min_length=1),
+    companies: Optional[str] = Query(None, description="comma-separated tickers; all companies if omitted"),
+    period: Optional[str] = Query(None, description="e.g. Q2-2025; each company's latest period if omitted"),
+    user: dict = Depends(get_current_user),
+):
+    """One metric side by side across companies for one period."""
+    start = time.perf_counter()
+    tickers = [c.strip() for c in (companies or "").split(",") if c.strip()]
+    result = await run_in_threadpool(warehouse.compare, db, user["id"], metric, tickers, period)
+    if result["metric"] is None:
+        raise HTTPException(status_code=404, detail=f"No facts for metric '{metric}'")
+    return {"query": metric, **result, "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+
+def _get_user_job(job_id: str, user: dict) -> Job:
+    job = job_queue.get(job_id)
+    if job is None or job.owner != user["username"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user: dict = Depends(get_current_user)):
+    """Status (queued/running/done/failed) and timings of an analysis job."""
+    return _get_user_job(job_id, user).to_dict()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, user: dict = Depends(get_current_user)):
+    """Final answer of a finished job; 202 with the job status while it is still pending."""
+    job = _get_user_job(job_id, user)
+    job.refresh()
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Analysis error: {job.error}")
+    if job.status != DONE:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    return {**job.to_dict(), **job.result}
+
+
+EVENT_POLL_SECONDS = 0.25
+EVENT_KEEPALIVE_SECONDS = 15
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    user: dict = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """
+    Server-sent events for a job: task_started / step / task_completed / ...
+    ending with job_finished or job_failed. Event ids are positions in the
+    job's event log, so a reconnect with Last-Event-ID resumes where it left off.
+    """
+    job = _get_user_job(job_id, user)
+    cursor = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        nonlocal cursor
+        idle = 0.0
+        yield "retry: 2000\n\n"
+        while True:
+            events = job.events[cursor:]
+            for event in events:
+                yield f"id: {cursor}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+                cursor += 1
+            if job.closed and cursor >= len(job.events):
+                return
+            if events:
+                idle = 0.0
+            elif idle >= EVENT_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keepalive\n\n"  # stops proxies from closing an idle stream
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+            idle += EVENT_POLL_SECONDS
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ---------------------------------------------------------------------------
+# BATCH — many documents x many fields
+# ---------------------------------------------------------------------------
+@router.post("/batch", status_code=202)
+async def submit_batch(request: BatchRequest, db: db_dependency, user: dict = Depends(get_current_user)):
+    """
+    Extract a list of fields from a set of uploaded documents.
+
+    Each distinct PDF becomes one job: it is parsed once if needed, every field
+    is extracted deterministically and only the unmatched fields go to the LLM,
+    in a single call per document. Poll /analysis/batch/{batch_id} for the
+    document x field matrix.
+    """
+    document_ids = list(dict.fromkeys(request.document_ids))
+    input_fields = list(dict.fromkeys(f.strip() for f in request.input_fields if f.strip()))
+    if len(document_ids) > MAX_BATCH_DOCUMENTS or len(input_fields) > MAX_BATCH_FIELDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_DOCUMENTS} documents and "
+                                                    f"{MAX_BATCH_FIELDS} fields per batch")
+    if not input_fields:
+        raise HTTPException(status_code=422, detail="No input fields given")
+
+    found = {d.id: d for d in await run_in_threadpool(documents.get_documents, db, document_ids, user["id"])}
+    unknown = [i for i in document_ids if i not in found]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Documents not found: {unknown}")
+
+    targets = {
+        d.id: {"sha256": d.sha256, "pdf_path": d.pdf_path,
+               "json_path": d.json_path if documents.is_parsed(d) else None}
+        for d in found.values()
+    }
     try:
-        # Run the Crew
-        crew = CkdV3().crew()
-        result = crew.kickoff(inputs=inputs)
+        batch = job_queue.submit_batch(user["username"], input_fields, targets, use_llm=request.use_llm)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Analysis queue is full: {e}")
+    except PoolUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {**batch.to_dict(with_matrix=False), "status_url": f"{router.prefix}/batch/{batch.id}"}
 
-        # End trace properly
-        agentops.end_trace()
 
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "pdf_path": str(file_path),
-            "final_answer": result.output,   # ← CrewAI final summary
-        }
+@router.get("/batch/{batch_id}")
+async def get_batch(batch_id: str, user: dict = Depends(get_current_user)):
+    """Progress and the document x field matrix (cells of unfinished documents are null)."""
+    batch = job_queue.get_batch(batch_id)
+    if batch is None or batch.owner != user["username"]:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.to_dict()
 
-    except Exception as e:
-        agentops.end_trace()
-        raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+
+@router.get("/parse-cache/stats")
+async def parse_cache_stats(user: dict = Depends(get_current_user)):
+    """Hit/miss counters and on-disk size of the docling parse cache."""
+    return parse_cache.stats()
+
+
+@router.get("/answer-cache/stats")
+async def answer_cache_stats(user: dict = Depends(get_current_user)):
+    """Size, hit count and current model/prompt version of the answer cache."""
+    return await run_in_threadpool(answer_cache.stats)
 
 # @router.get("/agentops-dashboard")
 # async def get_agentops_dashboard(user: dict = Depends(get_current_user)):
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from embeddings import get_embedder
+from extraction import normalize
+import metrics
+
+
+# ---------------------------------------------------------------------------
+# Answer cache for the financial_analyst_agent.
+#
+# Analysts keep asking the same question about the same filing. A finished
+# answer is stored in SQLite under
+#     (PDF sha256, normalized field + query, model id, prompt config version)
+# and served straight from disk next time. Paraphrases can also hit when a
+# local sentence-transformers model is configured: queries for the same
+# document/model/config are compared by cosine similarity of their
+# embeddings. Entries expire after a TTL; beyond the size cap the least
+# recently used ones go first.
+# ---------------------------------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent
+ANSWER_CACHE_PATH = Path(os.getenv("ANSWER_CACHE_PATH", BASE_DIR / "answer_cache.db"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 10_000))
+ANSWER_CACHE_EMBEDDING_MODEL = os.getenv("ANSWER_CACHE_EMBEDDING_MODEL", "")  # e.g. all-MiniLM-L6-v2
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.92))
+
+CONFIG_FILES = ("config/agents.yaml", "config/tasks.yaml")
+
+# Question scaffolding that doesn't change what is being asked.
+_FILLER = frozenset("""
+    a an the of in on for to is are was were be what whats does do did how much many
+    please tell me show give report reports say says said about document filing value
+    can you could would
+""".split())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key            TEXT PRIMARY KEY,
+    doc_sha256     TEXT NOT NULL,
+    model          TEXT NOT NULL,
+    config_version TEXT NOT NULL,
+    query          TEXT NOT NULL,
+    answer         TEXT NOT NULL,
+    embedding      BLOB,
+    created_at     REAL NOT NULL,
+    last_used_at   REAL NOT NULL,
+    hits           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_answers_scope ON answers (doc_sha256, model, config_version);
+CREATE INDEX IF NOT EXISTS ix_answers_last_used ON answers (last_used_at);
+"""
+
+
+def normalize_query(input_field: str, user_query: str) -> str:
+    """'What does the report say about Total Gross Profit?' → 'total gross profit'."""
+    parts = []
+    for text in (input_field, user_query):
+        words = [w for w in normalize(text or "").split() if w not in _FILLER]
+        parts.append(" ".join(words))
+    return " | ".join(parts)
+
+
+def model_id() -> str:
+    return os.getenv("MODEL", "unknown")
+
+
+_config_version = {}
+
+
+def config_version() -> str:
+    """Hash of the agent/task prompts; editing a prompt invalidates its answers."""
+    paths = [BASE_DIR / name for name in CONFIG_FILES]
+    stamp = tuple(p.stat().st_mtime if p.exists() else 0 for p in paths)
+    if stamp not in _config_version:
+        digest = hashlib.sha256()
+        for path in paths:
+            if path.exists():
+                digest.update(path.read_bytes())
+        _config_version.clear()
+        _config_version[stamp] = digest.hexdigest()[:16]
+    return _config_version[stamp]
+
+
+def embed(query: str) -> Optional[np.ndarray]:
+    """Query embedding for paraphrase matching; None unless a local model is configured."""
+    if not ANSWER_CACHE_EMBEDDING_MODEL:
+        return None
+    return get_embedder(ANSWER_CACHE_EMBEDDING_MODEL).encode([query])[0]
+
+
+class AnswerCache:
+    def __init__(self, path: Path = ANSWER_CACHE_PATH, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES, similarity: float = ANSWER_CACHE_SIMILARITY):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call: used from the API threadpool and the job workers.
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            if not self._ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._ready = True
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key_for(doc_sha256: str, query: str, model: str, version: str) -> str:
+        material = json.dumps([doc_sha256, query, model, version])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    # --------------------------------------------------------------------
+    # LOOKUP / STORE
+    # --------------------------------------------------------------------
+    def get(self, doc_sha256: str, input_field: str, user_query: str) -> Optional[dict]:
+        """Cached answer dict (flagged cached=True), exact match first, then nearest paraphrase."""
+        query = normalize_query(input_field, user_query)
+        model, version = model_id(), config_version()
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT key, answer, query FROM answers WHERE key = ? AND created_at > ?",
+                (self.key_for(doc_sha256, query, model, version), now - self.ttl_seconds),
+            ).fetchone()
+            similarity = 1.0
+            if row is None:
+                row, similarity = self._nearest(conn, doc_sha256, model, version, query, now)
+            metrics.cache_lookup("answer", row is not None)
+            if row is None:
+                return None
+            conn.execute("UPDATE answers SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, row[0]))
+        return {**json.loads(row[1]), "cached": True, "cache": {"query": row[2], "similarity": round(similarity, 4)}}
+
+    def _nearest(self, conn, doc_sha256, model, version, query, now):
+        vector = embed(query)
+        if vector is None:
+            return None, 0.0
+        rows = conn.execute(
+            "SELECT key, answer, query, embedding FROM answers WHERE doc_sha256 = ? AND model = ? "
+            "AND config_version = ? AND created_at > ? AND embedding IS NOT NULL",
+            (doc_sha256, model, version, now - self.ttl_seconds),
+        ).fetchall()
+        if not rows:
+            return None, 0.0
+        rows = [r for r in rows if len(r[3]) == vector.nbytes]  # skip vectors from another embedder
+        if not rows:
+            return None, 0.0
+        matrix = np.stack([np.frombuffer(r[3], dtype=np.float32) for r in rows])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None, 0.0
+        return rows[best][:3], float(scores[best])
+
+    def put(self, doc_sha256: str, input_field: str, user_query: str, answer: dict):
+        query = normalize_query(input_field, user_query)
+        model, version = model_id(), config_version()
+        vector = embed(query)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, doc_sha256, model, config_version, query, answer, "
+                "embedding, created_at, last_used_at, hits) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (self.key_for(doc_sha256, query, model, version), doc_sha256, model, version, query,
+                 json.dumps(answer), None if vector is None else vector.tobytes(), now, now),
+            )
+            self._evict(conn, now)
+
+    # --------------------------------------------------------------------
+    # EVICTION / STATS
+    # --------------------------------------------------------------------
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM answers WHERE created_at <= ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY last_used_at DESC "
+            "LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM answers").fetchone()
+        return {
+            "entries": entries,
+            "hits": hits,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "model": model_id(),
+            "config_version": config_version(),
+            "embedding_model": ANSWER_CACHE_EMBEDDING_MODEL or None,
+        }
+
+
+answer_cache = AnswerCache()
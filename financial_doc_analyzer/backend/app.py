@@ -1,27 +1,36 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from database import engine, SessionLocal
+import hmac
+import os
+import threading
+import time
 from typing import Annotated
 
-from sqlalchemy.orm import Session
-import shutil
-from pathlib import Path
-import os
-from crew import CkdV3
-import auth
+from dotenv import load_dotenv
+
+load_dotenv()  # before any module reads its config from the environment
+
+from fastapi import FastAPI, Request, status, Depends, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-import agentops
-from auth import get_current_user
-from fastapi import FastAPI, status, Depends, HTTPException
-import models
-from database import engine, SessionLocal
-from typing import Annotated
-from sqlalchemy.orm import Session
 import auth
+import metrics
 from auth import get_current_user
 from analysis import router as analysis_router
-from fastapi.middleware.cors import CORSMiddleware
+from database import db_dependency, dispose_engine
+from jobs import job_queue
+from migrations import run_migrations
 
+# The crew/tool/LLM stack (crewai, litellm, agentops, docling) is only imported
+# inside the job workers. With WARM_ON_START the workers are started and warmed
+# in the background after startup; /readyz turns 200 once that is done, while
+# /healthz answers as soon as the server accepts connections.
+WARM_ON_START = os.getenv("WARM_ON_START", "1") == "1"
+
+# /metrics exposes queue depth, stage timings and route names. With a
+# METRICS_TOKEN the scraper must send it as a bearer token; without one only
+# loopback clients (a sidecar or node-local Prometheus) may scrape.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+_LOOPBACK = {"127.0.0.1", "::1", "localhost"}
 
 app = FastAPI()
 app.add_middleware(
@@ -38,16 +47,78 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(analysis_router)
 
-models.Base.metadata.create_all(bind=engine)
 
-def get_db():
-    db = SessionLocal()
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")  # the path template, so /jobs/{job_id} is one series
+    metrics.histogram("http_request_seconds", "HTTP request latency (until response headers)").observe(
+        time.perf_counter() - started, method=request.method,
+        route=getattr(route, "path", "unmatched"), status=response.status_code)
+    return response
+
+
+def _check_metrics_access(request: Request):
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token",
+                                headers={"WWW-Authenticate": "Bearer"})
+    elif request.client is None or request.client.host not in _LOOPBACK:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Set METRICS_TOKEN to scrape /metrics from another host")
+
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(_check_metrics_access)])
+def prometheus_metrics():
+    """Prometheus scrape endpoint; includes samples merged from the job workers."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+_readiness = {"ready": not WARM_ON_START, "error": None, "warm_up_seconds": None}
+
+
+def _warm_up():
+    started = time.perf_counter()
     try:
-        yield db
-    finally:
-        db.close()
+        _readiness.update(job_queue.warm_up())
+        from answer_cache import embed
+        embed("warm up")  # loads the paraphrase embedding model, if one is configured
+        _readiness["ready"] = True
+    except Exception as e:
+        _readiness["error"] = f"{type(e).__name__}: {e}"
+    _readiness["warm_up_seconds"] = round(time.perf_counter() - started, 3)
+
+
+@app.on_event("startup")
+def start_up():
+    run_migrations()
+    if WARM_ON_START:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: job workers have loaded docling and built their crews."""
+    if _readiness["ready"]:
+        return {"status": "ready", **_readiness}
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"status": "failed" if _readiness["error"] else "warming", **_readiness})
+
+
+@app.on_event("shutdown")
+async def shutdown_job_queue():
+    job_queue.shutdown()
+    dispose_engine()
+
 
-db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[dict,Depends(get_current_user)]
 
 
@@ -1,15 +1,24 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
 from starlette import status
-from database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from database import db_dependency
 from models import Users
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import jwt, JWTError
 
+import metrics
+
 router = APIRouter(
     prefix='/auth',
     tags=['auth']
@@ -22,6 +31,15 @@ ALGORITHM = 'HS256'
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/token')
 
+# bcrypt costs ~100-300 ms of CPU per hash/verify; it runs on a small pool so
+# the event loop keeps serving other requests, and beyond
+# PASSWORD_HASH_MAX_PENDING queued operations new logins get a 503 instead of
+# piling up behind each other.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+
 class CreateUserRequest(BaseModel):
     username: str
     password: str
@@ -30,14 +48,29 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-def get_db():
-    db = SessionLocal()
+# --- Password hashing pool ---
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+
+async def _run_password_op(op: str, fn, *args):
+    """Run a bcrypt call on the hashing pool; 503 when too many are already waiting."""
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+            metrics.counter("password_hash_rejected_total", "Password operations refused by backpressure").inc(op=op)
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail='Too many login attempts in progress, retry shortly.',
+                                headers={'Retry-After': '1'})
+        _hash_pending += 1
     try:
-        yield db
+        with metrics.timed("password_hash_seconds", "bcrypt hash/verify latency incl. pool wait", op=op):
+            return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
     finally:
-        db.close()
-
-db_dependency = Annotated[Session, Depends(get_db)]
+        with _hash_lock:
+            _hash_pending -= 1
 
 
 # --- JWT / Security Helper Functions ---
@@ -46,32 +79,35 @@ db_dependency = Annotated[Session, Depends(get_db)]
 def get_password_hash(password):
     return bcrypt_context.hash(password)
 
+def _add_user(db, user: Users):
+    db.add(user)
+    db.commit()
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_user(db: db_dependency,
                       create_user_request: CreateUserRequest):
     password_to_hash = create_user_request.password.encode('utf-8')[:72]
     create_user_model = Users(
         username=create_user_request.username,
-        hashed_password=bcrypt_context.hash(password_to_hash),
+        hashed_password=await _run_password_op("hash", bcrypt_context.hash, password_to_hash),
     )
-    db.add(create_user_model)
-    db.commit()
+    await run_in_threadpool(_add_user, db, create_user_model)
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
                                  db: db_dependency):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail='Could not validate User')
     token = create_access_token(user.username,user.id,timedelta(minutes=20))
     return {'access_token':token,'token_type':'bearer'}
 
-def authenticate_user(username: str, password: str, db):
-    user = db.query(Users).filter(Users.username == username).first()
+async def authenticate_user(username: str, password: str, db):
+    user = await run_in_threadpool(db.query(Users).filter(Users.username == username).first)
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.hashed_password):
+    if not await _run_password_op("verify", bcrypt_context.verify, password, user.hashed_password):
         return False
     return user
 
@@ -82,7 +118,57 @@ def create_access_token(username: str, user_id: int, expires_delta: timedelta):
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+class TokenCache:
+    """
+    Claims of already-verified JWTs, keyed by the token's sha256 digest.
+
+    An entry lives until the token's own `exp` or TOKEN_CACHE_TTL_SECONDS,
+    whichever comes first; the oldest entries are dropped beyond max_entries.
+    Only successful verifications are cached, so a bad token is always
+    re-checked (and rejected) in full.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES, ttl_seconds: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # digest → (expires_at, user)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[digest]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        metrics.cache_lookup("token", entry is not None)
+        return dict(entry[1]) if entry is not None else None
+
+    def put(self, token: str, user: dict, exp: Optional[float]):
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (expires_at, dict(user))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache()
+
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
+    user = token_cache.get(token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get('sub')
@@ -90,7 +176,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
         if username is None or user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail='Could not validate user.')
-        return {'username': username, 'id': user_id}
+        user = {'username': username, 'id': user_id}
+        token_cache.put(token, user, payload.get('exp'))
+        return user
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail='Could not validate user.')
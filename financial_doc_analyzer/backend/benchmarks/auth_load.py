@@ -0,0 +1,122 @@
+"""
+Login bursts vs. concurrent polling, against a running API.
+
+    uvicorn app:app --port 8000
+    python -m benchmarks.auth_load --base-url http://127.0.0.1:8000 --logins 200 --login-concurrency 32
+
+Creates (or reuses) a benchmark user, then polls --poll-path with a bearer
+token from --pollers threads: first alone for --baseline-seconds, then while
+--login-concurrency threads fire --logins password logins. Prints poll
+latency percentiles for both phases, login latencies and how many logins were
+refused with 503 by the hashing pool's backpressure.
+
+With bcrypt on the event loop, every login blocked all polling for the
+duration of a hash, so the burst-phase poll p95 climbed to roughly
+(concurrent logins x bcrypt time). With the hashing pool and token cache it
+should stay close to the baseline.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.retrieval import percentile
+
+
+def request(url: str, data: bytes = None, headers=None):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers or {})) as response:
+            body, code = response.read(), response.status
+    except urllib.error.HTTPError as e:
+        body, code = e.read(), e.code
+    return code, body, time.perf_counter() - started
+
+
+def login(base_url: str, username: str, password: str):
+    form = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    return request(f"{base_url}/auth/token", form, {"Content-Type": "application/x-www-form-urlencoded"})
+
+
+def latency_stats(samples) -> dict:
+    if not samples:
+        return {"n": 0}
+    ms = [seconds * 1000 for seconds in samples]
+    return {"n": len(ms), "p50_ms": round(percentile(ms, 50), 2), "p95_ms": round(percentile(ms, 95), 2),
+            "p99_ms": round(percentile(ms, 99), 2), "max_ms": round(max(ms), 2)}
+
+
+def poll(url: str, token: str, pollers: int, stop: threading.Event):
+    samples, errors = [], []
+
+    def loop():
+        while not stop.is_set():
+            code, _, seconds = request(url, headers={"Authorization": f"Bearer {token}"})
+            (samples if code == 200 else errors).append(seconds if code == 200 else code)
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(pollers)]
+    for thread in threads:
+        thread.start()
+    return threads, samples, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="bench-user")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--poll-path", default="/analysis/documents")
+    parser.add_argument("--pollers", type=int, default=4)
+    parser.add_argument("--baseline-seconds", type=float, default=5)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    args = parser.parse_args(argv)
+    base_url = args.base_url.rstrip("/")
+
+    request(f"{base_url}/auth/", json.dumps({"username": args.username, "password": args.password}).encode(),
+            {"Content-Type": "application/json"})  # 201, or an error if the user already exists
+    code, body, _ = login(base_url, args.username, args.password)
+    if code != 200:
+        sys.exit(f"login failed ({code}): {body[:200]!r}")
+    token = json.loads(body)["access_token"]
+    poll_url = f"{base_url}{args.poll_path}"
+
+    stop = threading.Event()
+    threads, baseline, baseline_errors = poll(poll_url, token, args.pollers, stop)
+    time.sleep(args.baseline_seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    stop = threading.Event()
+    threads, during, during_errors = poll(poll_url, token, args.pollers, stop)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.login_concurrency) as pool:
+        logins = list(pool.map(lambda _: login(base_url, args.username, args.password), range(args.logins)))
+    burst_seconds = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    codes = {}
+    for code, _, _ in logins:
+        codes[str(code)] = codes.get(str(code), 0) + 1
+    json.dump({
+        "poll_path": args.poll_path,
+        "pollers": args.pollers,
+        "baseline_poll": {**latency_stats(baseline), "errors": len(baseline_errors)},
+        "burst_poll": {**latency_stats(during), "errors": len(during_errors)},
+        "logins": {**latency_stats([seconds for code, _, seconds in logins if code == 200]),
+                   "status_codes": codes, "concurrency": args.login_concurrency,
+                   "per_second": round(args.logins / burst_seconds, 2)},
+    }, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Import-time guard for the API process.
+
+    cd financial_doc_analyzer/backend
+    python -m benchmarks.import_time                      # import app, check budget + forbidden modules
+    python -m benchmarks.import_time --module jobs --max-seconds 0.5 --top 15
+
+Imports --module in a fresh interpreter under `python -X importtime` and
+fails (exit 1) when
+  - the import takes longer than --max-seconds (best of --runs), or
+  - any of the heavy modules only the job workers need (crewai, litellm,
+    agentops, docling, torch, ...) got imported along the way.
+Prints the total and the slowest direct imports as JSON, so a CI step can
+both gate on it and keep the numbers.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Loaded lazily in the workers (crew_factory, llm_gateway, tools.docling_tool);
+# the API process importing any of them is a startup regression.
+FORBIDDEN = ["crewai", "crewai_tools", "litellm", "agentops", "openai", "docling",
+             "torch", "transformers", "sentence_transformers", "pymupdf", "fitz"]
+
+
+def profile_import(module: str) -> list:
+    """[(cumulative_us, self_us, name, depth)] from one `-X importtime` run."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"import {module} failed:\n{proc.stderr[-3000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((int(cumulative_us), int(self_us), name.strip(), depth))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--max-seconds", type=float, default=3.0)
+    parser.add_argument("--runs", type=int, default=3, help="best of N, to smooth out disk cache noise")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--forbid", nargs="*", default=FORBIDDEN)
+    args = parser.parse_args(argv)
+
+    runs = [profile_import(args.module) for _ in range(args.runs)]
+    totals = [sum(cumulative for cumulative, _, _, depth in rows if depth == 0) for rows in runs]
+    best = runs[totals.index(min(totals))]
+    imported = {name for _, _, name, _ in best}
+    forbidden = sorted(name for name in imported
+                       if any(name == f or name.startswith(f + ".") for f in args.forbid))
+    top = sorted((row for row in best if row[3] == 1), reverse=True)[:args.top]  # what the module pulls in
+
+    seconds = min(totals) / 1e6
+    report = {
+        "module": args.module,
+        "seconds": round(seconds, 3),
+        "max_seconds": args.max_seconds,
+        "modules_imported": len(imported),
+        "forbidden_imported": forbidden,
+        "slowest": [{"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+                    for cumulative, _, name, _ in top],
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if forbidden or seconds > args.max_seconds:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
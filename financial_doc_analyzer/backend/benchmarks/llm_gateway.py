@@ -0,0 +1,74 @@
+"""
+Drive GatewayLLM against the stub LLM and report what the gateway absorbed.
+
+    python -m benchmarks.llm_gateway --calls 40 --concurrency 16 --rate-limit-prob 0.2
+
+Starts benchmarks.stub_llm in-process, fires --calls chat calls from
+--concurrency threads (every --duplicate-every-th prompt repeats an earlier
+one, to exercise coalescing) and prints gateway counters, the stub's view
+(429s, peak concurrency) and latency percentiles as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.2)
+    parser.add_argument("--stub-max-concurrency", type=int, default=8)
+    parser.add_argument("--duplicate-every", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LLM_BACKOFF_BASE_SECONDS", "0.1")
+    from benchmarks.stub_llm import serve
+    import llm_gateway
+    from llm_gateway import GatewayLLM, gateway_stats
+
+    server = serve(args.port, args.latency_ms, args.rate_limit_prob, args.stub_max_concurrency)
+    llm = GatewayLLM(model="openai/stub", api_key="stub", base_url=f"http://127.0.0.1:{args.port}/v1",
+                     temperature=0.0)
+
+    def one_call(i: int):
+        prompt = f"question {i - 1 if args.duplicate_every and i % args.duplicate_every == 0 else i}"
+        started = time.perf_counter()
+        try:
+            llm.call([{"role": "user", "content": prompt}])
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, type(e).__name__
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_call, range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    import urllib.request
+    stub = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{args.port}/stats").read())
+    server.shutdown()
+
+    latencies = sorted(seconds for seconds, _ in results)
+    errors = [error for _, error in results if error]
+    json.dump({
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "gateway_max_concurrency": llm_gateway.LLM_MAX_CONCURRENCY,
+        "elapsed_seconds": round(elapsed, 3),
+        "latency_p50_seconds": round(latencies[len(latencies) // 2], 3),
+        "latency_p95_seconds": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "errors": errors,
+        "gateway": gateway_stats(),
+        "stub": stub,
+    }, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
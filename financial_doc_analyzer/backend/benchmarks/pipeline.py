@@ -0,0 +1,378 @@
+"""
+Offline benchmark of the ingestion → extraction → answer pipeline.
+
+    cd financial_doc_analyzer/backend
+    python -m benchmarks.pipeline run knowledge/TSLA-Q2-2025-Update.json --out bench/base.json
+    python -m benchmarks.pipeline run reports/*.pdf knowledge/*.json --concurrency 1,2,4,8 --out bench/new.json
+    python -m benchmarks.pipeline compare bench/base.json bench/new.json --threshold 0.2
+
+Stages (each run at every --concurrency level, threads in this process):
+  docling      DoclingTool on each PDF, parse cache emptied first (cold)
+  docling_hot  DoclingTool again on the same PDFs (parse cache hits)
+  index        inverted index + vector index build per document
+  extraction   extract_field_from_file per (document, field)
+  retrieval    top-k chunk retrieval per (document, field)
+  answer       jobs._answer per (document, field): retrieval, extraction and
+               the CkdV3 answer/analysis crew against benchmarks.stub_llm
+  answer_hot   answer_cache lookups for the same questions
+
+PDFs go through every stage; DoclingDocument JSON files skip the docling
+stages. Fields come from --fields or are sampled from each document's table
+row labels. Everything (parse cache, answer cache, indexes) is written under
+--work-dir (a fresh temporary directory by default), so runs never touch the
+app's caches and start cold. A --work-dir is only emptied when it is empty
+already or was created by an earlier run (it holds a .pipeline-bench marker).
+
+The result JSON holds per-stage latency percentiles and throughput for every
+concurrency level, peak RSS after each stage, cache hit rates (from the
+metrics registry) and the run's environment. `compare` diffs two results
+and exits 1 when a p95 latency rose, or a throughput fell, by more than
+--threshold.
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.retrieval import percentile
+
+STAGES = ["docling", "docling_hot", "index", "extraction", "retrieval", "answer", "answer_hot"]
+
+
+# ---------------------------------------------------------------------------
+# CORPUS
+# ---------------------------------------------------------------------------
+def sample_fields(json_path: Path, n: int):
+    """n table row labels spread over the document (what analysts ask for); section headers if it has no tables."""
+    from extraction import load_document, table_grid, header_row_count, label_column_count
+
+    doc = load_document(json_path)
+    labels = []
+    for table in doc.get("tables") or []:
+        grid = table_grid(table)
+        if not grid:
+            continue
+        header_rows = header_row_count(grid)
+        label_cols = label_column_count(grid, header_rows)
+        for row in grid[header_rows:]:
+            label = " ".join(c["text"].strip() for c in row[:label_cols] if c["text"].strip())
+            if label and not label.replace(",", "").replace(".", "").isdigit() and label not in labels:
+                labels.append(label)
+    if not labels:
+        labels = list(dict.fromkeys(t["text"].strip() for t in doc.get("texts") or []
+                                    if t.get("label") == "section_header" and t.get("text", "").strip()))
+    if len(labels) <= n:
+        return labels
+    step = len(labels) / n
+    return [labels[int(i * step)] for i in range(n)]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process plus its largest child (docling subprocesses, ingest pool)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)  # ru_maxrss is KiB on Linux
+
+
+def summarize(latencies, elapsed: float, errors: int) -> dict:
+    ms = [seconds * 1000 for seconds in latencies]
+    return {
+        "n": len(ms),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+        "mean_ms": round(statistics.mean(ms), 3),
+        "items_per_second": round(len(ms) / elapsed, 3) if elapsed else None,
+    }
+
+
+def run_stage(fn, items, concurrency: int) -> dict:
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            fn(item)
+            return time.perf_counter() - started, False
+        except Exception as e:
+            print(f"  {type(e).__name__}: {e}", file=sys.stderr)
+            return time.perf_counter() - started, True
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, items))
+    elapsed = time.perf_counter() - started
+    return summarize([seconds for seconds, _ in results], elapsed, sum(error for _, error in results))
+
+
+# ---------------------------------------------------------------------------
+# RUN
+# ---------------------------------------------------------------------------
+def configure_environment(work_dir: Path, stub_url: str):
+    """Point every cache and the LLM at the work dir / stub; must run before the app modules are imported."""
+    os.environ["PARSE_CACHE_DIR"] = str(work_dir / "parse_cache")
+    os.environ["ANSWER_CACHE_PATH"] = str(work_dir / "answer_cache.db")
+    os.environ.update({"MODEL": "openai/stub", "LLM_BASE_URL": stub_url, "LLM_API_KEY": "stub",
+                       "DOCLING_BACKEND": os.getenv("DOCLING_BACKEND", "inprocess")})
+    os.environ.pop("AGENTOPS_API_KEY", None)
+
+
+def environment() -> dict:
+    from tools.parse_cache import docling_version
+    from embeddings import get_embedder
+    from answer_cache import config_version
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "docling": docling_version(),
+        "docling_backend": os.environ["DOCLING_BACKEND"],
+        "embedder": get_embedder().name,
+        "config_version": config_version(),  # hash of config/agents.yaml + config/tasks.yaml
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def cache_effectiveness(snapshot: dict) -> dict:
+    """cache_requests_total from a metrics.drain() snapshot → {cache: {hits, misses, hit_rate}}."""
+    caches = {}
+    for labels, value in snapshot.get("cache_requests_total", {}).get("values", {}).items():
+        labels = dict(labels)
+        entry = caches.setdefault(labels["cache"], {"hits": 0, "misses": 0})
+        entry["hits" if labels["result"] == "hit" else "misses"] += int(value)
+    for entry in caches.values():
+        lookups = entry["hits"] + entry["misses"]
+        entry["hit_rate"] = round(entry["hits"] / lookups, 4) if lookups else 0.0
+    tokens = {}
+    for labels, value in snapshot.get("llm_tokens_total", {}).get("values", {}).items():
+        kind = dict(labels)["kind"]
+        tokens[kind] = tokens.get(kind, 0) + int(value)
+    return {"caches": caches, "llm_tokens": tokens}
+
+
+WORK_DIR_MARKER = ".pipeline-bench"
+
+
+def prepare_work_dir(work_dir) -> Path:
+    """An empty work directory; only ever deletes a directory an earlier run created."""
+    if work_dir is None:
+        work_dir = Path(tempfile.mkdtemp(prefix="pipeline-bench-"))
+    elif work_dir.exists():
+        if not work_dir.is_dir():
+            raise SystemExit(f"--work-dir {work_dir} is not a directory")
+        if (work_dir / WORK_DIR_MARKER).exists():
+            shutil.rmtree(work_dir)
+        elif any(work_dir.iterdir()):
+            raise SystemExit(f"--work-dir {work_dir} is not empty and was not created by this benchmark; "
+                             f"pass an empty or new directory")
+    (work_dir / "docs").mkdir(parents=True, exist_ok=True)
+    (work_dir / WORK_DIR_MARKER).touch()
+    return work_dir
+
+
+def run(args) -> dict:
+    from benchmarks.stub_llm import serve
+
+    work_dir = prepare_work_dir(args.work_dir)
+    server = serve(args.stub_port, args.stub_latency_ms, 0.0, 10 ** 6)
+    configure_environment(work_dir, f"http://127.0.0.1:{args.stub_port}/v1")
+
+    import metrics
+    from tools.parse_cache import parse_cache
+
+    pdfs = [p for p in args.corpus if p.suffix.lower() == ".pdf"]
+    json_docs = []
+    for path in args.corpus:
+        if path.suffix.lower() == ".json":
+            json_docs.append(Path(shutil.copy(path, work_dir / "docs" / path.name)))
+
+    def docling(pdf):
+        from tools.docling_tool import DoclingTool
+        json_path = DoclingTool()._run(str(pdf))
+        if not Path(json_path).exists():
+            raise RuntimeError(json_path)
+        return json_path
+
+    def clear_parse_cache():
+        for entry in parse_cache.root.iterdir():
+            if entry.is_dir():
+                shutil.rmtree(entry)
+
+    def index(json_path):
+        from doc_index import build_index_for
+        from vector_index import build_vectors_for
+        build_index_for(json_path)
+        build_vectors_for(json_path)
+
+    def extraction(item):
+        from extraction import extract_field_from_file
+        extract_field_from_file(item[0], item[1])
+
+    def retrieval(item):
+        from vector_index import retrieve
+        retrieve(item[0], item[1])
+
+    def question(item):
+        json_path, field = item
+        return {"json_path": str(json_path), "input_field": field,
+                "user_query": f"What was {field} in the latest period?"}
+
+    sha256 = {}
+
+    def answer(item):
+        from jobs import _answer
+        _answer(question(item), sha256[item[0]])
+
+    def answer_hot(item):
+        from answer_cache import answer_cache
+        q = question(item)
+        if answer_cache.get(sha256[item[0]], q["input_field"], q["user_query"]) is None:
+            raise LookupError(f"answer cache miss for {item[1]!r}")
+
+    report = {"environment": None, "corpus": [str(p) for p in args.corpus], "fields": {},
+              "concurrency": args.concurrency, "repeat": args.repeat, "stages": {}, "peak_rss_mb": {}, "skipped": {}}
+
+    def record(stage, fn, items, before_each=None, repeat=args.repeat):
+        if stage not in args.stages:
+            return
+        if not items:
+            report["skipped"][stage] = "no inputs"
+            return
+        items = items * repeat
+        results = {}
+        for concurrency in args.concurrency:
+            if before_each:
+                before_each()
+            results[str(concurrency)] = run_stage(fn, items, concurrency)
+            print(f"{stage:<12} c={concurrency:<3} {results[str(concurrency)]}", file=sys.stderr)
+        report["stages"][stage] = results
+        report["peak_rss_mb"][stage] = peak_rss_mb()
+
+    try:
+        record("docling", docling, pdfs, before_each=clear_parse_cache, repeat=1)  # repeats would hit the cache
+        record("docling_hot", docling, pdfs)
+        json_docs += [Path(docling(pdf)) for pdf in pdfs]  # parse-cache hits by now
+
+        record("index", index, json_docs)
+        for json_path in json_docs:
+            if "index" not in args.stages:
+                index(json_path)
+            sha256[json_path] = hashlib.sha256(json_path.read_bytes()).hexdigest()
+            report["fields"][json_path.name] = args.fields or sample_fields(json_path, args.fields_per_doc)
+        items = [(json_path, field) for json_path in json_docs for field in report["fields"][json_path.name]]
+
+        record("extraction", extraction, items)
+        record("retrieval", retrieval, items)
+        if importlib.util.find_spec("crewai") is None:
+            for stage in ("answer", "answer_hot"):
+                report["skipped"][stage] = "crewai is not installed"
+        else:
+            record("answer", answer, items)
+            record("answer_hot", answer_hot, items)
+
+        report["environment"] = environment()
+        report.update(cache_effectiveness(metrics.drain()))
+        report["stub_llm"] = json.loads(_get(f"http://127.0.0.1:{args.stub_port}/stats"))
+    finally:
+        server.shutdown()
+    return report
+
+
+def _get(url: str) -> bytes:
+    import urllib.request
+    return urllib.request.urlopen(url).read()
+
+
+# ---------------------------------------------------------------------------
+# COMPARE
+# ---------------------------------------------------------------------------
+def compare(base: dict, new: dict, threshold: float) -> dict:
+    """Per stage/concurrency deltas; regressions are p95 up or throughput down by more than threshold."""
+    rows, regressions = [], []
+    for stage, levels in new["stages"].items():
+        for concurrency, stats in levels.items():
+            old = base["stages"].get(stage, {}).get(concurrency)
+            if old is None:
+                continue
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "items_per_second"):
+                if not old.get(metric) or stats.get(metric) is None:
+                    continue
+                change = (stats[metric] - old[metric]) / old[metric]
+                row = {"stage": stage, "concurrency": int(concurrency), "metric": metric,
+                       "base": old[metric], "new": stats[metric], "change": round(change, 4)}
+                rows.append(row)
+                worse = change if metric != "items_per_second" else -change
+                if metric in ("p95_ms", "items_per_second") and worse > threshold:
+                    regressions.append(row)
+    rss = {stage: {"base": base["peak_rss_mb"].get(stage), "new": value}
+           for stage, value in new["peak_rss_mb"].items()}
+    caches = {name: {"base": base.get("caches", {}).get(name, {}).get("hit_rate"), "new": entry["hit_rate"]}
+              for name, entry in new.get("caches", {}).items()}
+    changed_env = {key: {"base": base["environment"].get(key), "new": value}
+                   for key, value in new["environment"].items()
+                   if key != "timestamp" and base["environment"].get(key) != value}
+    return {"threshold": threshold, "environment_changes": changed_env, "regressions": regressions,
+            "deltas": rows, "peak_rss_mb": rss, "cache_hit_rate": caches}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark a corpus of PDFs / DoclingDocument JSON files")
+    run_parser.add_argument("corpus", nargs="*", type=Path,
+                            default=[Path("knowledge/TSLA-Q2-2025-Update.json")])
+    run_parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 4])
+    run_parser.add_argument("--stages", type=lambda s: s.split(","), default=STAGES)
+    run_parser.add_argument("--fields", type=lambda s: [f.strip() for f in s.split(",")], default=None)
+    run_parser.add_argument("--fields-per-doc", type=int, default=10)
+    run_parser.add_argument("--repeat", type=int, default=3, help="run every item this many times per level")
+    run_parser.add_argument("--stub-port", type=int, default=8098)
+    run_parser.add_argument("--stub-latency-ms", type=float, default=50)
+    run_parser.add_argument("--work-dir", type=Path, default=None,
+                            help="empty or earlier benchmark directory (default: a new temporary directory)")
+    run_parser.add_argument("--out", type=Path, help="write the result JSON here (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="diff two result files")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("new", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        result = compare(json.loads(args.base.read_text()), json.loads(args.new.read_text()), args.threshold)
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        sys.exit(1 if result["regressions"] else 0)
+
+    args.corpus = [path.resolve() for path in args.corpus]
+    report = run(args)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2))
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Offline recall/latency benchmark for vector_index.py.
+
+    cd financial_doc_analyzer/backend
+    python -m benchmarks.retrieval knowledge/TSLA-Q2-2025-Update.json --k 6
+    EMBEDDING_MODEL=all-MiniLM-L6-v2 python -m benchmarks.retrieval knowledge/*.json
+
+Queries are derived from the documents themselves, so no labelled set is
+needed: for every text chunk a phrase taken from its middle, and for every
+table row "<row label> <period>". The chunk the query came from is the
+relevant one; recall@k is the share of queries that get it back in the
+top k. Context size compares the top-k prompt block with the full text of
+the document the analyst used to read.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from docling_reader import load_tolerant
+from vector_index import build_vectors, VectorIndex, format_chunks, vectors_path_for
+from embeddings import get_embedder
+
+
+def make_queries(chunks, phrase_words=8):
+    queries = []
+    for chunk in chunks:
+        if chunk["kind"] == "text":
+            words = chunk["text"].split()
+            if len(words) < phrase_words:
+                continue
+            start = (len(words) - phrase_words) // 2
+            queries.append((" ".join(words[start:start + phrase_words]), chunk["id"]))
+        else:
+            for line in chunk["text"].splitlines():
+                label, _, cells = line.partition(" | ")
+                period = cells.split(":", 1)[0] if ":" in cells else ""
+                if label:
+                    queries.append((f"{label} {period}".strip(), chunk["id"]))
+    return queries
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def bench_document(json_path: Path, k: int, out_dir: Path) -> dict:
+    doc = load_tolerant(json_path)
+    started = time.perf_counter()
+    vectors_dir = build_vectors(doc, out_dir / vectors_path_for(json_path).name)
+    build_seconds = time.perf_counter() - started
+
+    index = VectorIndex(vectors_dir)
+    queries = make_queries(index.chunks)
+    hits_at_1 = hits_at_k = 0
+    latencies, context_chars = [], []
+    for query, relevant in queries:
+        started = time.perf_counter()
+        results = index.search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids = [chunk["id"] for _, chunk in results]
+        hits_at_1 += bool(ids) and ids[0] == relevant
+        hits_at_k += relevant in ids
+        context_chars.append(len(format_chunks(results)))
+
+    full_chars = sum(len(t.get("text") or "") for t in doc.get("texts") or []) + \
+        sum(len(c["text"]) for c in index.chunks if c["kind"] == "table")
+    n = len(queries) or 1
+    return {
+        "document": str(json_path),
+        "chunks": len(index.chunks),
+        "queries": len(queries),
+        "build_seconds": round(build_seconds, 4),
+        "recall@1": round(hits_at_1 / n, 4),
+        f"recall@{k}": round(hits_at_k / n, 4),
+        "search_ms_p50": round(percentile(latencies, 50), 3) if latencies else None,
+        "search_ms_p95": round(percentile(latencies, 95), 3) if latencies else None,
+        "context_chars_mean": round(statistics.mean(context_chars)) if context_chars else 0,
+        "document_chars": full_chars,
+        "json_bytes": json_path.stat().st_size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("documents", nargs="+", type=Path, help="DoclingDocument JSON files")
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--out-dir", type=Path, default=Path("/tmp/retrieval-bench"))
+    args = parser.parse_args(argv)
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "embedder": get_embedder().name,
+        "k": args.k,
+        "results": [bench_document(path, args.k, args.out_dir) for path in args.documents],
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Local OpenAI-compatible stub LLM for offline runs of the gateway and crews.
+
+    python -m benchmarks.stub_llm --port 8099 --latency-ms 300 --rate-limit-prob 0.2 --max-concurrency 4
+
+    MODEL=openai/stub LLM_BASE_URL=http://127.0.0.1:8099/v1 LLM_API_KEY=stub uvicorn app:app
+
+POST /v1/chat/completions answers every prompt with a ReAct-style final
+answer after --latency-ms. It returns 429 (with Retry-After) at random with
+--rate-limit-prob and whenever more than --max-concurrency requests are in
+flight. GET /stats reports requests, 429s and peak concurrency.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, latency: float, rate_limit_prob: float, max_concurrency: int):
+        self.latency = latency
+        self.rate_limit_prob = rate_limit_prob
+        self.max_concurrency = max_concurrency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {"requests": 0, "completed": 0, "rate_limited": 0, "peak_concurrency": 0}
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: dict, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                with state.lock:
+                    self._send(200, dict(state.stats, in_flight=state.in_flight))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with state.lock:
+                state.stats["requests"] += 1
+                limited = state.in_flight >= state.max_concurrency or random.random() < state.rate_limit_prob
+                if limited:
+                    state.stats["rate_limited"] += 1
+                else:
+                    state.in_flight += 1
+                    state.stats["peak_concurrency"] = max(state.stats["peak_concurrency"], state.in_flight)
+            if limited:
+                self._send(429, {"error": {"message": "rate limited", "type": "rate_limit_error"}},
+                           {"Retry-After": "0.2"})
+                return
+            try:
+                time.sleep(state.latency)
+                messages = request.get("messages") or [{}]
+                prompt = str(messages[-1].get("content", ""))[:80].replace("\n", " ")
+                content = f"Thought: I now know the final answer\nFinal Answer: stub answer for: {prompt}"
+                self._send(200, {
+                    "id": f"stub-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+                })
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+                    state.stats["completed"] += 1
+
+    return Handler
+
+
+def serve(port: int = 8099, latency_ms: float = 300, rate_limit_prob: float = 0.0,
+          max_concurrency: int = 1000) -> ThreadingHTTPServer:
+    """Start the stub on a background thread; returns the server (call .shutdown() to stop)."""
+    state = StubState(latency_ms / 1000, rate_limit_prob, max_concurrency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=1000)
+    args = parser.parse_args(argv)
+    server = serve(args.port, args.latency_ms, args.rate_limit_prob, args.max_concurrency)
+    print(f"stub LLM on http://127.0.0.1:{args.port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+
+# ---------------------------------------------------------------------------
+# Crew factory: build the agent/tool graph once per process, copy per request.
+#
+# CkdV3().crew() re-reads the YAML configs and re-creates every Agent, Task
+# and tool. Here each crew variant is built (and thereby validated) once per
+# worker process; a request gets template.copy(), which has fresh tasks and
+# agents bound to the shared, stateless LLM and tools. Callbacks, task
+# outputs and usage counters live on the copy, so concurrent requests in one
+# process never see each other's state. agentops.init() also runs once per
+# process; every request opens and closes its own trace. Without an
+# AGENTOPS_API_KEY tracing is skipped (offline runs, benchmarks).
+# ---------------------------------------------------------------------------
+
+CREW_WARM_ON_START = os.getenv("CREW_WARM_ON_START", "1") == "1"
+
+
+def _analysis_crew():
+    from crew import CkdV3
+    return CkdV3().crew()
+
+
+def _answer_crew():
+    from crew import CkdV3
+    return CkdV3().answer_crew()
+
+
+def _batch_crew():
+    from crew import CkdV3
+    return CkdV3().batch_crew()
+
+
+BUILDERS: Dict[str, Callable] = {
+    "analysis": _analysis_crew,    # parse_json → answer_query
+    "answer": _answer_crew,        # answer_extracted_values
+    "batch": _batch_crew,          # extract_missing_fields
+}
+
+
+class CrewFactory:
+    def __init__(self, builders: Dict[str, Callable] = BUILDERS):
+        self.builders = builders
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._tracing_ready = False
+
+    def template(self, name: str):
+        """The validated template crew for `name`, built on first use."""
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = self._templates[name] = self.builders[name]()
+        return template
+
+    def new_crew(self, name: str):
+        """Independent crew for one request; cheap compared to rebuilding from YAML."""
+        return self.template(name).copy()
+
+    def warm_up(self):
+        for name in self.builders:
+            self.template(name)
+
+    # --------------------------------------------------------------------
+    # TRACING
+    # --------------------------------------------------------------------
+    def _init_tracing(self):
+        if not self._tracing_ready:
+            with self._lock:
+                if not self._tracing_ready:
+                    import agentops
+                    agentops.init(os.getenv("AGENTOPS_API_KEY"))
+                    self._tracing_ready = True
+
+    @contextmanager
+    def trace(self, name: str = "financial_analysis"):
+        """One AgentOps trace per request; only this request's trace is ended."""
+        if not os.getenv("AGENTOPS_API_KEY"):
+            yield None
+            return
+        import agentops
+
+        self._init_tracing()
+        trace = agentops.start_trace(name)
+        end_state = "Success"
+        try:
+            yield trace
+        except Exception:
+            end_state = "Error"
+            raise
+        finally:
+            agentops.end_trace(trace, end_state=end_state)
+
+
+crew_factory = CrewFactory()
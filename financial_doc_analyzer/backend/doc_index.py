@@ -0,0 +1,171 @@
+import json
+import os
+import re
+import shutil
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from extraction import table_grid, header_row_count, label_column_count, column_headers, item_page
+
+
+# ---------------------------------------------------------------------------
+# Inverted index over a DoclingDocument: token → texts / table cells.
+#
+# Persisted next to the JSON as <stem>.index/:
+#   tokens.npy    sorted fixed-width unicode vocabulary
+#   offsets.npy   int64, postings[offsets[i]:offsets[i+1]] belong to tokens[i]
+#   postings.npy  int32 entry ids
+#   entries.json  one record per text item / table cell (ref, page, headers, text)
+# The .npy files are memory-mapped on load, so a lookup is one binary search
+# plus a slice and never reads the whole index.
+# ---------------------------------------------------------------------------
+
+INDEX_SUFFIX = ".index"
+MAX_TOKEN_LEN = 48
+
+_TOKEN = re.compile(r"[a-z]+|\d[\d,.]*\d|\d")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words and numbers; '4,578' and '4578' index to the same token."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token[0].isdigit():
+            token = token.replace(",", "")
+        tokens.append(token[:MAX_TOKEN_LEN])
+    return tokens
+
+
+def index_path_for(json_path) -> Path:
+    return Path(json_path).with_suffix(INDEX_SUFFIX)
+
+
+# ---------------------------------------------------------------------------
+# BUILD
+# ---------------------------------------------------------------------------
+def _entries(doc: dict):
+    """Yield (entry, text to index) for every text item and table cell."""
+    for item in doc.get("texts") or []:
+        text = item.get("text") or ""
+        if text.strip():
+            yield {"ref": item.get("self_ref", ""), "kind": "text", "page": item_page(item),
+                   "label": item.get("label"), "text": text}, text
+
+    for table in doc.get("tables") or []:
+        grid = table_grid(table)
+        if not grid:
+            continue
+        header_rows = header_row_count(grid)
+        label_cols = label_column_count(grid, header_rows)
+        headers = column_headers(grid, header_rows)
+        ref, page = table.get("self_ref", ""), item_page(table)
+        for r, row in enumerate(grid):
+            row_header = " ".join(dict.fromkeys(
+                c["text"].strip() for c in row[:label_cols] if c["text"].strip()))
+            for c, cell in enumerate(row):
+                text = cell["text"].strip()
+                if not text or (c > 0 and cell is row[c - 1]):
+                    continue  # empty, or a spanning cell already indexed
+                entry = {"ref": ref, "kind": "cell", "page": page, "row": r, "col": c,
+                         "row_header": row_header if r >= header_rows else "",
+                         "col_header": headers[c] if c < len(headers) else "",
+                         "text": text}
+                yield entry, " ".join((text, entry["row_header"], entry["col_header"]))
+
+
+def build_index(doc: dict, index_dir) -> Path:
+    """Build and persist the inverted index for a parsed document."""
+    index_dir = Path(index_dir)
+    entries = []
+    postings: Dict[str, Set[int]] = defaultdict(set)
+    for entry, text in _entries(doc):
+        entry_id = len(entries)
+        entries.append(entry)
+        for token in tokenize(text):
+            postings[token].add(entry_id)
+
+    vocab = sorted(postings)
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    flat = []
+    for i, token in enumerate(vocab):
+        ids = sorted(postings[token])
+        flat.extend(ids)
+        offsets[i + 1] = offsets[i] + len(ids)
+
+    # Write into a temp dir and swap in, so concurrent readers never see a partial index.
+    tmp_dir = index_dir.with_name(f"{index_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / "tokens.npy", np.array(vocab, dtype=f"U{MAX_TOKEN_LEN}"))
+    np.save(tmp_dir / "offsets.npy", offsets)
+    np.save(tmp_dir / "postings.npy", np.array(flat, dtype=np.int32))
+    (tmp_dir / "entries.json").write_text(json.dumps(entries))
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(tmp_dir, index_dir)
+    return index_dir
+
+
+def build_index_for(json_path) -> Path:
+    from extraction import load_document
+    return build_index(load_document(json_path), index_path_for(json_path))
+
+
+# ---------------------------------------------------------------------------
+# QUERY
+# ---------------------------------------------------------------------------
+class DocumentIndex:
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        self.tokens = np.load(self.index_dir / "tokens.npy", mmap_mode="r")
+        self.offsets = np.load(self.index_dir / "offsets.npy", mmap_mode="r")
+        self.postings = np.load(self.index_dir / "postings.npy", mmap_mode="r")
+        self._entries: Optional[list] = None
+
+    @property
+    def entries(self) -> list:
+        if self._entries is None:
+            self._entries = json.loads((self.index_dir / "entries.json").read_text())
+        return self._entries
+
+    def lookup(self, token: str) -> np.ndarray:
+        i = int(np.searchsorted(self.tokens, token))
+        if i >= len(self.tokens) or self.tokens[i] != token:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def search_ids(self, query: str, match_all: bool = True) -> np.ndarray:
+        """Entry ids containing all (or any) query tokens, best-covered first."""
+        hits = [self.lookup(token) for token in dict.fromkeys(tokenize(query))]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        if match_all:
+            ids = hits[0]
+            for other in hits[1:]:
+                ids = np.intersect1d(ids, other, assume_unique=True)
+            return ids
+        ids, counts = np.unique(np.concatenate(hits), return_counts=True)
+        return ids[np.argsort(-counts, kind="stable")]
+
+    def search(self, query: str, match_all: bool = True, limit: int = 20) -> List[dict]:
+        return [self.entries[i] for i in self.search_ids(query, match_all)[:limit]]
+
+    def refs(self, query: str, match_all: bool = False) -> Set[str]:
+        """Distinct text/table refs mentioning the query tokens."""
+        return {self.entries[i]["ref"] for i in self.search_ids(query, match_all)}
+
+
+@lru_cache(maxsize=256)
+def _open_index(index_dir: str, mtime: float) -> DocumentIndex:
+    return DocumentIndex(index_dir)
+
+
+def get_index(json_path) -> DocumentIndex:
+    """Open the index for a parsed document, building it on first use."""
+    index_dir = index_path_for(json_path)
+    if not (index_dir / "entries.json").exists():
+        build_index_for(json_path)
+    return _open_index(str(index_dir), (index_dir / "entries.json").stat().st_mtime)
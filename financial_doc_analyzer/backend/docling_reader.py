@@ -0,0 +1,211 @@
+import codecs
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Streaming reader for DoclingDocument JSON.
+#
+# The top-level object is walked key by key; the big arrays (texts, tables,
+# groups, pictures, key_value_items, form_items) are decoded one element at a
+# time, so peak memory is one item plus the read buffer. Byte offsets of every
+# element are remembered, which lets resolve("#/texts/12") seek straight to an
+# item later. A truncated file yields everything that was complete.
+# ---------------------------------------------------------------------------
+
+ITEM_SECTIONS = ("texts", "tables", "groups", "pictures", "key_value_items", "form_items")
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class TruncatedDocument(Exception):
+    pass
+
+
+class _Scanner:
+    """Incremental JSON tokenizer over a UTF-8 file, tracking absolute byte offsets."""
+
+    def __init__(self, f):
+        self._f = f
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._base = 0  # byte offset of buf[0] in the file
+        self._counted = (0, 0)  # (pos, bytes of buf[:pos]) so offsets are computed incrementally
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed prefix so the buffer never grows past one item.
+        self._base = self.byte_offset()
+        self.buf = self.buf[self.pos:] + self._utf8.decode(chunk)
+        self.pos = 0
+        self._counted = (0, 0)
+        return True
+
+    def byte_offset(self) -> int:
+        pos, counted = self._counted
+        if self.pos < pos:
+            pos, counted = 0, 0
+        counted += len(self.buf[pos:self.pos].encode("utf-8"))
+        self._counted = (self.pos, counted)
+        return self._base + counted
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise TruncatedDocument("unexpected end of document")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at byte {self.byte_offset()}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise TruncatedDocument("document ends inside a value")
+                continue
+            # A number (or literal) touching the end of the buffer may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+class DoclingReader:
+    """
+    Lazy, tolerant access to a DoclingDocument JSON file.
+
+        reader = DoclingReader("TSLA-Q2-2025-Update.json")
+        for text in reader.iter_items("texts"): ...
+        reader.resolve("#/tables/3")
+        for item in reader.iter_reading_order(): ...
+    """
+
+    def __init__(self, json_path):
+        self.json_path = Path(json_path)
+        self.truncated = False
+        self._offsets: Dict[str, Tuple[int, int]] = {}   # ref -> (start, end) byte span
+        self._scalars: Dict[str, Any] = {}               # small top-level values (body, origin, ...)
+        self._fully_scanned = False
+
+    # --------------------------------------------------------------------
+    # SCAN
+    # --------------------------------------------------------------------
+    def _walk(self, wanted: Optional[str] = None) -> Iterator[Tuple[str, int, dict]]:
+        """Walk the whole document, yielding (section, index, item) for array sections."""
+        with open(self.json_path, "rb") as f:
+            scanner = _Scanner(f)
+            try:
+                scanner.expect("{")
+                while scanner.peek() != "}":
+                    key = scanner.value()
+                    scanner.expect(":")
+                    if key in ITEM_SECTIONS and scanner.peek() == "[":
+                        yield from self._walk_array(scanner, key, wanted)
+                    else:
+                        value = scanner.value()
+                        if key not in self._scalars:
+                            self._scalars[key] = value
+                    if scanner.peek() == ",":
+                        scanner.pos += 1
+                self._fully_scanned = True
+            except TruncatedDocument:
+                self.truncated = True
+                self._fully_scanned = True
+
+    def _walk_array(self, scanner: _Scanner, section: str, wanted: Optional[str]):
+        scanner.expect("[")
+        index = 0
+        while scanner.peek() != "]":
+            scanner.peek()
+            start = scanner.byte_offset()
+            item = scanner.value()
+            self._offsets[f"#/{section}/{index}"] = (start, scanner.byte_offset())
+            if wanted is None or wanted == section:
+                yield section, index, item
+            index += 1
+            if scanner.peek() == ",":
+                scanner.pos += 1
+        scanner.pos += 1
+
+    def _ensure_scanned(self):
+        if not self._fully_scanned:
+            for _ in self._walk(wanted=""):
+                pass
+
+    # --------------------------------------------------------------------
+    # PUBLIC API
+    # --------------------------------------------------------------------
+    def iter_items(self, section: str) -> Iterator[dict]:
+        """Yield items of one array section (texts, tables, ...) without loading the rest."""
+        for _, _, item in self._walk(wanted=section):
+            yield item
+
+    def get(self, key: str, default=None):
+        """Small top-level value such as body, furniture, origin, name, pages."""
+        if key not in self._scalars:
+            self._ensure_scanned()
+        return self._scalars.get(key, default)
+
+    def resolve(self, ref) -> Optional[dict]:
+        """Resolve a '$ref' pointer ('#/texts/3' or {'$ref': ...}) by seeking to the item."""
+        if isinstance(ref, dict):
+            ref = ref["$ref"]
+        if ref in ("#/body", "#/furniture"):
+            return self.get(ref[2:])
+        if ref not in self._offsets:
+            self._ensure_scanned()
+        span = self._offsets.get(ref)
+        if span is None:
+            return None
+        with open(self.json_path, "rb") as f:
+            f.seek(span[0])
+            return json.loads(f.read(span[1] - span[0]))
+
+    def iter_reading_order(self, root: str = "#/body") -> Iterator[dict]:
+        """Depth-first walk of body.children, resolving each '$ref' on demand."""
+        node = self.resolve(root)
+        if node is None:
+            return
+        stack = list(reversed(node.get("children") or []))
+        while stack:
+            item = self.resolve(stack.pop())
+            if item is None:
+                continue  # points past a truncated tail
+            yield item
+            stack.extend(reversed(item.get("children") or []))
+
+    def load(self) -> dict:
+        """Everything that could be parsed, as a plain dict (partial if truncated)."""
+        doc = {section: [] for section in ITEM_SECTIONS}
+        for section, _, item in self._walk():
+            doc[section].append(item)
+        doc.update(self._scalars)
+        return doc
+
+
+def load_tolerant(json_path) -> dict:
+    """json.load, falling back to the streaming reader for truncated documents."""
+    try:
+        with open(json_path) as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return DoclingReader(json_path).load()
@@ -0,0 +1,120 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Documents
+from tools.parse_cache import ParseCache
+import warehouse
+
+PENDING, PARSING, PARSED, FAILED = "pending", "parsing", "parsed", "failed"
+
+
+# ---------------------------------------------------------------------------
+# REGISTRY — used from API routes (with the request session) and from job
+# workers (which open their own session, see _session()).
+# ---------------------------------------------------------------------------
+def register_document(db: Session, owner_id: int, filename: str, sha256: str, pdf_path: str,
+                      company: str = None) -> Tuple[Documents, bool]:
+    """Return (record, created): the owner's existing record for these PDF bytes, or a new one.
+
+    A new record for bytes someone already parsed reuses that parse; its
+    metrics-warehouse facts are still missing (see jobs.run_warehouse_job).
+    """
+    document = get_document_by_hash(db, owner_id, sha256)
+    if document is not None:
+        if company and company.upper() != document.company:
+            warehouse.set_company(db, document, company)
+        return document, False
+    document = Documents(owner_id=owner_id, filename=filename, sha256=sha256, pdf_path=pdf_path,
+                         company=company.upper() if company else None)
+    parsed = find_parsed_by_hash(db, sha256)
+    if parsed is not None:
+        document.json_path = parsed.json_path
+        document.parse_status = PARSED
+        document.parsed_at = parsed.parsed_at
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+    return document, True
+
+
+def get_document(db: Session, document_id: int, owner_id: int) -> Optional[Documents]:
+    return db.query(Documents).filter(Documents.id == document_id,
+                                      Documents.owner_id == owner_id).first()
+
+
+def get_document_by_hash(db: Session, owner_id: int, sha256: str) -> Optional[Documents]:
+    return db.query(Documents).filter(Documents.owner_id == owner_id,
+                                      Documents.sha256 == sha256).first()
+
+
+def find_parsed_by_hash(db: Session, sha256: str) -> Optional[Documents]:
+    candidates = db.query(Documents).filter(Documents.sha256 == sha256,
+                                            Documents.parse_status == PARSED).all()
+    return next((d for d in candidates if is_parsed(d)), None)
+
+
+def get_documents(db: Session, document_ids, owner_id: int) -> List[Documents]:
+    return db.query(Documents).filter(Documents.id.in_(list(document_ids)),
+                                      Documents.owner_id == owner_id).all()
+
+
+def list_documents(db: Session, owner_id: int):
+    return db.query(Documents).filter(Documents.owner_id == owner_id).order_by(Documents.id).all()
+
+
+def is_parsed(document: Documents) -> bool:
+    return (document.parse_status == PARSED and document.json_path is not None
+            and Path(document.json_path).exists())
+
+
+def ingest_report(document: Documents) -> Optional[dict]:
+    """OCR strategy and per-page timings recorded when the PDF was converted."""
+    if not document.json_path:
+        return None
+    try:
+        return json.loads(ParseCache.report_path(document.json_path).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def document_to_dict(document: Documents, with_report: bool = False) -> dict:
+    data = {
+        "document_id": document.id,
+        "filename": document.filename,
+        "sha256": document.sha256,
+        "company": warehouse.document_company(document),
+        "parse_status": document.parse_status,
+        "parse_error": document.parse_error,
+        "json_path": document.json_path,
+        "created_at": document.created_at,
+        "parsed_at": document.parsed_at,
+    }
+    if with_report:
+        data["ingest"] = ingest_report(document)
+    return data
+
+
+def _session() -> Session:
+    return SessionLocal()
+
+
+def set_parse_status(document_id: int, status: str, json_path: str = None, error: str = None):
+    db = _session()
+    try:
+        document = db.get(Documents, document_id)
+        if document is None:
+            return
+        document.parse_status = status
+        document.parse_error = error
+        if json_path is not None:
+            document.json_path = json_path
+        if status == PARSED:
+            document.parsed_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
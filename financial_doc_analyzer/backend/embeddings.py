@@ -0,0 +1,82 @@
+import hashlib
+import os
+from functools import lru_cache
+from typing import List, Sequence
+
+import numpy as np
+
+from doc_index import tokenize
+
+
+# ---------------------------------------------------------------------------
+# Local text embeddings (no external service).
+#
+# EMBEDDING_MODEL names a sentence-transformers model (e.g. all-MiniLM-L6-v2)
+# that is loaded from the local HF cache. Without it — or without the
+# sentence-transformers package — a hashing embedder is used: word and
+# word-bigram features hashed into a fixed number of signed buckets. It has no
+# notion of synonyms but is fast, deterministic and dependency-free.
+# ---------------------------------------------------------------------------
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")
+HASHING_DIM = int(os.getenv("EMBEDDING_HASHING_DIM", 1024))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                bucket, sign = self._bucket(feature)
+                matrix[row, bucket] += sign
+        return _normalize_rows(np.sign(matrix) * np.sqrt(np.abs(matrix)))  # damp repeated terms
+
+
+class SentenceEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+@lru_cache(maxsize=4)
+def get_embedder(model_name: str = EMBEDDING_MODEL):
+    """Sentence-transformers model if configured and installed, else the hashing embedder.
+
+    Also accepts an embedder's own name ("hashing-1024"), as stored next to built vectors.
+    """
+    if model_name.startswith("hashing-"):
+        return HashingEmbedder(int(model_name.split("-", 1)[1]))
+    if model_name:
+        try:
+            return SentenceEmbedder(model_name)
+        except ImportError:
+            pass
+    return HashingEmbedder()
+
+
+def embed_texts(texts: List[str], model_name: str = EMBEDDING_MODEL) -> np.ndarray:
+    return get_embedder(model_name).encode(texts)
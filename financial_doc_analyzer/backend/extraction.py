@@ -0,0 +1,278 @@
+import os
+import re
+from dataclasses import dataclass, field, asdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+
+from docling_reader import load_tolerant
+
+
+# ---------------------------------------------------------------------------
+# Deterministic field extraction over a DoclingDocument.
+#
+# Walks tables[*].data.table_cells and texts[*], fuzzy-matches row/column
+# headers against the requested field and returns the full typed row.
+# The JSON_data_extractor LLM is only needed when nothing matches.
+# ---------------------------------------------------------------------------
+
+MATCH_THRESHOLD = float(os.getenv("EXTRACTION_MATCH_THRESHOLD", 0.8))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9%$ ]+")
+_SPACES = re.compile(r"\s+")
+_NUMBER = re.compile(r"(?<![\w.])\(?-?\$?\s?\d[\d,]*(?:\.\d+)?\s?(?:%|[KMB]\b|bps\b)?\)?", re.IGNORECASE)
+
+_SCALES = {"K": 1e3, "M": 1e6, "B": 1e9}
+_EMPTY_VALUES = {"", "-", "—", "–", "n/a", "na", "nm"}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, '&' → 'and', drop punctuation and collapse whitespace."""
+    text = text.lower().replace("&", " and ")
+    text = _NON_ALNUM.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def parse_value(text: str) -> Tuple[Optional[float], str]:
+    """
+    Parse a financial table value into (number, unit).
+
+    '(1,234)' → (-1234.0, ''), '12.5%' → (12.5, '%'), '(3.2)%' → (-3.2, '%'),
+    '$4.6B' → (4.6e9, '$'), '—' → (None, ''). Non-numeric text returns (None, '').
+    """
+    raw = text.strip()
+    if raw.lower() in _EMPTY_VALUES:
+        return None, ""
+    unit = ""
+    if "$" in raw:
+        unit = "$"
+    if raw.rstrip(")").endswith("%"):
+        unit = "%"
+    elif raw.rstrip(")").lower().endswith("bps"):
+        unit = "bps"
+    # The unit may sit outside the parentheses: '(3.2)%', '(25) bps', '$(1,234)'.
+    core = raw.lstrip("$ ")
+    core = core[:-1].rstrip() if core.endswith("%") else core
+    core = core[:-3].rstrip() if core.lower().endswith("bps") else core
+    negative = core.startswith("(") and core.endswith(")") or core.startswith("-") or core.startswith("−")
+    body = core.strip("()-−$% ").replace(",", "").replace("$", "").strip()
+    scale = 1.0
+    if body[-3:].lower() == "bps":
+        body = body[:-3].strip()
+    elif body[-1:].upper() in _SCALES:
+        scale = _SCALES[body[-1].upper()]
+        body = body[:-1].strip()
+    try:
+        value = float(body) * scale
+    except ValueError:
+        return None, ""
+    return (-value if negative else value), unit
+
+
+def similarity(field_norm: str, label_norm: str) -> float:
+    """Blend of character similarity and token containment of the field in the label."""
+    if not field_norm or not label_norm:
+        return 0.0
+    if field_norm == label_norm:
+        return 1.0
+    field_tokens, label_tokens = set(field_norm.split()), set(label_norm.split())
+    containment = len(field_tokens & label_tokens) / len(field_tokens)
+    ratio = SequenceMatcher(None, field_norm, label_norm).ratio()
+    return round(0.5 * containment + 0.5 * ratio, 4)
+
+
+@dataclass
+class FieldMatch:
+    label: str
+    score: float
+    source: str                      # "table_row" | "table_column" | "text"
+    self_ref: str
+    page: Optional[int]
+    periods: List[str] = field(default_factory=list)
+    values: List[Optional[float]] = field(default_factory=list)
+    units: List[str] = field(default_factory=list)
+    raw: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# ---------------------------------------------------------------------------
+# DOCUMENT LOADING
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def _load_document(json_path: str, mtime: float) -> dict:
+    return load_tolerant(json_path)
+
+
+def load_document(json_path) -> dict:
+    """Load a DoclingDocument JSON, memoized on (path, mtime). Truncated files load partially."""
+    json_path = str(json_path)
+    return _load_document(json_path, os.path.getmtime(json_path))
+
+
+def item_page(item: dict) -> Optional[int]:
+    prov = item.get("prov") or []
+    return prov[0].get("page_no") if prov else None
+
+
+# ---------------------------------------------------------------------------
+# TABLES
+# ---------------------------------------------------------------------------
+def table_grid(table: dict) -> List[List[dict]]:
+    """Dense num_rows x num_cols grid of cells; spanning cells fill every slot they cover."""
+    data = table.get("data") or {}
+    cells = data.get("table_cells") or []
+    num_rows = data.get("num_rows") or max((c["end_row_offset_idx"] for c in cells), default=0)
+    num_cols = data.get("num_cols") or max((c["end_col_offset_idx"] for c in cells), default=0)
+    empty = {"text": "", "column_header": False, "row_header": False}
+    grid = [[empty] * num_cols for _ in range(num_rows)]
+    for cell in cells:
+        for r in range(cell["start_row_offset_idx"], min(cell["end_row_offset_idx"], num_rows)):
+            for c in range(cell["start_col_offset_idx"], min(cell["end_col_offset_idx"], num_cols)):
+                grid[r][c] = cell
+    return grid
+
+
+def header_row_count(grid: List[List[dict]]) -> int:
+    """Leading rows flagged as column headers; falls back to the first row."""
+    count = 0
+    for row in grid:
+        if row and any(cell.get("column_header") for cell in row):
+            count += 1
+        else:
+            break
+    return count or (1 if len(grid) > 1 else 0)
+
+
+def label_column_count(grid: List[List[dict]], header_rows: int) -> int:
+    """Leading columns holding row labels (row_header cells or non-numeric text)."""
+    body = grid[header_rows:]
+    if not body or not body[0]:
+        return 0
+    count = 0
+    for c in range(len(body[0])):
+        column = [row[c] for row in body]
+        texts = [cell["text"] for cell in column if cell["text"].strip()]
+        is_label = any(cell.get("row_header") for cell in column) or (
+            texts and all(parse_value(t)[0] is None for t in texts))
+        if not is_label:
+            break
+        count += 1
+    return max(count, 1)
+
+
+def column_headers(grid: List[List[dict]], header_rows: int) -> List[str]:
+    headers = []
+    for c in range(len(grid[0]) if grid else 0):
+        parts = []
+        for r in range(header_rows):
+            text = grid[r][c]["text"].strip()
+            if text and text not in parts:
+                parts.append(text)
+        headers.append(" ".join(parts))
+    return headers
+
+
+def _match_table(table: dict, field_norm: str, threshold: float) -> List[FieldMatch]:
+    grid = table_grid(table)
+    if not grid:
+        return []
+    header_rows = header_row_count(grid)
+    label_cols = label_column_count(grid, header_rows)
+    headers = column_headers(grid, header_rows)
+    self_ref, page = table.get("self_ref", ""), item_page(table)
+    matches = []
+
+    # Row match: the field is a row label, return the values across periods.
+    for row in grid[header_rows:]:
+        label = " ".join(dict.fromkeys(cell["text"].strip() for cell in row[:label_cols] if cell["text"].strip()))
+        score = similarity(field_norm, normalize(label))
+        if score < threshold:
+            continue
+        raw = [cell["text"] for cell in row[label_cols:]]
+        parsed = [parse_value(text) for text in raw]
+        matches.append(FieldMatch(
+            label=label, score=score, source="table_row", self_ref=self_ref, page=page,
+            periods=headers[label_cols:], values=[v for v, _ in parsed],
+            units=[u for _, u in parsed], raw=raw,
+        ))
+
+    # Column match: the field is a column header, return the values per row label.
+    for c in range(label_cols, len(headers)):
+        score = similarity(field_norm, normalize(headers[c]))
+        if score < threshold:
+            continue
+        body = grid[header_rows:]
+        raw = [row[c]["text"] for row in body]
+        parsed = [parse_value(text) for text in raw]
+        matches.append(FieldMatch(
+            label=headers[c], score=score, source="table_column", self_ref=self_ref, page=page,
+            periods=[" ".join(cell["text"].strip() for cell in row[:label_cols]) for row in body],
+            values=[v for v, _ in parsed], units=[u for _, u in parsed], raw=raw,
+        ))
+    return matches
+
+
+# ---------------------------------------------------------------------------
+# TEXTS
+# ---------------------------------------------------------------------------
+def _match_text(item: dict, field_norm: str, threshold: float) -> Optional[FieldMatch]:
+    text = item.get("text") or ""
+    numbers = list(_NUMBER.finditer(text))
+    if not numbers:
+        return None
+    label = text[:numbers[0].start()].strip(" :–—-")
+    score = similarity(field_norm, normalize(label))
+    if score < threshold:
+        return None
+    raw = [m.group().strip() for m in numbers]
+    parsed = [parse_value(r) for r in raw]
+    return FieldMatch(
+        label=label, score=score, source="text", self_ref=item.get("self_ref", ""),
+        page=item_page(item), values=[v for v, _ in parsed], units=[u for _, u in parsed], raw=raw,
+    )
+
+
+# ---------------------------------------------------------------------------
+# PUBLIC API
+# ---------------------------------------------------------------------------
+def extract_field(doc: dict, input_field: str, threshold: float = MATCH_THRESHOLD,
+                  limit: int = 5, refs: Optional[Set[str]] = None) -> List[FieldMatch]:
+    """Best matches for input_field across tables and texts, highest score first.
+
+    refs optionally restricts the scan to candidate items (from the inverted index).
+    """
+    field_norm = normalize(input_field)
+    matches: List[FieldMatch] = []
+    for table in doc.get("tables") or []:
+        if refs is None or table.get("self_ref") in refs:
+            matches.extend(_match_table(table, field_norm, threshold))
+    for item in doc.get("texts") or []:
+        if refs is not None and item.get("self_ref") not in refs:
+            continue
+        match = _match_text(item, field_norm, threshold)
+        if match is not None:
+            matches.append(match)
+    # Tables beat free text at equal scores; they carry the period headers.
+    matches.sort(key=lambda m: (m.score, m.source != "text"), reverse=True)
+    return matches[:limit]
+
+
+def extract_field_from_file(json_path, input_field: str, **kwargs) -> List[FieldMatch]:
+    """extract_field on a parsed file, scanning only items the inverted index points at."""
+    from doc_index import get_index
+
+    doc = load_document(json_path)
+    refs = get_index(json_path).refs(input_field) or None  # no token hit: fall back to a full scan
+    return extract_field(doc, input_field, refs=refs, **kwargs)
+
+
+def format_matches(matches: List[FieldMatch]) -> str:
+    """Compact plain-text rendering handed to agents instead of the whole document."""
+    lines = []
+    for m in matches:
+        pairs = [f"{p}: {r}" if p else r for p, r in zip(m.periods or [""] * len(m.raw), m.raw)]
+        where = f"{m.self_ref}, page {m.page}" if m.page is not None else m.self_ref
+        lines.append(f"{m.label} ({where}): " + "; ".join(pairs))
+    return "\n".join(lines)
@@ -0,0 +1,647 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import metrics
+
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 2))
+ANALYSIS_MAX_PENDING_JOBS = int(os.getenv("ANALYSIS_MAX_PENDING_JOBS", 50))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", 3600))
+# How long a finished job's terminal event waits for the worker's last progress
+# events (they travel on the event queue, apart from the result).
+JOB_EVENTS_FLUSH_SECONDS = float(os.getenv("JOB_EVENTS_FLUSH_SECONDS", 5))
+DOCLING_WARM_ON_START = os.getenv("DOCLING_WARM_ON_START", "1") == "1"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class PoolUnavailableError(Exception):
+    """The worker pool broke and could not be rebuilt for this submit."""
+
+
+# ---------------------------------------------------------------------------
+# WORKER SIDE (runs inside the pool processes)
+# ---------------------------------------------------------------------------
+_events = None          # multiprocessing queue back to the API process
+_current_job_id = None  # one job at a time per worker process
+_warm_up_error = None   # why this worker could not build its crews, reported by _warm_ping
+
+
+def emit(event_type: str, **data):
+    """Send a progress event for the job running in this worker (no-op outside a job)."""
+    if _events is not None and _current_job_id is not None:
+        _events.put({"job_id": _current_job_id, "type": event_type, "ts": time.time(), **data})
+
+
+def _init_worker(events=None):
+    """Pool initializer: keep the event queue; load docling models and build crews once per worker."""
+    global _events, _warm_up_error
+    _events = events
+    if DOCLING_WARM_ON_START:
+        from tools.converter_service import converter_service, DOCLING_BACKEND
+        if DOCLING_BACKEND == "inprocess":
+            converter_service.warm_up()
+    from crew_factory import crew_factory, CREW_WARM_ON_START
+    if CREW_WARM_ON_START:
+        try:
+            crew_factory.warm_up()
+        except Exception as e:
+            # Raising here would break the whole pool; keep the error for
+            # JobQueue.warm_up (and so /readyz) to report instead.
+            _warm_up_error = f"{type(e).__name__}: {e}"
+
+
+def _run_job(fn: Callable[[dict], dict], job_id: str, inputs: dict) -> dict:
+    global _current_job_id
+    _current_job_id = job_id
+    try:
+        emit("job_started")
+        with metrics.timed("worker_job_seconds", "Job run time inside the worker", fn=fn.__name__):
+            return fn(inputs)  # job_finished / job_failed are added by JobQueue._finish
+    finally:
+        _current_job_id = None
+        if _events is not None:
+            # Last message of the job: its metrics, merged into the API process
+            # registry, and the mark that all of its events have been sent.
+            _events.put({"job_id": job_id, "metrics": metrics.drain()})
+
+
+def _warm_ping() -> dict:
+    # the initializer has run by the time this does
+    return {"pid": os.getpid(), "error": _warm_up_error}
+
+
+def _step_event(step) -> dict:
+    """CrewAI step_callback payload → event fields (AgentAction = tool call, AgentFinish = answer)."""
+    if hasattr(step, "tool"):
+        return {"kind": "tool_call", "tool": step.tool, "tool_input": str(step.tool_input)[:500]}
+    return {"kind": "agent_finish", "output": str(getattr(step, "output", step))[:2000]}
+
+
+def _kickoff(crew_name: str, inputs: dict):
+    # Imported here so the API process never pays for crewai/agentops.
+    from crew_factory import crew_factory
+
+    crew = crew_factory.new_crew(crew_name)
+    task_names = [task.name for task in crew.tasks]
+    completed = []
+    task_seconds = metrics.histogram("crew_task_seconds", "CrewAI task duration")
+    task_started = time.perf_counter()
+
+    def on_task(output):
+        nonlocal task_started
+        name = task_names[len(completed)] if len(completed) < len(task_names) else output.name
+        completed.append(name)
+        task_seconds.observe(time.perf_counter() - task_started, crew=crew_name, task=name)
+        task_started = time.perf_counter()
+        emit("task_completed", task=name, agent=str(output.agent).strip(), output=output.raw)
+        if len(completed) < len(task_names):
+            emit("task_started", task=task_names[len(completed)])
+
+    crew.step_callback = lambda step: emit("step", **_step_event(step))
+    crew.task_callback = on_task
+    with crew_factory.trace(), metrics.timed("crew_kickoff_seconds", "CrewAI kickoff duration", crew=crew_name):
+        if task_names:
+            emit("task_started", task=task_names[0])
+        result = crew.kickoff(inputs=inputs)
+    usage = getattr(result, "token_usage", None)
+    if usage is not None:
+        tokens = metrics.counter("llm_tokens_total", "LLM tokens used by crew runs")
+        tokens.inc(usage.prompt_tokens, crew=crew_name, kind="prompt")
+        tokens.inc(usage.completion_tokens, crew=crew_name, kind="completion")
+        tokens.inc(getattr(usage, "cached_prompt_tokens", 0) or 0, crew=crew_name, kind="cached_prompt")
+        emit("token_usage", prompt_tokens=usage.prompt_tokens,
+             completion_tokens=usage.completion_tokens, total_tokens=usage.total_tokens)
+    return result
+
+
+def _parse_document(document_id: int, pdf_path: str) -> str:
+    """Convert, index and register one document; returns the DoclingDocument JSON path.
+
+    Any failure marks the record FAILED so it can be parsed again; a worker that
+    dies mid-parse leaves it PARSING, which the API treats as stale once no live
+    job holds the document (see analysis._parse_job).
+    """
+    from tools.docling_tool import DoclingTool
+    from doc_index import build_index_for
+    from vector_index import build_vectors_for
+    import documents
+    import warehouse
+
+    documents.set_parse_status(document_id, documents.PARSING)
+    try:
+        emit("task_started", task="parse_pdf")
+        json_path = DoclingTool()._run(pdf_path)
+        emit("task_completed", task="parse_pdf", output=json_path)
+        if not Path(json_path).exists():
+            raise RuntimeError(json_path)
+        with metrics.stage("index_build"):
+            build_index_for(json_path)
+        with metrics.stage("vector_build"):
+            build_vectors_for(json_path)
+        documents.set_parse_status(document_id, documents.PARSED, json_path=json_path)
+        with metrics.stage("warehouse"):
+            facts = warehouse.index_document_id(document_id)
+    except Exception as e:
+        documents.set_parse_status(document_id, documents.FAILED, error=str(e) or type(e).__name__)
+        raise
+    emit("warehouse_indexed", document_id=document_id, facts=facts)
+    return json_path
+
+
+def run_parse_job(inputs: dict) -> dict:
+    """Convert an uploaded PDF once and record the DoclingDocument location."""
+    started_at = time.time()
+    document_id = inputs["document_id"]
+    json_path = _parse_document(document_id, inputs["pdf_path"])
+
+    return {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "document_id": document_id,
+        "json_path": json_path,
+    }
+
+
+def run_warehouse_job(inputs: dict) -> dict:
+    """Metrics-warehouse facts for a document that reused another record's parse."""
+    import warehouse
+
+    started_at = time.time()
+    with metrics.stage("warehouse"):
+        facts = warehouse.index_document_id(inputs["document_id"])
+    return {"started_at": started_at, "finished_at": time.time(),
+            "document_id": inputs["document_id"], "facts": facts}
+
+
+def _answer(inputs: dict, doc_sha256: Optional[str] = None) -> dict:
+    """Extraction + answer over a parsed document (inputs carry json_path, input_field, user_query).
+
+    The field is looked up deterministically first; the JSON_data_extractor
+    LLM only runs when the extraction engine finds no match. The analyst gets
+    the top retrieved chunks instead of the whole file.
+    """
+    from extraction import extract_field_from_file, format_matches
+    from vector_index import retrieve, format_chunks
+
+    inputs = dict(inputs)
+    retrieval_started = time.perf_counter()
+    chunks = retrieve(inputs["json_path"], f"{inputs['input_field']} {inputs['user_query']}")
+    inputs["retrieved_context"] = format_chunks(chunks)
+    retrieval_seconds = time.perf_counter() - retrieval_started
+    metrics.observe_stage("retrieval", retrieval_seconds)
+    emit("retrieval", chunks=len(chunks), pages=sorted({c["page"] for _, c in chunks if c["page"]}),
+         ms=round(retrieval_seconds * 1000, 2))
+
+    with metrics.stage("extraction"):
+        matches = extract_field_from_file(inputs["json_path"], inputs["input_field"])
+    emit("extraction", input_field=inputs["input_field"], matches=len(matches),
+         mode="deterministic" if matches else "llm")
+    if matches:
+        inputs["extracted_values"] = format_matches(matches)
+        result = _kickoff("answer", inputs)
+    else:
+        result = _kickoff("analysis", inputs)
+
+    answer = {
+        "extraction": "deterministic" if matches else "llm",
+        "extracted": [m.to_dict() for m in matches],
+        "final_answer": result.raw,  # ← CrewAI final summary
+    }
+    if doc_sha256:
+        from answer_cache import answer_cache
+        answer_cache.put(doc_sha256, inputs["input_field"], inputs["user_query"], answer)
+    return answer
+
+
+def run_crew_job(inputs: dict) -> dict:
+    """Upload → answer in one job. Executed in a worker process.
+
+    Ingestion is a plain pipeline stage (convert, index, register); the crew
+    starts from the parsed document, so no LLM round trip decides to call
+    docling or has to echo the JSON path back.
+    """
+    started_at = time.time()
+    inputs = dict(inputs)
+    document_id = inputs.pop("document_id")
+    doc_sha256 = inputs.pop("sha256", None)
+    json_path = _parse_document(document_id, inputs.pop("pdf_path"))
+    answer = _answer({**inputs, "json_path": json_path}, doc_sha256)
+
+    return {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "document_id": document_id,
+        "json_path": json_path,
+        **answer,
+    }
+
+
+def run_query_job(inputs: dict) -> dict:
+    """Answer a question about an already-parsed document (no ingestion stage)."""
+    started_at = time.time()
+    inputs = dict(inputs)
+    doc_sha256 = inputs.pop("sha256", None)
+    answer = _answer(inputs, doc_sha256)
+
+    return {"started_at": started_at, "finished_at": time.time(), **answer}
+
+
+def _parse_llm_fields(raw: str, fields: List[str]) -> Dict[str, Any]:
+    """The batch extractor answers with a JSON object {field: value}; tolerate fences and chatter."""
+    import json
+
+    start, end = raw.find("{"), raw.rfind("}")
+    try:
+        values = json.loads(raw[start:end + 1]) if start != -1 else {}
+    except ValueError:
+        values = {}
+    return {f: values.get(f) for f in fields}
+
+
+def run_metrics_job(inputs: dict) -> dict:
+    """Batch worker: one document, many fields.
+
+    Parses the document if needed, extracts every field deterministically and
+    sends only the fields without a match to the LLM — in a single call.
+    """
+    started_at = time.time()
+    from extraction import extract_field_from_file
+    from vector_index import retrieve, format_chunks
+
+    json_path = inputs.get("json_path") or _parse_document(inputs["document_id"], inputs["pdf_path"])
+    fields = inputs["input_fields"]
+
+    results, missing = {}, []
+    for input_field in fields:
+        with metrics.stage("extraction"):
+            matches = extract_field_from_file(json_path, input_field)
+        if matches:
+            results[input_field] = {"extraction": "deterministic", **matches[0].to_dict()}
+        else:
+            missing.append(input_field)
+    emit("extraction", matched=len(fields) - len(missing), missing=len(missing))
+
+    if missing and inputs.get("use_llm", True):
+        context = "\n\n".join(format_chunks(retrieve(json_path, f, k=3)) for f in missing)
+        result = _kickoff("batch", {
+            "json_path": json_path,
+            "input_fields": "\n".join(f"- {f}" for f in missing),
+            "retrieved_context": context,
+        })
+        for input_field, value in _parse_llm_fields(result.raw, missing).items():
+            results[input_field] = {"extraction": "llm", "value": value}
+    for input_field in missing:
+        results.setdefault(input_field, {"extraction": "none", "value": None})
+
+    return {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "document_ids": inputs["document_ids"],
+        "json_path": json_path,
+        "metrics": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# API SIDE
+# ---------------------------------------------------------------------------
+@dataclass
+class Job:
+    id: str
+    kind: str
+    owner: str
+    inputs: dict
+    status: str = QUEUED
+    queued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    events: List[dict] = field(default_factory=list, repr=False)  # append-only: SSE ids are positions
+    future: Any = field(default=None, repr=False)
+    flushed: bool = field(default=False, repr=False)              # the worker sent its last event
+    terminal: Optional[dict] = field(default=None, repr=False)     # job_finished/job_failed, once known
+
+    @property
+    def closed(self) -> bool:
+        """True once the terminal event is in; no more events will arrive."""
+        return bool(self.events) and self.events[-1]["type"] in ("job_finished", "job_failed")
+
+    def refresh(self):
+        if self.status == QUEUED and self.future is not None and self.future.running():
+            self.status = RUNNING
+
+    def to_dict(self) -> dict:
+        self.refresh()
+        timings = {"queued_at": self.queued_at, "started_at": self.started_at, "finished_at": self.finished_at}
+        if self.started_at:
+            timings["queue_seconds"] = round(self.started_at - self.queued_at, 3)
+        if self.started_at and self.finished_at:
+            timings["run_seconds"] = round(self.finished_at - self.started_at, 3)
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "timings": timings,
+            "error": self.error,
+        }
+
+
+@dataclass
+class Batch:
+    """Many documents x many fields: one run_metrics_job per distinct PDF."""
+    id: str
+    owner: str
+    input_fields: List[str]
+    jobs: Dict[str, Job]                 # sha256 → job
+    documents: Dict[int, str]            # document id → sha256
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def finished_at(self) -> Optional[float]:
+        times = [job.finished_at for job in self.jobs.values()]
+        return max(times) if times and all(times) else None
+
+    def to_dict(self, with_matrix: bool = True) -> dict:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self.jobs.values():
+            job.refresh()
+            counts[job.status] += 1
+        pending = counts[QUEUED] + counts[RUNNING]
+        response = {
+            "batch_id": self.id,
+            "status": RUNNING if pending else (FAILED if counts[FAILED] == len(self.jobs) else DONE),
+            "documents": len(self.documents),
+            "input_fields": self.input_fields,
+            "jobs": counts,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 3),
+        }
+        if with_matrix:
+            matrix, errors = {}, {}
+            for document_id, sha256 in self.documents.items():
+                job = self.jobs[sha256]
+                if job.status == DONE:
+                    matrix[document_id] = job.result["metrics"]
+                else:
+                    matrix[document_id] = {f: None for f in self.input_fields}
+                    if job.status == FAILED:
+                        errors[document_id] = job.error
+            response["matrix"] = matrix
+            response["errors"] = errors
+        return response
+
+
+class JobQueue:
+    """
+    Bounded process pool for crew runs.
+
+    Job bookkeeping lives in the API process; the pool processes only see the
+    picklable inputs and return a plain dict, so a crashed crew can't take the
+    event loop down with it.
+    """
+
+    def __init__(self, max_workers: int = ANALYSIS_WORKERS, max_pending: int = ANALYSIS_MAX_PENDING_JOBS):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._batches: Dict[str, Batch] = {}
+        self._lock = threading.Lock()
+        self._executor_lock = threading.RLock()
+        self._events_lock = threading.Lock()
+        self._events = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a running uvicorn (threads, sockets) is unsafe
+                context = multiprocessing.get_context("spawn")
+                self._events = context.Queue()
+                threading.Thread(target=self._drain_events, args=(self._events,),
+                                 name="job-events", daemon=True).start()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._events,),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool (a worker died: OOM, segfault, initializer error) and its event queue.
+
+        Its pending futures fail with BrokenProcessPool, which _finish records on
+        their jobs; the next submit starts a fresh pool.
+        """
+        with self._executor_lock:
+            if self._executor is not executor:
+                return  # already replaced
+            self._executor, events = None, self._events
+            self._events = None
+        metrics.counter("job_pool_restarts_total", "Worker pools discarded after a worker died").inc()
+        executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            events.put(None)  # stops that queue's drain thread
+        except (OSError, ValueError):
+            pass
+
+    def _drain_events(self, events):
+        """Move worker events onto their jobs (runs on a daemon thread in the API process)."""
+        while True:
+            try:
+                event = events.get()
+            except (EOFError, OSError):
+                return
+            if event is None:
+                return
+            job = self._jobs.get(event.pop("job_id", None))
+            if "metrics" in event:
+                metrics.merge(event["metrics"])
+                if job is not None:
+                    with self._events_lock:
+                        job.flushed = True
+                        self._close(job)
+                continue
+            if job is None:
+                continue
+            with self._events_lock:
+                if job.closed:
+                    continue  # the job was closed without waiting (its worker died): history is final
+                if event["type"] == "job_started" and job.status == QUEUED:
+                    job.status, job.started_at = RUNNING, event["ts"]
+                job.events.append(event)
+
+    @staticmethod
+    def _close(job: Job):
+        """Append the terminal event once both the outcome and the worker's last event are in.
+
+        Events are only ever appended, so SSE ids (log positions) never change.
+        Call with _events_lock held.
+        """
+        if job.terminal is not None and job.flushed and not job.closed:
+            job.events.append(job.terminal)
+
+    def pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+
+    def _purge(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[job_id]
+        for batch_id, batch in list(self._batches.items()):
+            if batch.finished_at and batch.finished_at < cutoff:
+                del self._batches[batch_id]
+
+    def _enqueue(self, kind: str, fn: Callable[[dict], dict], inputs: dict, owner: str) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, owner=owner, inputs=inputs)
+        for attempt in range(2):  # a pool found broken is rebuilt once
+            executor = self._get_executor()
+            try:
+                job.future = executor.submit(_run_job, fn, job.id, inputs)
+                break
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+        else:
+            raise PoolUnavailableError("analysis workers are restarting, retry shortly")
+        self._jobs[job.id] = job
+        job.future.add_done_callback(lambda future: self._finish(job, future, executor))
+        return job
+
+    def submit(self, kind: str, fn: Callable[[dict], dict], inputs: dict, owner: str) -> Job:
+        with self._lock:
+            self._purge()
+            if self.pending() >= self.max_pending:
+                raise QueueFullError(f"{self.max_pending} jobs already pending")
+            return self._enqueue(kind, fn, inputs, owner)
+
+    def submit_batch(self, owner: str, input_fields: List[str], targets: Dict[int, dict],
+                     use_llm: bool = True) -> Batch:
+        """
+        Fan a batch out as one run_metrics_job per distinct PDF.
+
+        targets maps document id → {"sha256", "pdf_path", "json_path" (None if unparsed)};
+        documents sharing a sha256 are parsed and extracted once. A batch counts
+        against the pending limit as a whole, so it is admitted while the queue
+        has room and then enqueued in full.
+        """
+        with self._lock:
+            self._purge()
+            if self.pending() >= self.max_pending:
+                raise QueueFullError(f"{self.max_pending} jobs already pending")
+            by_hash: Dict[str, List[int]] = {}
+            for document_id, target in targets.items():
+                by_hash.setdefault(target["sha256"], []).append(document_id)
+            jobs = {}
+            for sha256, document_ids in by_hash.items():
+                target = targets[document_ids[0]]
+                jobs[sha256] = self._enqueue("batch-metrics", run_metrics_job, {
+                    "document_id": document_ids[0],
+                    "document_ids": document_ids,
+                    "pdf_path": target["pdf_path"],
+                    "json_path": target["json_path"],
+                    "input_fields": input_fields,
+                    "use_llm": use_llm,
+                }, owner)
+            batch = Batch(id=uuid.uuid4().hex, owner=owner, input_fields=input_fields, jobs=jobs,
+                          documents={document_id: t["sha256"] for document_id, t in targets.items()})
+            self._batches[batch.id] = batch
+        return batch
+
+    def warm_up(self) -> dict:
+        """Start the pool and wait until its workers have run _init_worker (docling models, crews).
+
+        Raises when a worker could not build its crews, so readiness fails instead of
+        every later job failing on the same error.
+        """
+        executor = self._get_executor()
+        try:
+            futures = [executor.submit(_warm_ping) for _ in range(self.max_workers)]
+            pings = [future.result() for future in futures]
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        errors = sorted({ping["error"] for ping in pings if ping["error"]})
+        if errors:
+            raise RuntimeError(f"worker warm-up failed: {'; '.join(errors)}")
+        return {"workers_warmed": len({ping["pid"] for ping in pings})}
+
+    def get_batch(self, batch_id: str) -> Optional[Batch]:
+        return self._batches.get(batch_id)
+
+    def _finish(self, job: Job, future, executor: ProcessPoolExecutor = None):
+        exc = CancelledError("worker pool was shut down") if future.cancelled() else future.exception()
+        if isinstance(exc, BrokenProcessPool) and executor is not None:
+            self._discard_executor(executor)
+        if exc is not None:
+            job.status, job.error = FAILED, str(exc)
+            job.finished_at = time.time()
+            terminal = {"type": "job_failed", "ts": job.finished_at, "error": job.error}
+        else:
+            job.result = future.result()
+            job.started_at = job.result.pop("started_at", None)
+            job.finished_at = job.result.pop("finished_at", time.time())
+            job.status = DONE
+            terminal = {"type": "job_finished", "ts": job.finished_at}
+        with self._events_lock:
+            job.terminal = terminal
+            if isinstance(exc, (BrokenProcessPool, CancelledError)):
+                job.flushed = True  # the worker died or never ran the job: nothing more will come
+            self._close(job)
+        if not job.closed:
+            # Its last events are still on the queue; close anyway if they got lost
+            # with a discarded pool's queue.
+            timer = threading.Timer(JOB_EVENTS_FLUSH_SECONDS, self._flush_timeout, args=(job,))
+            timer.daemon = True
+            timer.start()
+        self._observe(job)
+
+    def _flush_timeout(self, job: Job):
+        with self._events_lock:
+            job.flushed = True
+            self._close(job)
+
+    @staticmethod
+    def _observe(job: Job):
+        metrics.counter("jobs_total", "Finished jobs by kind and status").inc(kind=job.kind, status=job.status)
+        if job.started_at:
+            metrics.histogram("job_queue_seconds", "Time from submit to worker start").observe(
+                job.started_at - job.queued_at, kind=job.kind)
+            metrics.histogram("job_run_seconds", "Job run time in the worker").observe(
+                job.finished_at - job.started_at, kind=job.kind, status=job.status)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def live_job_for(self, document_id: int, kinds) -> Optional[Job]:
+        """A queued or running job of one of `kinds` working on `document_id` (this process's jobs only)."""
+        for job in list(self._jobs.values()):
+            if job.kind in kinds and job.status in (QUEUED, RUNNING) and job.inputs.get("document_id") == document_id:
+                return job
+        return None
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._events.put(None)
+
+
+job_queue = JobQueue()
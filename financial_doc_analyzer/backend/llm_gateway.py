@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from crewai import LLM
+
+import metrics
+
+
+# ---------------------------------------------------------------------------
+# LLM gateway: every CkdV3 agent talks to its provider through GatewayLLM.
+#
+#   - HTTP connection pooling: one shared httpx client for litellm
+#   - per-model concurrency cap (semaphore) and token-bucket request rate
+#   - retries with jittered exponential backoff on 429/5xx/connection errors,
+#     bounded by an overall deadline per call
+#   - coalescing: identical prompts already in flight share one request
+#
+# Limits are per process; with ANALYSIS_WORKERS worker processes the provider
+# sees up to ANALYSIS_WORKERS x LLM_MAX_CONCURRENCY requests in flight.
+# Point LLM_BASE_URL at benchmarks/stub_llm.py to exercise all of this offline.
+# ---------------------------------------------------------------------------
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+LLM_BURST = int(os.getenv("LLM_BURST", 5))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 180))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 1.0))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 30.0))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 20))
+
+_RETRYABLE_ERRORS = {"RateLimitError", "APIConnectionError", "Timeout", "APITimeoutError",
+                     "InternalServerError", "ServiceUnavailableError", "BadGatewayError"}
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+CALL_HELP = "LLM call latency including rate-limit waits and retries"
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+class TokenBucket:
+    """`rate` requests per second on average, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float) -> float:
+        """Take one token, sleeping as needed; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                raise LLMDeadlineExceeded("rate limit wait exceeds the call deadline")
+            time.sleep(wait)
+            waited += wait
+
+
+class _ModelLimits:
+    def __init__(self):
+        self.semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+        self.bucket = TokenBucket(LLM_REQUESTS_PER_MINUTE / 60.0, LLM_BURST)
+
+
+_limits: Dict[str, _ModelLimits] = {}
+_inflight: Dict[str, Future] = {}
+_registry_lock = threading.Lock()
+_stats = {"calls": 0, "requests": 0, "coalesced": 0, "retries": 0, "failures": 0,
+          "deadline_exceeded": 0, "rate_wait_seconds": 0.0}
+
+
+def _limits_for(model: str) -> _ModelLimits:
+    with _registry_lock:
+        if model not in _limits:
+            _limits[model] = _ModelLimits()
+        return _limits[model]
+
+
+def _count(counter: str, amount=1):
+    with _registry_lock:
+        _stats[counter] += amount
+
+
+def gateway_stats() -> dict:
+    with _registry_lock:
+        return dict(_stats)
+
+
+_http_configured = False
+
+
+def configure_http_pool():
+    """Share one pooled httpx client across all litellm calls in this process."""
+    global _http_configured
+    if _http_configured:
+        return
+    import httpx
+    import litellm
+
+    litellm.client_session = httpx.Client(
+        limits=httpx.Limits(max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS),
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+    )
+    _http_configured = True
+
+
+def is_retryable(exc: Exception) -> bool:
+    if type(exc).__name__ in _RETRYABLE_ERRORS:
+        return True
+    return getattr(exc, "status_code", None) in _RETRYABLE_STATUS
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff; a server Retry-After is a lower bound."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class GatewayLLM(LLM):
+    """crewai LLM whose call() goes through the gateway's limits, retries and coalescing.
+
+    Always litellm-backed: LLM.__new__ otherwise hands known models (gpt-4o, gemini/...)
+    to a native provider class, and the gateway would be silently bypassed.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        kwargs["is_litellm"] = True
+        return super().__new__(cls, *args, **kwargs)
+
+    def __init__(self, *args, deadline_seconds: float = LLM_DEADLINE_SECONDS, **kwargs):
+        kwargs.setdefault("timeout", LLM_TIMEOUT_SECONDS)
+        kwargs["is_litellm"] = True
+        super().__init__(*args, **kwargs)
+        self.deadline_seconds = deadline_seconds
+        configure_http_pool()
+
+    def __copy__(self) -> "GatewayLLM":
+        # Crew.copy() shallow-copies each agent's LLM, and LLM.__copy__ builds a plain LLM.
+        # The limits are per model, not per instance, so a fresh GatewayLLM shares them.
+        return GatewayLLM(model=self.model, api_key=self.api_key, base_url=self.base_url,
+                          temperature=self.temperature, max_tokens=self.max_tokens, stop=self.stop,
+                          timeout=self.timeout, deadline_seconds=self.deadline_seconds)
+
+    def _coalesce_key(self, messages, tools) -> str:
+        material = json.dumps([self.model, self.temperature, messages, tools], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def call(self, messages, tools=None, *args, **kwargs):
+        _count("calls")
+        deadline = time.monotonic() + self.deadline_seconds
+        key = self._coalesce_key(messages, tools)
+        with _registry_lock:
+            leader = _inflight.get(key)
+            if leader is None:
+                future = _inflight[key] = Future()
+        if leader is not None:
+            _count("coalesced")
+            metrics.cache_lookup("llm_coalesce", True)
+            with metrics.timed("llm_call_seconds", CALL_HELP, model=self.model, coalesced="true"):
+                return leader.result(timeout=max(0.0, deadline - time.monotonic()))
+
+        metrics.cache_lookup("llm_coalesce", False)
+        try:
+            with metrics.timed("llm_call_seconds", CALL_HELP, model=self.model, coalesced="false"):
+                result = self._call_with_retries(deadline, messages, tools, *args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _registry_lock:
+                _inflight.pop(key, None)
+
+    def _call_with_retries(self, deadline: float, messages, tools, *args, **kwargs):
+        limits = _limits_for(self.model)
+        attempt = 0
+        requests = metrics.counter("llm_requests_total", "Provider requests by model and outcome")
+        while True:
+            waited = limits.bucket.acquire(deadline)
+            _count("rate_wait_seconds", waited)
+            metrics.histogram("llm_rate_wait_seconds", "Time spent waiting for the token bucket").observe(
+                waited, model=self.model)
+            if not limits.semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                _count("deadline_exceeded")
+                requests.inc(model=self.model, outcome="deadline_exceeded")
+                raise LLMDeadlineExceeded(f"no free {self.model} slot before the deadline")
+            try:
+                _count("requests")
+                with metrics.timed("llm_request_seconds", "Single provider request latency", model=self.model):
+                    result = super().call(messages, tools, *args, **kwargs)
+                requests.inc(model=self.model, outcome="ok")
+                return result
+            except Exception as e:
+                requests.inc(model=self.model, outcome=type(e).__name__)
+                if not is_retryable(e) or attempt >= LLM_MAX_RETRIES:
+                    _count("failures")
+                    raise
+                delay = backoff_delay(attempt, _retry_after(e))
+                if time.monotonic() + delay >= deadline:
+                    _count("deadline_exceeded")
+                    raise LLMDeadlineExceeded(f"{self.model}: giving up after {attempt + 1} attempts") from e
+            finally:
+                limits.semaphore.release()
+            _count("retries")
+            attempt += 1
+            time.sleep(delay)
+
+
+_llm: Optional[GatewayLLM] = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> GatewayLLM:
+    """Process-wide gateway LLM for the model configured in MODEL (LLM_BASE_URL for a stub/proxy)."""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = GatewayLLM(
+                model=os.getenv("MODEL"),
+                api_key=os.getenv("LLM_API_KEY") or os.getenv("GEMINI_API_KEY"),
+                base_url=os.getenv("LLM_BASE_URL") or None,
+                temperature=0.0,
+            )
+        return _llm
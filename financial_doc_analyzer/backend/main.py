@@ -1,49 +1,37 @@
-from pathlib import Path
-import os
-#
-import agentops
+import json
 import sys
 import warnings
 
-from datetime import datetime
-#
-from crew import CkdV3
-#
+from dotenv import load_dotenv
+
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
+
+
+# This main file is intended to be a way for you to run your
+# crew locally, so refrain from adding unnecessary logic into this file.
 #
-agentops.init(os.getenv("AGENTOPS_API_KEY"))
-#
-#
-# # This main file is intended to be a way for you to run your
-# # crew locally, so refrain from adding unnecessary logic into this file.
-# # Replace with inputs you want to test with, it will automatically
-# # interpolate any tasks and agents information
+#   python main.py knowledge/TSLA-Q2-2025-Update.json "Total gross profit" \
+#       "What does the report say about total gross profit?"
 #
-# #
-from crew import FullFinancialRAGCrew
+# Runs the same extraction + answer stages as /analysis/documents/{id}/query,
+# in this process. AgentOps tracing starts only when AGENTOPS_API_KEY is set.
 def main():
-     crew = FullFinancialRAGCrew().crew()
-# #
-     results = crew.kickoff(
-     inputs={
-             "query": "What does the report say about total gross profit?"
-         }
-     )
-     print("\n" + "=" * 50)
-     print("✅ CREW EXECUTION FINISHED")
-     print("=" * 50)
-
-# #     # Print individual task results
-     print(f"\n[Task 1: PDF Processing Status]\n{results['pdf_processing_status']}")
-     print(f"\n[Task 2: RAG Search Result]\n{results['search_result']}")
-
-     # The final output of the whole Crew is usually the result of the last task
-     print("\nFINAL ANSWER:")
-     print(results['search_result'])
-
-     print("\n--- FINAL RESULT ---\n")
-     print(results)
-# #
+    load_dotenv()
+    from jobs import run_query_job
+
+    if len(sys.argv) != 4:
+        sys.exit(f"usage: {sys.argv[0]} <docling json> <input field> <question>")
+    json_path, input_field, user_query = sys.argv[1:]
+    result = run_query_job({"json_path": json_path, "input_field": input_field, "user_query": user_query})
+
+    print("\n" + "=" * 50)
+    print("✅ CREW EXECUTION FINISHED")
+    print("=" * 50)
+    print(f"\n[Extraction: {result['extraction']}]")
+    print(json.dumps(result["extracted"], indent=2))
+    print("\nFINAL ANSWER:")
+    print(result["final_answer"])
+
+
 if __name__ == "__main__":
-     main()
-#
+    main()
@@ -0,0 +1,226 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# In-process metrics with Prometheus text exposition (GET /metrics).
+#
+# Counters and histograms only: both are additive, so worker processes keep
+# their own registry and ship the accumulated deltas back to the API process
+# with each finished job (jobs._run_job → event queue → JobQueue), where they
+# are merged. timed() also opens an OpenTelemetry span when OTEL_ENABLED=1
+# and the opentelemetry package is installed.
+# ---------------------------------------------------------------------------
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "0") == "1"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        return {"kind": self.kind, "help": self.help, "values": dict(self.values)}
+
+    def merge(self, values: dict):
+        for key, value in values.items():
+            self.values[key] = self.values.get(key, 0) + value
+
+    def render(self) -> Iterable[str]:
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(key)} {value:g}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.buckets = name, help, tuple(buckets)
+        self.values: Dict[Labels, list] = {}   # labels → [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with _lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict:
+        return {"kind": self.kind, "help": self.help, "buckets": self.buckets,
+                "values": {k: list(v) for k, v in self.values.items()}}
+
+    def merge(self, values: dict):
+        for key, incoming in values.items():
+            series = self.values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, value in enumerate(incoming):
+                series[i] += value
+
+    def render(self) -> Iterable[str]:
+        for key, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {series[-1]:g}"
+            yield f"{self.name}_count{_format_labels(key)} {cumulative}"
+
+
+_lock = threading.RLock()
+_registry: Dict[str, object] = {}
+
+
+def _get(cls, name: str, help: str, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, **kwargs)
+        return metric
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return _get(Counter, name, help)
+
+
+def histogram(name: str, help: str = "", buckets=LATENCY_BUCKETS) -> Histogram:
+    return _get(Histogram, name, help, buckets=buckets)
+
+
+# ---------------------------------------------------------------------------
+# TIMING / TRACING
+# ---------------------------------------------------------------------------
+_tracer = None
+
+
+def _configure_tracer_provider(trace):
+    """Export spans over OTLP when that exporter is installed, else to stdout (unless already configured)."""
+    if type(trace.get_tracer_provider()).__name__ != "ProxyTracerProvider":
+        return
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()  # OTEL_EXPORTER_OTLP_ENDPOINT, default localhost:4318
+    except ImportError:
+        exporter = ConsoleSpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+            _configure_tracer_provider(trace)
+            _tracer = trace.get_tracer("financial_doc_analyzer")
+        except ImportError:
+            _tracer = False
+    return _tracer or None
+
+
+@contextmanager
+def timed(name: str, help: str = "", **labels):
+    """Observe the block's duration in histogram `name` (seconds), plus an OTel span if enabled."""
+    tracer = _get_tracer() if OTEL_ENABLED else None
+    span_cm = tracer.start_as_current_span(name, attributes=labels) if tracer else None
+    if span_cm is not None:
+        span_cm.__enter__()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name, help).observe(time.perf_counter() - started, **labels)
+        if span_cm is not None:
+            span_cm.__exit__(None, None, None)
+
+
+def timed_tool(run):
+    """Decorator for a crewai BaseTool._run: latency per tool name."""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        with timed("tool_call_seconds", "Agent tool call latency", tool=self.name):
+            return run(self, *args, **kwargs)
+    return wrapper
+
+
+def stage(name: str):
+    """Time one deterministic pipeline stage (upload, hash, convert, index_build, ...)."""
+    return timed("pipeline_stage_seconds", "Duration of deterministic pipeline stages", stage=name)
+
+
+def observe_stage(name: str, seconds: float):
+    histogram("pipeline_stage_seconds", "Duration of deterministic pipeline stages").observe(seconds, stage=name)
+
+
+def cache_lookup(cache: str, hit: bool):
+    counter("cache_requests_total", "Cache lookups by cache and result").inc(
+        cache=cache, result="hit" if hit else "miss")
+
+
+# ---------------------------------------------------------------------------
+# CROSS-PROCESS MERGE / EXPOSITION
+# ---------------------------------------------------------------------------
+def drain() -> dict:
+    """Snapshot of everything recorded since the last drain, and reset (worker side)."""
+    with _lock:
+        snapshot = {name: metric.snapshot() for name, metric in _registry.items() if metric.values}
+        for metric in _registry.values():
+            metric.values = {}
+    return snapshot
+
+
+def merge(snapshot: dict):
+    """Add a worker's drained snapshot into this process's registry (API side)."""
+    with _lock:
+        for name, data in snapshot.items():
+            if data["kind"] == "counter":
+                counter(name, data["help"]).merge(data["values"])
+            else:
+                histogram(name, data["help"], data["buckets"]).merge(data["values"])
+
+
+def render() -> str:
+    lines = []
+    with _lock:
+        for name, metric in sorted(_registry.items()):
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,131 @@
+import fcntl
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from database import engine
+
+
+# ---------------------------------------------------------------------------
+# Schema migrations, applied once at startup (app.py) instead of
+# Base.metadata.create_all() on import.
+#
+# MIGRATIONS is append-only: (version, description, fn(connection)). Applied
+# versions are recorded in schema_migrations. Version 1 adopts whatever
+# tables already exist (create_all skips them) and creates the rest.
+#
+# Every worker process runs this at startup, so runs are serialized: SQLite
+# takes an flock on <database>.migrate.lock, Postgres a session advisory
+# lock. The lock is needed because pysqlite commits DDL as it goes: the
+# transaction around a migration does not make CREATE/ALTER atomic, and two
+# processes racing through the same migration fail with "table already
+# exists" / "duplicate column" rather than an IntegrityError on the record.
+#
+#     python migrations.py           # apply pending migrations
+#     python migrations.py --status  # list applied / pending
+# ---------------------------------------------------------------------------
+
+
+def _baseline(conn: Connection):
+    import models
+    models.Base.metadata.create_all(bind=conn)
+
+
+def _metrics_warehouse(conn: Connection):
+    import models
+    if "company" not in {column["name"] for column in inspect(conn).get_columns("documents")}:
+        conn.execute(text("ALTER TABLE documents ADD COLUMN company VARCHAR"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_documents_company ON documents (company)"))
+    models.MetricFact.__table__.create(bind=conn, checkfirst=True)
+
+
+def _metric_period_order(conn: Connection):
+    from periods import period_months, period_range
+    columns = {column["name"] for column in inspect(conn).get_columns("metric_facts")}
+    if "period_end" not in columns:
+        conn.execute(text("ALTER TABLE metric_facts ADD COLUMN period_end DATE"))
+    if "period_months" not in columns:
+        conn.execute(text("ALTER TABLE metric_facts ADD COLUMN period_months INTEGER"))
+    keys = conn.execute(text("SELECT DISTINCT period_key FROM metric_facts WHERE period_end IS NULL")).all()
+    for (key,) in keys:
+        bounds = period_range(key)
+        if bounds is not None:
+            conn.execute(text("UPDATE metric_facts SET period_end = :end, period_months = :months "
+                              "WHERE period_key = :key"),
+                         {"end": bounds[1].isoformat(), "months": period_months(key), "key": key})
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_metric_facts_series_end "
+                      "ON metric_facts (owner_id, metric, company, period_end)"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline: users, documents", _baseline),
+    (2, "metrics warehouse: metric_facts, documents.company", _metrics_warehouse),
+    (3, "metric_facts.period_end/period_months: chronological period order", _metric_period_order),
+]
+
+
+def _ensure_table(conn: Connection):
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                      "version INTEGER PRIMARY KEY, description TEXT, applied_at FLOAT)"))
+
+
+MIGRATION_LOCK_ID = 0x6D696772  # pg_advisory_lock key, arbitrary but fixed
+
+
+@contextmanager
+def _migration_lock():
+    """Hold the cross-process migration lock for the duration of the block."""
+    if engine.dialect.name == "sqlite":
+        database = engine.url.database
+        if not database or database == ":memory:":
+            yield  # private to this process
+            return
+        with open(f"{database}.migrate.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+    elif engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    else:
+        yield
+
+
+def applied_versions() -> set:
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations() -> List[int]:
+    """Apply pending migrations in order; returns the versions applied now."""
+    ran = []
+    with _migration_lock():
+        applied = applied_versions()  # read under the lock: another process may just have finished
+        for version, description, migrate in sorted(MIGRATIONS):
+            if version in applied:
+                continue
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(text("INSERT INTO schema_migrations (version, description, applied_at) "
+                                  "VALUES (:version, :description, :applied_at)"),
+                             {"version": version, "description": description, "applied_at": time.time()})
+            ran.append(version)
+    return ran
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--status" in sys.argv:
+        applied = applied_versions()
+        for version, description, _ in sorted(MIGRATIONS):
+            print(f"{version:>4}  {'applied' if version in applied else 'pending'}  {description}")
+    else:
+        print("applied:", run_migrations() or "nothing to do")
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from database import Base
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Index, UniqueConstraint
+
+
+class Users(Base):
+    __tablename__ = 'users'
+
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, unique=True)
+    hashed_password = Column(String)
+
+
+class Documents(Base):
+    """An uploaded filing and where its parsed DoclingDocument lives."""
+    __tablename__ = 'documents'
+    __table_args__ = (UniqueConstraint('owner_id', 'sha256'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), index=True)
+    filename = Column(String)
+    sha256 = Column(String, index=True)
+    company = Column(String, nullable=True, index=True)  # ticker/name; guessed from the filename if not given
+    pdf_path = Column(String)
+    json_path = Column(String, nullable=True)
+    parse_status = Column(String, default='pending')  # pending | parsing | parsed | failed
+    parse_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    parsed_at = Column(DateTime, nullable=True)
+
+
+class MetricFact(Base):
+    """One number from a parsed filing: a table row (metric) in one period column."""
+    __tablename__ = 'metric_facts'
+    __table_args__ = (
+        Index('ix_metric_facts_series', 'owner_id', 'metric', 'company', 'period_key'),
+        Index('ix_metric_facts_company_period', 'owner_id', 'company', 'period_key'),
+        Index('ix_metric_facts_series_end', 'owner_id', 'metric', 'company', 'period_end'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id', ondelete='CASCADE'), index=True)
+    owner_id = Column(Integer, ForeignKey('users.id'))
+    company = Column(String)
+    metric = Column(String)                  # normalized row label, the lookup key
+    label = Column(String)                   # row label as printed
+    period = Column(String)                  # column header as printed, e.g. 'Q2-2025'
+    period_key = Column(String)              # '2025-Q2', '2025-H1', '2025-FY', '2025-06-30'
+    period_end = Column(Date)                # last day of the period; order and range filters use
+    period_months = Column(Integer)          # (period_end, period_months): 0 for a date, 3, 6, 12
+    value = Column(Float)
+    unit = Column(String)                    # '', '$', '%', 'bps'
+    source_ref = Column(String)              # docling self_ref of the table
+    page = Column(Integer, nullable=True)
@@ -0,0 +1,234 @@
+import os
+from bisect import bisect_right
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from extraction import (MATCH_THRESHOLD, column_headers, header_row_count, item_page, label_column_count,
+                        load_document, normalize, similarity, table_grid)
+
+
+# ---------------------------------------------------------------------------
+# Structural navigation over a DoclingDocument.
+#
+# The document is a '$ref' graph: body.children → groups / texts / tables,
+# each with its own children. Walking it from the root for every "what comes
+# after X" is O(document) per lookup. DocumentNavigator walks it once and
+# keeps:
+#   order          refs in reading order (depth-first from #/body)
+#   items          ref → item dict (the loaded document's own dicts, no copies)
+#   parent / children / next_sibling / prev_sibling
+#   pages          page_no → refs on that page, in reading order
+#   next_text      position → position of the next text item (one backward pass)
+#   section_end    header position → end of its section (headers of equal or
+#                  higher level close it)
+#   text_index     normalized text → refs, for exact label hits
+#   columns        normalized column header → (table ref, column) pairs
+# Navigators are memoized on (path, mtime) like compact_tables(), so tools and
+# routes working on the same parse share one.
+# ---------------------------------------------------------------------------
+
+TEXT_SECTION = "#/texts/"
+FURNITURE_LABELS = {"page_header", "page_footer"}
+HEADER_LABELS = {"title", "section_header"}
+
+
+def _ref(node) -> Optional[str]:
+    return node.get("$ref") if isinstance(node, dict) else node
+
+
+class DocumentNavigator:
+    def __init__(self, doc: dict):
+        self.items: Dict[str, dict] = {}
+        for section in ("texts", "tables", "groups", "pictures", "key_value_items", "form_items"):
+            for item in doc.get(section) or []:
+                if item.get("self_ref"):
+                    self.items[item["self_ref"]] = item
+        self.body = doc.get("body") or {}
+
+        self.order: List[str] = []
+        self.position: Dict[str, int] = {}
+        self.parent: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.next_sibling: Dict[str, str] = {}
+        self.prev_sibling: Dict[str, str] = {}
+        self.pages: Dict[int, List[str]] = defaultdict(list)
+        self._walk()
+
+        self.next_text: List[int] = self._next_text_positions()
+        self.section_end: Dict[int, int] = self._section_ends()
+        self._headers: List[int] = sorted(self.section_end)
+        self.text_index: Dict[str, List[str]] = defaultdict(list)
+        for ref in self.order:
+            if self.is_text(ref):
+                self.text_index[normalize(self.items[ref].get("text") or "")].append(ref)
+        self.columns: Dict[str, List[Tuple[str, int]]] = self._column_headers()
+
+    # --------------------------------------------------------------------
+    # BUILD
+    # --------------------------------------------------------------------
+    def _walk(self):
+        """Depth-first from #/body; refs past a truncated tail are skipped."""
+        seen = set()
+        stack = [("#/body", _ref(child)) for child in reversed(self.body.get("children") or [])]
+        while stack:
+            parent, ref = stack.pop()
+            item = self.items.get(ref)
+            if item is None or ref in seen:
+                continue
+            seen.add(ref)
+            self.position[ref] = len(self.order)
+            self.order.append(ref)
+            self.parent[ref] = parent
+            page = item_page(item)
+            if page is not None:
+                self.pages[page].append(ref)
+            child_refs = [r for r in map(_ref, item.get("children") or []) if r in self.items]
+            if child_refs:
+                self.children[ref] = child_refs
+            stack.extend((ref, child) for child in reversed(child_refs))
+
+        top = [r for r in map(_ref, self.body.get("children") or []) if r in self.position]
+        for siblings in [top, *self.children.values()]:
+            for before, after in zip(siblings, siblings[1:]):
+                self.next_sibling[before] = after
+                self.prev_sibling[after] = before
+
+    def _next_text_positions(self) -> List[int]:
+        """next_text[i] = position of the first content text after position i (-1: none)."""
+        following, out = -1, [-1] * len(self.order)
+        for i in range(len(self.order) - 1, -1, -1):
+            out[i] = following
+            if self.is_text(self.order[i]):
+                following = i
+        return out
+
+    def _section_ends(self) -> Dict[int, int]:
+        ends, open_headers = {}, []  # stack of (level, position)
+        for i, ref in enumerate(self.order):
+            level = self.header_level(ref)
+            if level is None:
+                continue
+            while open_headers and open_headers[-1][0] >= level:
+                ends[open_headers.pop()[1]] = i
+            open_headers.append((level, i))
+        for _, i in open_headers:
+            ends[i] = len(self.order)
+        return ends
+
+    def _column_headers(self) -> Dict[str, List[Tuple[str, int]]]:
+        columns = defaultdict(list)
+        for ref in self.order:
+            if not ref.startswith("#/tables/"):
+                continue
+            grid = table_grid(self.items[ref])
+            if not grid:
+                continue
+            for c, header in enumerate(column_headers(grid, header_row_count(grid))):
+                if header:
+                    columns[normalize(header)].append((ref, c))
+        return columns
+
+    # --------------------------------------------------------------------
+    # ACCESS
+    # --------------------------------------------------------------------
+    def resolve(self, ref) -> Optional[dict]:
+        """'#/texts/3' or {'$ref': ...} → item, without touching the JSON again."""
+        ref = _ref(ref)
+        return self.body if ref == "#/body" else self.items.get(ref)
+
+    def is_text(self, ref: str) -> bool:
+        """A content text item (page headers/footers don't count as 'the next text')."""
+        return (ref.startswith(TEXT_SECTION)
+                and self.items[ref].get("label") not in FURNITURE_LABELS
+                and bool((self.items[ref].get("text") or "").strip()))
+
+    def header_level(self, ref: str) -> Optional[int]:
+        item = self.items[ref]
+        if item.get("label") not in HEADER_LABELS:
+            return None
+        return 0 if item["label"] == "title" else int(item.get("level") or 1)
+
+    def find(self, label: str, threshold: float = MATCH_THRESHOLD) -> List[str]:
+        """Text refs whose text is `label`: exact after normalize(), else the best fuzzy matches."""
+        target = normalize(label)
+        if not target:
+            return []
+        if target in self.text_index:
+            return list(self.text_index[target])
+        scored = [(similarity(target, text), refs[0]) for text, refs in self.text_index.items()]
+        best = max((score for score, _ in scored), default=0.0)
+        if best < threshold:
+            return []
+        return sorted((ref for score, ref in scored if score == best), key=self.position.get)
+
+    def following_texts(self, ref: str, count: int = 1) -> List[str]:
+        """The next `count` content text items after `ref` in reading order."""
+        out, i = [], self.position.get(ref)
+        while i is not None and i >= 0 and len(out) < count:
+            i = self.next_text[i]
+            if i >= 0:
+                out.append(self.order[i])
+        return out
+
+    def next_text_after(self, label: str, count: int = 1) -> List[Tuple[str, List[str]]]:
+        """[(matched ref, following text refs)] for every text matching `label`."""
+        return [(ref, self.following_texts(ref, count)) for ref in self.find(label)]
+
+    def section(self, ref: str) -> List[str]:
+        """Refs under a title/section header, up to the next header of equal or higher level."""
+        i = self.position.get(ref)
+        if i not in self.section_end:
+            return []
+        return self.order[i + 1:self.section_end[i]]
+
+    def section_of(self, ref: str) -> Optional[str]:
+        """The closest header whose section contains `ref`."""
+        i = self.position.get(ref)
+        if i is None:
+            return None
+        for h in reversed(self._headers[:bisect_right(self._headers, i - 1)]):
+            if self.section_end[h] > i:
+                return self.order[h]
+        return None
+
+    def page(self, page_no: int) -> List[str]:
+        return self.pages.get(page_no, [])
+
+    def column_cells(self, header: str) -> List[dict]:
+        """Body cells under a table column header (exact after normalize()), with row labels."""
+        cells = []
+        for ref, c in self.columns.get(normalize(header), []):
+            table = self.items[ref]
+            grid = table_grid(table)
+            header_rows = header_row_count(grid)
+            label_cols = label_column_count(grid, header_rows)
+            for row in grid[header_rows:]:
+                text = row[c]["text"].strip()
+                if not text:
+                    continue
+                cells.append({"ref": ref, "page": item_page(table), "column": header,
+                              "row_header": " ".join(dict.fromkeys(
+                                  cell["text"].strip() for cell in row[:label_cols] if cell["text"].strip())),
+                              "text": text})
+        return cells
+
+    def describe(self, ref: str) -> dict:
+        """Small JSON-friendly view of one item."""
+        item = self.items[ref]
+        return {"ref": ref, "label": item.get("label"), "page": item_page(item),
+                "parent": self.parent.get(ref), "text": item.get("text")}
+
+    def describe_all(self, refs: Iterable[str]) -> List[dict]:
+        return [self.describe(ref) for ref in refs]
+
+
+@lru_cache(maxsize=32)
+def _navigator(json_path: str, mtime: float) -> DocumentNavigator:
+    return DocumentNavigator(load_document(json_path))
+
+
+def get_navigator(json_path) -> DocumentNavigator:
+    """Navigator for a parsed document, memoized on (path, mtime)."""
+    json_path = str(json_path)
+    return _navigator(json_path, os.path.getmtime(json_path))
@@ -0,0 +1,125 @@
+import re
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Column headers → sortable period keys, for the metrics warehouse.
+#
+#   'Q2-2025', '2Q25', '2025 Q2', 'Three months ended June 30, 2025'  → '2025-Q2'
+#   'H1 2025', '1H25', 'Six months ended June 30, 2025'                → '2025-H1'
+#   'FY 2024', '2024', 'FY24', 'Year ended December 31, 2024'          → '2024-FY'
+#   'June 30, 2025', '2025-06-30' (balance-sheet snapshots)           → '2025-06-30'
+# Change columns (YoY, % change, TTM) and year-to-date columns map to None.
+#
+# Keys are labels, not an order: '2025-FY' < '2025-H1' as strings. Sort and
+# filter on period_range() instead — periods by end date, then the shorter
+# span first (balance-sheet date, quarter, half, year ending the same day).
+# Quarters, halves and fiscal years are taken as calendar ones.
+# ---------------------------------------------------------------------------
+
+_YY = r"(\d{4}|\d{2})"
+_SEP = r"\s*['’\-/]?\s*"
+_QUARTER = re.compile(rf"\bQ([1-4])(?:\s*FY)?{_SEP}{_YY}\b", re.I)            # Q2-2025, Q2 FY25, Q2'25
+_QUARTER_REV = re.compile(rf"\b([1-4])Q{_SEP}{_YY}\b", re.I)                  # 2Q25
+_YEAR_QUARTER = re.compile(r"\b((?:19|20)\d{2})\s*[\-/]?\s*Q([1-4])\b", re.I)  # 2025 Q2
+_HALF = re.compile(rf"\b(?:H([12])|([12])H){_SEP}{_YY}\b", re.I)               # H1 2025, 1H25
+# Whole header only: 'FY 2024' / '2024', never the year of a date like 'June 30, 2025'.
+_YEAR = re.compile(r"^\s*(?:FY\s*['’\-]?\s*)?((?:19|20)\d{2})\s*$", re.I)         # FY 2024, 2024
+_FY_SHORT = re.compile(r"^\s*FY\s*['’\-]?\s*(\d{2})\s*$", re.I)                    # FY24
+_MONTHS_ENDED = re.compile(r"\b(three|3|six|6|nine|9|twelve|12\s*months?|(?:fiscal\s+)?year)\s*(?:months?\s*)?"
+                           r"ended\s*([a-z]{3})[a-z]*\.?\s*\d{0,2},?\s*((?:19|20)\d{2})", re.I)
+                                                                                   # Three months ended June 30, 2025
+_DATE = re.compile(r"\b([a-z]{3})[a-z]*\.?\s+(\d{1,2}),?\s+((?:19|20)\d{2})\b", re.I)  # June 30, 2025 (as of)
+_ISO_DATE = re.compile(r"\b((?:19|20)\d{2})-(\d{2})-(\d{2})\b")                       # 2025-06-30
+_MONTHS = {m: i for i, m in enumerate(("jan", "feb", "mar", "apr", "may", "jun",
+                                        "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+# Change/ratio columns carry a period in their header but not a period value.
+_NOT_A_PERIOD = re.compile(r"\b(yoy|qoq|y/y|q/q|change|chg|growth|vs|variance|ttm|ltm|trailing)\b|%", re.I)
+_KEY = re.compile(r"^(\d{4})-(?:Q([1-4])|H([12])|(FY)|(\d{2})-(\d{2}))$")
+
+
+def _year(text: str) -> int:
+    year = int(text)
+    return year + 2000 if year < 100 else year
+
+
+def _date_key(year, month, day) -> Optional[str]:
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None  # 'Feb 30, 2025'
+
+
+def period_key(label: str) -> Optional[str]:
+    """Sortable key for a column header: 'Q2-2025' → '2025-Q2', 'FY 2024' → '2024-FY', '1H25' → '2025-H1',
+    'June 30, 2025' → '2025-06-30' (a point in time).
+
+    None for headers that are not a single period (YoY, % change, TTM, labels).
+    """
+    if not label or _NOT_A_PERIOD.search(label):
+        return None
+    if match := _MONTHS_ENDED.search(label):
+        span, month, year = match.group(1).lower(), _MONTHS.get(match.group(2).lower()), match.group(3)
+        if month is None or span in ("nine", "9"):
+            return None  # year-to-date columns are not a period of their own
+        if span in ("three", "3"):
+            return f"{year}-Q{(month - 1) // 3 + 1}"
+        return f"{year}-H{1 if month <= 6 else 2}" if span in ("six", "6") else f"{year}-FY"
+    # A bare date is a balance-sheet snapshot, not a period: keyed by the day so
+    # it never collides with a quarter or fiscal-year value.
+    if (match := _DATE.search(label)) and _MONTHS.get(match.group(1).lower()):
+        return _date_key(match.group(3), _MONTHS[match.group(1).lower()], match.group(2))
+    if match := _ISO_DATE.search(label):
+        return _date_key(*match.groups())
+    if match := _QUARTER.search(label):
+        return f"{_year(match.group(2))}-Q{match.group(1)}"
+    if match := _QUARTER_REV.search(label):
+        return f"{_year(match.group(2))}-Q{match.group(1)}"
+    if match := _YEAR_QUARTER.search(label):
+        return f"{match.group(1)}-Q{match.group(2)}"
+    if match := _HALF.search(label):
+        return f"{_year(match.group(3))}-H{match.group(1) or match.group(2)}"
+    if match := _YEAR.search(label):
+        return f"{match.group(1)}-FY"
+    if match := _FY_SHORT.search(label):
+        return f"{_year(match.group(1))}-FY"
+    return None
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+
+
+def period_months(key: str) -> Optional[int]:
+    """Length of a period key in months: 3, 6 or 12; 0 for a point in time; None if not a key."""
+    match = _KEY.match(key or "")
+    if match is None:
+        return None
+    return 3 if match.group(2) else 6 if match.group(3) else 12 if match.group(4) else 0
+
+
+def period_range(key: str) -> Optional[Tuple[date, date]]:
+    """(first day, last day) of a period key: '2025-Q2' → (2025-04-01, 2025-06-30),
+    '2025-06-30' → (2025-06-30, 2025-06-30). None if `key` is not a period key."""
+    match = _KEY.match(key or "")
+    if match is None:
+        return None
+    year, quarter, half, _, month, day = match.groups()
+    year = int(year)
+    if month is not None:
+        try:
+            point = date(year, int(month), int(day))
+        except ValueError:
+            return None
+        return point, point
+    last_month = int(quarter) * 3 if quarter else int(half) * 6 if half else 12
+    end = _month_end(year, last_month)
+    return date(year, last_month - period_months(key) + 1, 1), end
+
+
+def as_period_key(text: str) -> Optional[str]:
+    """A period given by a user: a column header ('Q2-2025', 'FY24') or a key ('2025-FY')."""
+    if not text:
+        return None
+    return period_key(text) or (text if period_range(text) else None)
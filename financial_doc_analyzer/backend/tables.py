@@ -0,0 +1,205 @@
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from extraction import (table_grid, header_row_count, label_column_count, column_headers,
+                        item_page, parse_value, normalize, load_document)
+
+
+# ---------------------------------------------------------------------------
+# Compact columnar model for docling tables.
+#
+# A docling table cell carries bbox, spans, offsets and header flags; a
+# financial table only needs row labels, period headers and numbers. Values
+# live in one float64 matrix (NaN = empty/non-numeric), units in an int8 code
+# matrix, and the rare non-numeric body text in a sparse dict.
+# ---------------------------------------------------------------------------
+
+UNITS = ("", "$", "%", "bps")
+_UNIT_CODES = {unit: code for code, unit in enumerate(UNITS)}
+
+
+class RowView:
+    """Lightweight view of one table row; holds no data of its own."""
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "CompactTable", index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def label(self) -> str:
+        return self._table.row_labels[self._index]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._table.values[self._index]
+
+    @property
+    def units(self) -> List[str]:
+        return [UNITS[code] for code in self._table.unit_codes[self._index]]
+
+    def __getitem__(self, column: Union[int, str]) -> float:
+        if isinstance(column, str):
+            column = self._table.column_index(column)
+        return float(self._table.values[self._index, column])
+
+    def __len__(self) -> int:
+        return self._table.values.shape[1]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.values.tolist())
+
+    def __repr__(self) -> str:
+        return f"RowView({self.label!r}, {self.values.tolist()})"
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "values": dict(zip(self._table.column_labels, (None if np.isnan(v) else v for v in self.values.tolist()))),
+            "units": self.units,
+        }
+
+
+def _check_periods(periods: int):
+    if isinstance(periods, bool) or not isinstance(periods, (int, np.integer)) or periods < 1:
+        raise ValueError(f"periods must be a positive integer, got {periods!r}")
+
+
+class CompactTable:
+    __slots__ = ("ref", "page", "row_labels", "column_labels", "values", "unit_codes", "text", "_row_index")
+
+    def __init__(self, row_labels: Sequence[str], column_labels: Sequence[str], values: np.ndarray,
+                 unit_codes: Optional[np.ndarray] = None, text: Optional[Dict[Tuple[int, int], str]] = None,
+                 ref: str = "", page: Optional[int] = None):
+        self.ref = ref
+        self.page = page
+        self.row_labels = tuple(sys.intern(label) for label in row_labels)
+        self.column_labels = tuple(sys.intern(label) for label in column_labels)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.unit_codes = (np.zeros(self.values.shape, dtype=np.int8)
+                           if unit_codes is None else np.asarray(unit_codes, dtype=np.int8))
+        self.text = text or {}
+        self._row_index: Optional[Dict[str, int]] = None
+
+    # --------------------------------------------------------------------
+    # CONSTRUCTION
+    # --------------------------------------------------------------------
+    @classmethod
+    def from_docling(cls, table: dict) -> "CompactTable":
+        grid = table_grid(table)
+        header_rows = header_row_count(grid)
+        label_cols = label_column_count(grid, header_rows) if grid else 0
+        headers = column_headers(grid, header_rows)[label_cols:]
+        body = grid[header_rows:]
+
+        values = np.full((len(body), len(headers)), np.nan)
+        units = np.zeros(values.shape, dtype=np.int8)
+        text = {}
+        row_labels = []
+        for r, row in enumerate(body):
+            row_labels.append(" ".join(dict.fromkeys(
+                c["text"].strip() for c in row[:label_cols] if c["text"].strip())))
+            for c, cell in enumerate(row[label_cols:]):
+                value, unit = parse_value(cell["text"])
+                if value is None:
+                    if cell["text"].strip():
+                        text[(r, c)] = cell["text"].strip()
+                    continue
+                values[r, c] = value
+                units[r, c] = _UNIT_CODES.get(unit, 0)
+        return cls(row_labels, headers, values, units, text,
+                   ref=table.get("self_ref", ""), page=item_page(table))
+
+    @classmethod
+    def from_numpy(cls, values: np.ndarray, row_labels: Sequence[str], column_labels: Sequence[str],
+                   **kwargs) -> "CompactTable":
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(row_labels), len(column_labels)):
+            raise ValueError(f"values shape {values.shape} does not match "
+                             f"{len(row_labels)} rows x {len(column_labels)} columns")
+        return cls(row_labels, column_labels, values, **kwargs)
+
+    def to_numpy(self) -> np.ndarray:
+        return self.values
+
+    # --------------------------------------------------------------------
+    # ACCESS
+    # --------------------------------------------------------------------
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.unit_codes.nbytes
+
+    def rows(self) -> Iterator[RowView]:
+        return (RowView(self, i) for i in range(len(self.row_labels)))
+
+    def row(self, label: str) -> Optional[RowView]:
+        """Row by label, compared after normalize()."""
+        if self._row_index is None:
+            self._row_index = {}
+            for i, row_label in enumerate(self.row_labels):
+                self._row_index.setdefault(normalize(row_label), i)
+        index = self._row_index.get(normalize(label))
+        return None if index is None else RowView(self, index)
+
+    def column_index(self, label: str) -> int:
+        target = normalize(label)
+        for i, column_label in enumerate(self.column_labels):
+            if normalize(column_label) == target:
+                return i
+        raise KeyError(label)
+
+    def column(self, label: str) -> np.ndarray:
+        return self.values[:, self.column_index(label)]
+
+    # --------------------------------------------------------------------
+    # CROSS-PERIOD MATH (vectorized over all rows)
+    # --------------------------------------------------------------------
+    def diff(self, periods: int = 1) -> np.ndarray:
+        """values[:, j] - values[:, j - periods]; the first `periods` columns are NaN."""
+        _check_periods(periods)
+        out = np.full(self.values.shape, np.nan)
+        out[:, periods:] = self.values[:, periods:] - self.values[:, :-periods]
+        return out
+
+    def pct_change(self, periods: int = 1) -> np.ndarray:
+        """Percent change vs `periods` columns earlier (1 = QoQ, 4 = YoY for quarterly tables)."""
+        _check_periods(periods)
+        out = np.full(self.values.shape, np.nan)
+        previous = self.values[:, :-periods]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:, periods:] = (self.values[:, periods:] - previous) / np.abs(previous) * 100.0
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "ref": self.ref,
+            "page": self.page,
+            "columns": list(self.column_labels),
+            "rows": [row.to_dict() for row in self.rows()],
+        }
+
+    def __repr__(self) -> str:
+        return f"CompactTable({self.ref!r}, {self.shape[0]}x{self.shape[1]})"
+
+
+def tables_from_document(doc: dict) -> List[CompactTable]:
+    return [CompactTable.from_docling(table) for table in doc.get("tables") or []]
+
+
+@lru_cache(maxsize=64)
+def _compact_tables(json_path: str, mtime: float) -> Tuple[CompactTable, ...]:
+    return tuple(tables_from_document(load_document(json_path)))
+
+
+def compact_tables(json_path) -> Tuple[CompactTable, ...]:
+    """Compact tables of a parsed document, memoized on (path, mtime)."""
+    json_path = str(json_path)
+    return _compact_tables(json_path, os.path.getmtime(json_path))
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other top-level (`from extraction import ...`),
+# as they do when run from this directory.
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Modules read these at import (and spawned job workers inherit them), so the
+# tests never touch the app's database or caches.
+_TMP_DIR = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP_DIR / 'test.db'}")
+os.environ.setdefault("PARSE_CACHE_DIR", str(_TMP_DIR / "parse_cache"))
+os.environ.setdefault("ANSWER_CACHE_PATH", str(_TMP_DIR / "answer_cache.db"))
+
+
+@pytest.fixture
+def db():
+    """A session on the migrated test database; every table is emptied afterwards."""
+    pytest.importorskip("sqlalchemy")
+    import models
+    from database import SessionLocal
+    from migrations import run_migrations
+
+    run_migrations()
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    for table in reversed(models.Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    session.close()
+
+
+@pytest.fixture
+def user(db):
+    from models import Users
+
+    row = Users(username="alice", hashed_password="x")
+    db.add(row)
+    db.commit()
+    return {"username": row.username, "id": row.id}
+
+
+@pytest.fixture
+def client(user):
+    """TestClient on the analysis routes, signed in as `user`."""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("jose")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import analysis
+    from auth import get_current_user
+
+    app = FastAPI()
+    app.include_router(analysis.router)
+    app.dependency_overrides[get_current_user] = lambda: user
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _cell(text, row, col):
+    return {"text": text, "start_row_offset_idx": row, "end_row_offset_idx": row + 1,
+            "start_col_offset_idx": col, "end_col_offset_idx": col + 1,
+            "column_header": row == 0, "row_header": False}
+
+
+def _text(index, text, page, label="text", parent="#/body", **extra):
+    return {"self_ref": f"#/texts/{index}", "parent": {"$ref": parent}, "children": [],
+            "label": label, "text": text, "orig": text, "prov": [{"page_no": page}], **extra}
+
+
+@pytest.fixture
+def docling_doc():
+    """A small DoclingDocument: header, text, list group, table, page furniture."""
+    rows = [["", "Q1-2025", "Q2-2025", "YoY"],
+            ["Total revenues", "19,335", "22,496", "(12)%"],
+            ["Operating margin", "2.1%", "(3.2)%", ""]]
+    return {
+        "schema_name": "DoclingDocument",
+        "name": "ACME-Q2-2025",
+        "body": {"self_ref": "#/body", "children": [
+            {"$ref": "#/texts/0"}, {"$ref": "#/texts/1"}, {"$ref": "#/texts/2"},
+            {"$ref": "#/groups/0"}, {"$ref": "#/tables/0"}, {"$ref": "#/texts/5"}]},
+        "furniture": {"self_ref": "#/furniture", "children": []},
+        "texts": [
+            _text(0, "ACME Corp", 1, label="page_header"),
+            _text(1, "FINANCIAL SUMMARY", 1, label="section_header", level=1),
+            _text(2, "Free cash flow", 1),
+            _text(3, "Deliveries grew in every region", 1, label="list_item", parent="#/groups/0"),
+            _text(4, "Energy storage hit a record", 2, label="list_item", parent="#/groups/0"),
+            _text(5, "OUTLOOK", 2, label="section_header", level=1),
+        ],
+        "groups": [{"self_ref": "#/groups/0", "parent": {"$ref": "#/body"}, "label": "list", "name": "list",
+                    "children": [{"$ref": "#/texts/3"}, {"$ref": "#/texts/4"}]}],
+        "tables": [{"self_ref": "#/tables/0", "parent": {"$ref": "#/body"}, "children": [], "label": "table",
+                    "prov": [{"page_no": 2}],
+                    "data": {"num_rows": len(rows), "num_cols": len(rows[0]),
+                             "table_cells": [_cell(text, r, c) for r, row in enumerate(rows)
+                                             for c, text in enumerate(row)]}}],
+        "pictures": [],
+        "key_value_items": [],
+        "form_items": [],
+    }
+
+
+@pytest.fixture
+def docling_json(tmp_path, docling_doc):
+    path = tmp_path / "ACME-Q2-2025.json"
+    path.write_text(json.dumps(docling_doc, indent=1))
+    return path
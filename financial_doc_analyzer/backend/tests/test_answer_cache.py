@@ -0,0 +1,82 @@
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, normalize_query
+
+
+ANSWER = {"answer": "Total revenues were $1,234 million.", "value": 1234}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch, clock):
+    monkeypatch.setenv("MODEL", "test-model")
+    return AnswerCache(tmp_path / "answers.db", ttl_seconds=3600, max_entries=2)
+
+
+def test_normalize_query_drops_question_scaffolding():
+    assert normalize_query("Total Revenues", "What does the report say about total revenues?") == \
+        normalize_query("total revenues", "total revenues")
+
+
+def test_exact_hit_is_flagged_cached(cache):
+    assert cache.get("sha-a", "Total revenues", "What were total revenues?") is None
+    cache.put("sha-a", "Total revenues", "What were total revenues?", ANSWER)
+
+    hit = cache.get("sha-a", "Total revenues", "What were total revenues?")
+    assert hit["answer"] == ANSWER["answer"]
+    assert hit["cached"] is True
+    assert hit["cache"]["similarity"] == 1.0
+
+
+def test_filler_words_still_hit(cache):
+    cache.put("sha-a", "Total revenues", "What were total revenues?", ANSWER)
+    assert cache.get("sha-a", "total revenues", "Please tell me the total revenues") is not None
+
+
+def test_other_document_or_model_misses(cache, monkeypatch):
+    cache.put("sha-a", "Total revenues", "total revenues", ANSWER)
+    assert cache.get("sha-b", "Total revenues", "total revenues") is None
+
+    monkeypatch.setenv("MODEL", "other-model")
+    assert cache.get("sha-a", "Total revenues", "total revenues") is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("sha-a", "Total revenues", "total revenues", ANSWER)
+    clock[0] += 3599
+    assert cache.get("sha-a", "Total revenues", "total revenues") is not None
+    clock[0] += 2
+    assert cache.get("sha-a", "Total revenues", "total revenues") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    cache.put("sha-a", "Total revenues", "q1", ANSWER)
+    clock[0] += 1
+    cache.put("sha-a", "Total revenues", "q2", ANSWER)
+    clock[0] += 1
+    assert cache.get("sha-a", "Total revenues", "q1") is not None  # q2 is now least recently used
+    clock[0] += 1
+    cache.put("sha-a", "Total revenues", "q3", ANSWER)
+
+    assert cache.get("sha-a", "Total revenues", "q2") is None
+    assert cache.get("sha-a", "Total revenues", "q1") is not None
+    assert cache.get("sha-a", "Total revenues", "q3") is not None
+
+
+def test_stats_count_entries_and_hits(cache):
+    cache.put("sha-a", "Total revenues", "total revenues", ANSWER)
+    cache.get("sha-a", "Total revenues", "total revenues")
+    cache.get("sha-a", "Total revenues", "total revenues")
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 2
+    assert stats["model"] == "test-model"
+    assert stats["max_entries"] == 2
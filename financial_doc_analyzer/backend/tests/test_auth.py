@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+for module in ("fastapi", "jose", "passlib", "sqlalchemy"):
+    pytest.importorskip(module)
+
+from auth import TokenCache  # noqa: E402
+
+USER = {"username": "alice", "id": 1, "user_role": "user"}
+
+
+def test_hit_and_miss():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    assert cache.get("token-a") is None
+    cache.put("token-a", USER, exp=None)
+    assert cache.get("token-a") == USER
+    assert cache.get("token-b") is None
+
+
+def test_returns_copies():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("token-a", USER, exp=None)
+    cache.get("token-a")["user_role"] = "admin"
+    assert cache.get("token-a")["user_role"] == "user"
+
+
+def test_entry_expires_with_the_token():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("expired", USER, exp=time.time() - 1)
+    cache.put("valid", USER, exp=time.time() + 30)
+    assert cache.get("expired") is None
+    assert cache.get("valid") == USER
+
+
+def test_entry_expires_after_ttl():
+    cache = TokenCache(max_entries=10, ttl_seconds=0)
+    cache.put("token-a", USER, exp=time.time() + 3600)
+    assert cache.get("token-a") is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.put("token-a", USER, exp=None)
+    cache.put("token-b", USER, exp=None)
+    cache.get("token-a")
+    cache.put("token-c", USER, exp=None)
+    assert cache.get("token-b") is None
+    assert cache.get("token-a") == USER and cache.get("token-c") == USER
+
+
+@pytest.fixture
+def auth_client(db):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import auth
+
+    app = FastAPI()
+    app.include_router(auth.router)
+    return TestClient(app)
+
+
+def test_signup_then_login(auth_client):
+    assert auth_client.post("/auth/", json={"username": "carol", "password": "s3cret"}).status_code == 201
+
+    response = auth_client.post("/auth/token", data={"username": "carol", "password": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+    wrong = auth_client.post("/auth/token", data={"username": "carol", "password": "nope"})
+    assert wrong.status_code == 401
@@ -0,0 +1,22 @@
+import pytest
+
+from benchmarks.pipeline import WORK_DIR_MARKER, prepare_work_dir
+
+
+def test_default_is_a_new_temporary_directory():
+    work_dir = prepare_work_dir(None)
+    assert (work_dir / "docs").is_dir() and (work_dir / WORK_DIR_MARKER).exists()
+
+
+def test_reuses_its_own_directory(tmp_path):
+    work_dir = prepare_work_dir(tmp_path / "bench")
+    (work_dir / "docs" / "old.json").write_text("{}")
+    assert prepare_work_dir(work_dir) == work_dir
+    assert list((work_dir / "docs").iterdir()) == []
+
+
+def test_refuses_a_directory_it_did_not_create(tmp_path):
+    (tmp_path / "notes.txt").write_text("keep me")
+    with pytest.raises(SystemExit):
+        prepare_work_dir(tmp_path)
+    assert (tmp_path / "notes.txt").read_text() == "keep me"
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+fitz = pytest.importorskip("pymupdf")
+from tools import converter_service as service  # noqa: E402
+from tools.page_classifier import Segment  # noqa: E402
+
+
+def _pdf(pages: int) -> bytes:
+    with fitz.open() as doc:
+        for n in range(pages):
+            doc.new_page().insert_text((72, 72), f"page {n + 1}")
+        return doc.tobytes()
+
+
+def test_ingest_workers_are_split_between_analysis_workers():
+    env = {**os.environ, "ANALYSIS_WORKERS": "4"}
+    env.pop("DOCLING_INGEST_WORKERS", None)
+    out = subprocess.run([sys.executable, "-c", "from tools.page_parallel import DOCLING_INGEST_WORKERS as w; print(w)"],
+                         cwd=Path(__file__).resolve().parent.parent, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert int(out) == max(1, (os.cpu_count() or 1) // 4)
+
+
+def test_single_worker_converts_segments_in_process(monkeypatch):
+    converted = []
+
+    def convert_bytes(data, name, force_ocr):
+        converted.append((name, force_ocr))
+        with fitz.open(stream=data, filetype="pdf") as part:
+            pages = part.page_count
+        return {"name": name, "body": {"children": []}, "texts": [],
+                "pages": {str(n): {"page_no": n} for n in range(1, pages + 1)}}
+
+    monkeypatch.setattr(service.converter_pool, "convert_bytes", convert_bytes)
+    converter = service.ConverterService(workers=1)
+    doc, seconds = converter.convert(_pdf(3), "ACME.pdf", [Segment(0, 2, False), Segment(2, 3, True)])
+    assert converter._pool is None
+    assert converted == [("ACME.p1-2.pdf", False), ("ACME.p3-3.pdf", True)]
+    assert sorted(doc["pages"], key=int) == ["1", "2", "3"] and len(seconds) == 2
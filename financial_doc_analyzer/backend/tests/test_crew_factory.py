@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from crewai import Agent, Crew, LLM, Task
+
+from crew_factory import CrewFactory
+
+
+def _build_crew():
+    agent = Agent(role="analyst", goal="answer", backstory="reads filings",
+                  llm=LLM(model="gpt-4o-mini", api_key="test"))
+    return Crew(agents=[agent], tasks=[Task(description="d", expected_output="e", agent=agent)])
+
+
+@pytest.fixture
+def factory():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return _build_crew()
+
+    factory = CrewFactory({"analysis": build})
+    factory.calls = calls
+    return factory
+
+
+def test_template_is_built_once(factory):
+    threads = [threading.Thread(target=factory.template, args=("analysis",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    factory.new_crew("analysis")
+    factory.new_crew("analysis")
+    assert len(factory.calls) == 1
+
+
+def test_each_request_gets_its_own_tasks_and_agents(factory):
+    template = factory.template("analysis")
+    first, second = factory.new_crew("analysis"), factory.new_crew("analysis")
+
+    assert first is not template and first is not second
+    assert first.tasks[0] is not second.tasks[0] and first.tasks[0] is not template.tasks[0]
+    assert first.agents[0] is not second.agents[0]
+
+
+def test_callbacks_stay_on_the_copy(factory):
+    crew = factory.new_crew("analysis")
+    crew.task_callback = lambda output: None
+    crew.step_callback = lambda step: None
+
+    assert factory.template("analysis").task_callback is None
+    assert factory.template("analysis").step_callback is None
+    assert factory.new_crew("analysis").task_callback is None
+
+
+def test_trace_is_skipped_without_api_key(factory, monkeypatch):
+    monkeypatch.delenv("AGENTOPS_API_KEY", raising=False)
+    with factory.trace() as trace:
+        assert trace is None
+    assert not factory._tracing_ready
@@ -0,0 +1,23 @@
+from doc_index import build_index_for, get_index, index_path_for, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Revenue of $4,578M, up 12%") == ["revenue", "of", "4578", "m", "up", "12"]
+
+
+def test_build_and_search(docling_json):
+    index_dir = build_index_for(docling_json)
+    assert index_dir == index_path_for(docling_json) and (index_dir / "entries.json").exists()
+
+    hits = get_index(docling_json).search("operating margin 2025")
+    cells = [hit for hit in hits if hit["kind"] == "cell"]
+    assert {hit["text"] for hit in cells} >= {"2.1%", "(3.2)%"}
+    assert all(hit["row_header"] == "Operating margin" and hit["page"] == 2 for hit in cells)
+
+
+def test_search_any_and_refs(docling_json):
+    index = get_index(docling_json)  # built on first use
+    assert index.search("energy deliveries") == []
+    assert index.refs("energy deliveries") == {"#/texts/3", "#/texts/4"}
+    assert index.search("22496")[0]["col_header"] == "Q2-2025"
+    assert len(index.lookup("nonexistenttoken")) == 0
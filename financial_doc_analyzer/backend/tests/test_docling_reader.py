@@ -0,0 +1,38 @@
+import json
+
+from docling_reader import DoclingReader, load_tolerant
+
+
+def test_load_matches_json(docling_json):
+    assert load_tolerant(docling_json) == json.loads(docling_json.read_text())
+    reader = DoclingReader(docling_json)
+    assert reader.load() == json.loads(docling_json.read_text())
+    assert not reader.truncated
+
+
+def test_iter_items_and_resolve(docling_json, docling_doc):
+    reader = DoclingReader(docling_json)
+    assert [t["text"] for t in reader.iter_items("texts")] == [t["text"] for t in docling_doc["texts"]]
+    assert reader.resolve("#/texts/4")["text"] == "Energy storage hit a record"
+    assert reader.resolve({"$ref": "#/tables/0"})["prov"][0]["page_no"] == 2
+    assert reader.resolve("#/texts/99") is None
+    assert reader.get("name") == "ACME-Q2-2025"
+
+
+def test_reading_order_follows_groups(docling_json):
+    refs = [item["self_ref"] for item in DoclingReader(docling_json).iter_reading_order()]
+    assert refs == ["#/texts/0", "#/texts/1", "#/texts/2", "#/groups/0", "#/texts/3", "#/texts/4",
+                    "#/tables/0", "#/texts/5"]
+
+
+def test_truncated_file_keeps_complete_items(tmp_path, docling_json):
+    text = docling_json.read_text()
+    cut = tmp_path / "cut.json"
+    cut.write_text(text[:text.index('"Energy storage hit a record"')])
+
+    doc = load_tolerant(cut)
+    assert [t["self_ref"] for t in doc["texts"]] == ["#/texts/0", "#/texts/1", "#/texts/2", "#/texts/3"]
+    assert doc["tables"] == []
+    reader = DoclingReader(cut)
+    reader.load()
+    assert reader.truncated
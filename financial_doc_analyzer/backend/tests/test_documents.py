@@ -0,0 +1,94 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("jose")
+import analysis  # noqa: E402
+import documents  # noqa: E402
+from models import Users  # noqa: E402
+
+
+class _Job:
+    def __init__(self, job_id="job-1"):
+        self.id, self.status = job_id, "queued"
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Parse jobs the routes submit (recorded instead of run)."""
+    calls = []
+
+    def submit(kind, fn, inputs, user):
+        calls.append((kind, inputs))
+        return _Job(f"job-{len(calls)}")
+
+    monkeypatch.setattr(analysis, "_submit", submit)
+    return calls
+
+
+def _register(db, user, tmp_path, sha256="a" * 64, **fields):
+    pdf = tmp_path / f"{sha256}.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    document, created = documents.register_document(db, user["id"], "ACME-Q2-2025.pdf", sha256, str(pdf))
+    for name, value in fields.items():
+        setattr(document, name, value)
+    db.commit()
+    return document
+
+
+def test_register_reuses_records_and_parses(db, user, tmp_path):
+    json_path = tmp_path / "parsed.json"
+    json_path.write_text("{}")
+    first = _register(db, user, tmp_path, parse_status=documents.PARSED, json_path=str(json_path))
+    again, created = documents.register_document(db, user["id"], "renamed.pdf", first.sha256, first.pdf_path)
+    assert again.id == first.id and not created
+
+    bob = Users(username="bob", hashed_password="x")
+    db.add(bob)
+    db.commit()
+    other, created = documents.register_document(db, bob.id, "ACME.pdf", first.sha256, first.pdf_path)
+    assert created and other.id != first.id
+    assert documents.is_parsed(other) and other.json_path == str(json_path)
+
+
+def test_failed_parse_is_recorded(db, user, tmp_path, monkeypatch):
+    pytest.importorskip("crewai")
+    import jobs
+
+    document = _register(db, user, tmp_path)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("index build failed")
+
+    monkeypatch.setattr("tools.docling_tool.DoclingTool._run", lambda self, pdf: str(tmp_path / "parsed.json"))
+    (tmp_path / "parsed.json").write_text("{}")
+    monkeypatch.setattr("doc_index.build_index_for", fail)
+    with pytest.raises(RuntimeError):
+        jobs._parse_document(document.id, document.pdf_path)
+    db.expire_all()
+    assert (document.parse_status, document.parse_error) == (documents.FAILED, "index build failed")
+
+
+def test_evicted_parse_is_parsed_again(client, db, user, tmp_path, submitted):
+    document = _register(db, user, tmp_path, parse_status=documents.PARSED,
+                         json_path=str(tmp_path / "evicted.json"))
+    response = client.get(f"/analysis/documents/{document.id}/search", params={"q": "revenue"})
+    assert response.status_code == 409
+    assert "evicted" in response.json()["detail"] and "job-1" in response.json()["detail"]
+    assert submitted == [("parse", {"document_id": document.id, "pdf_path": document.pdf_path})]
+
+
+def test_stale_parsing_is_resubmitted(client, db, user, tmp_path, submitted):
+    document = _register(db, user, tmp_path, parse_status=documents.PARSING)
+    response = client.post(f"/analysis/documents/{document.id}/query",
+                           json={"input_field": "Total revenues", "user_query": "trend?"})
+    assert response.status_code == 409
+    assert [kind for kind, _ in submitted] == ["parse"]
+
+
+def test_live_parse_is_not_resubmitted(client, db, user, tmp_path, submitted, monkeypatch):
+    document = _register(db, user, tmp_path, parse_status=documents.PARSING)
+    monkeypatch.setattr(analysis.job_queue, "live_job_for",
+                        lambda document_id, kinds: _Job("running") if document_id == document.id else None)
+    response = client.get(f"/analysis/documents/{document.id}/tables")
+    assert response.status_code == 409 and "running" in response.json()["detail"]
+    assert submitted == []
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from extraction import extract_field_from_file, normalize, parse_value
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("(1,234)", (-1234.0, "")),
+    ("(3.2)%", (-3.2, "%")),
+    ("(3.2%)", (-3.2, "%")),
+    ("$4.6B", (4.6e9, "$")),
+    ("$(1,234)", (-1234.0, "$")),
+    ("12.5%", (12.5, "%")),
+    ("(25) bps", (-25.0, "bps")),
+    ("-7", (-7.0, "")),
+    ("1,234", (1234.0, "")),
+    ("—", (None, "")),
+    ("n/a", (None, "")),
+    ("Total revenues", (None, "")),
+])
+def test_parse_value(text, expected):
+    assert parse_value(text) == expected
+
+
+def test_normalize():
+    assert normalize("  Research & Development: ") == "research and development"
+
+
+def _cell(text, row, col, header=False):
+    return {"text": text, "start_row_offset_idx": row, "end_row_offset_idx": row + 1,
+            "start_col_offset_idx": col, "end_col_offset_idx": col + 1,
+            "column_header": header, "row_header": False}
+
+
+def _table(rows, ref="#/tables/0", page=3):
+    cells = [_cell(text, r, c, header=r == 0) for r, row in enumerate(rows) for c, text in enumerate(row)]
+    return {"self_ref": ref, "prov": [{"page_no": page}],
+            "data": {"num_rows": len(rows), "num_cols": len(rows[0]), "table_cells": cells}}
+
+
+@pytest.fixture
+def financial_json(tmp_path):
+    doc = {
+        "texts": [{"self_ref": "#/texts/0", "label": "text", "text": "Free cash flow was $146M in Q2.",
+                   "prov": [{"page_no": 2}]}],
+        "tables": [_table([["", "Q1-2025", "Q2-2025"],
+                           ["Total revenues", "19,335", "22,496"],
+                           ["Operating margin", "2.1%", "(3.2)%"]])],
+    }
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(doc))
+    return path
+
+
+def test_extract_table_row(financial_json):
+    match = extract_field_from_file(financial_json, "operating margin")[0]
+    assert match.source == "table_row"
+    assert match.self_ref == "#/tables/0" and match.page == 3
+    assert match.periods == ["Q1-2025", "Q2-2025"]
+    assert match.values == [2.1, -3.2]
+    assert match.units == ["%", "%"]
+
+
+def test_extract_no_match(financial_json):
+    assert extract_field_from_file(financial_json, "deferred tax liabilities") == []
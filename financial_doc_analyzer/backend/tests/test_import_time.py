@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("crewai", "litellm", "agentops", "docling")
+
+
+def test_api_process_does_not_import_the_crew_stack(tmp_path):
+    # A fresh interpreter: this test process may already have imported them.
+    script = ("import json, sys; import app; "
+              f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}", "WARM_ON_START": "0"}
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+import jobs
+from jobs import DONE, FAILED, JobQueue, QueueFullError
+
+
+# Job functions run in spawned workers, so they must be importable module-level functions.
+def _echo(inputs: dict) -> dict:
+    return {"echo": inputs["value"], "pid": os.getpid()}
+
+
+def _crash(inputs: dict) -> dict:
+    os._exit(1)  # what an OOM kill or a segfault in a native library looks like to the pool
+
+
+def _chatty(inputs: dict) -> dict:
+    import jobs
+
+    for n in range(inputs["events"]):
+        jobs.emit("step", n=n)
+    return {}
+
+
+def _sleep(inputs: dict) -> dict:
+    time.sleep(inputs["seconds"])
+    return {}
+
+
+def _wait(job, timeout: float = 30):
+    deadline = time.time() + timeout
+    while not job.closed and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.closed, f"job still {job.status}"
+    return job
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    # workers read these at import; no docling models or crews in unit tests
+    monkeypatch.setenv("DOCLING_WARM_ON_START", "0")
+    monkeypatch.setenv("CREW_WARM_ON_START", "0")
+    queue = JobQueue(max_workers=1, max_pending=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_job_runs(queue):
+    job = _wait(queue.submit("test", _echo, {"value": 42}, owner="alice"))
+    assert job.status == DONE and job.result["echo"] == 42
+    assert [event["type"] for event in job.events][-1] == "job_finished"
+
+
+def test_event_log_is_append_only(queue):
+    job = queue.submit("test", _chatty, {"events": 500}, owner="alice")
+    while not job.closed:
+        seen = list(job.events)  # what an SSE client has been sent so far
+        time.sleep(0.001)
+        assert job.events[:len(seen)] == seen
+    closed = list(job.events)
+    time.sleep(0.5)
+    assert job.events == closed
+    assert [e["type"] for e in closed] == ["job_started"] + ["step"] * 500 + ["job_finished"]
+    assert [e["n"] for e in closed[1:-1]] == list(range(500))
+
+
+def test_dead_worker_fails_its_job_and_pool_is_rebuilt(queue):
+    crashed = _wait(queue.submit("test", _crash, {}, owner="alice"))
+    assert crashed.status == FAILED
+    assert crashed.events[-1]["type"] == "job_failed"
+
+    job = _wait(queue.submit("test", _echo, {"value": 1}, owner="alice"))
+    assert job.status == DONE and job.result["echo"] == 1
+
+
+def test_queue_full(queue):
+    queue.submit("test", _sleep, {"seconds": 1}, owner="alice")
+    queue.submit("test", _sleep, {"seconds": 0}, owner="alice")
+    with pytest.raises(QueueFullError):
+        queue.submit("test", _echo, {"value": 1}, owner="alice")
+
+
+def test_warm_up(queue):
+    assert queue.warm_up() == {"workers_warmed": 1}
+
+
+def test_warm_up_error_is_reported(monkeypatch):
+    import crew_factory
+
+    def fail():
+        raise ImportError("No module named 'crewai'")
+
+    monkeypatch.setattr(jobs, "DOCLING_WARM_ON_START", False)
+    monkeypatch.setattr(jobs, "_warm_up_error", None)
+    monkeypatch.setattr(crew_factory, "CREW_WARM_ON_START", True)
+    monkeypatch.setattr(crew_factory.crew_factory, "warm_up", fail)
+    jobs._init_worker()
+    assert jobs._warm_ping()["error"] == "ImportError: No module named 'crewai'"
+
+
+def test_metrics_job_without_llm(docling_json):
+    result = jobs.run_metrics_job({"json_path": str(docling_json), "document_ids": [1],
+                                   "input_fields": ["Total revenues", "Deferred revenue"], "use_llm": False})
+    assert result["document_ids"] == [1]
+    assert result["metrics"]["Total revenues"]["extraction"] == "deterministic"
+    assert result["metrics"]["Deferred revenue"] == {"extraction": "none", "value": None}
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")  # no model-price download on import
+pytest.importorskip("crewai")
+pytest.importorskip("litellm")
+
+from crewai import Agent, Crew, LLM, Task
+
+import llm_gateway
+from llm_gateway import GatewayLLM, LLMDeadlineExceeded, TokenBucket, backoff_delay, get_llm
+
+
+class RateLimitError(Exception):
+    """Same class name as litellm's, which is what is_retryable() looks at."""
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Replaces the provider request under the gateway; records every request."""
+    calls = []
+    replies = []
+
+    def call(self, messages, tools=None, *args, **kwargs):
+        calls.append(messages)
+        reply = replies.pop(0) if replies else "ok"
+        if isinstance(reply, Exception):
+            raise reply
+        return reply() if callable(reply) else reply
+
+    monkeypatch.setattr(LLM, "call", call)
+    monkeypatch.setattr(llm_gateway, "_limits", {})
+    monkeypatch.setattr(llm_gateway, "LLM_BACKOFF_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(llm_gateway, "_stats", dict.fromkeys(llm_gateway._stats, 0))
+    return calls, replies
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setenv("MODEL", "gpt-4o-mini")  # a model LLM() would hand to the native OpenAI class
+    monkeypatch.setenv("LLM_API_KEY", "test")
+    monkeypatch.setattr(llm_gateway, "_llm", None)
+    return get_llm()
+
+
+def test_get_llm_returns_a_gateway_llm(llm):
+    assert isinstance(llm, GatewayLLM)
+    assert llm.is_litellm
+    assert get_llm() is llm
+
+
+def test_call_goes_through_the_token_bucket(llm, provider):
+    calls, _ = provider
+    assert llm.call([{"role": "user", "content": "hi"}]) == "ok"
+
+    bucket = llm_gateway._limits["gpt-4o-mini"].bucket
+    assert bucket._tokens < bucket.capacity
+    assert len(calls) == 1
+    assert llm_gateway.gateway_stats()["requests"] == 1
+
+
+def test_crew_copies_keep_the_gateway(llm):
+    agent = Agent(role="analyst", goal="answer", backstory="reads filings", llm=llm)
+    crew = Crew(agents=[agent], tasks=[Task(description="d", expected_output="e", agent=agent)])
+
+    copied = crew.copy().agents[0].llm
+    assert isinstance(copied, GatewayLLM)
+    assert copied.model == llm.model and copied.deadline_seconds == llm.deadline_seconds
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+    deadline = time.monotonic() + 5
+    assert bucket.acquire(deadline) == 0.0
+    assert bucket.acquire(deadline) == 0.0
+    assert bucket.acquire(deadline) == pytest.approx(0.05, abs=0.02)
+
+
+def test_token_bucket_gives_up_past_the_deadline():
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    bucket.acquire(time.monotonic() + 1)
+    with pytest.raises(LLMDeadlineExceeded):
+        bucket.acquire(time.monotonic() + 1)
+
+
+def test_backoff_is_jittered_capped_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(llm_gateway.random, "uniform", lambda low, high: high)
+    assert backoff_delay(0) == llm_gateway.LLM_BACKOFF_BASE_SECONDS
+    assert backoff_delay(2) == 4 * llm_gateway.LLM_BACKOFF_BASE_SECONDS
+    assert backoff_delay(50) == llm_gateway.LLM_BACKOFF_MAX_SECONDS
+    assert backoff_delay(0, retry_after=120) == 120
+
+
+def test_retryable_errors_are_retried(llm, provider):
+    calls, replies = provider
+    replies.extend([RateLimitError("slow down"), RateLimitError("slow down"), "ok"])
+
+    assert llm.call("question") == "ok"
+    assert len(calls) == 3
+    assert llm_gateway.gateway_stats()["retries"] == 2
+
+
+def test_other_errors_are_not_retried(llm, provider):
+    calls, replies = provider
+    replies.append(ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        llm.call("question")
+    assert len(calls) == 1
+    assert llm_gateway.gateway_stats()["failures"] == 1
+
+
+def test_identical_prompts_in_flight_share_one_request(llm, provider):
+    calls, replies = provider
+    release = threading.Event()
+    replies.append(lambda: release.wait(5) and "answer")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llm.call("same question"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while llm_gateway.gateway_stats()["coalesced"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["answer"] * 3
+    assert len(calls) == 1
@@ -0,0 +1,71 @@
+import pickle
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", {})
+
+
+def _worker_snapshot():
+    """What a worker ships back with a finished job: drained, then pickled onto the event queue."""
+    return pickle.loads(pickle.dumps(metrics.drain()))
+
+
+def test_drain_returns_deltas_and_resets():
+    metrics.counter("jobs_total", "Jobs").inc(kind="parse")
+    metrics.histogram("stage_seconds", "Stages").observe(0.02, stage="hash")
+
+    snapshot = metrics.drain()
+    assert snapshot["jobs_total"]["values"] == {(("kind", "parse"),): 1}
+    assert sum(snapshot["stage_seconds"]["values"][(("stage", "hash"),)][:-1]) == 1
+
+    assert metrics.drain() == {}  # nothing recorded since
+    metrics.counter("jobs_total").inc(kind="parse")
+    assert metrics.drain()["jobs_total"]["values"] == {(("kind", "parse"),): 1}
+
+
+def test_merge_adds_worker_deltas():
+    metrics.counter("jobs_total", "Jobs").inc(3, kind="parse")
+    metrics.histogram("stage_seconds", "Stages").observe(0.02, stage="hash")
+    first = _worker_snapshot()
+    metrics.counter("jobs_total").inc(2, kind="parse")
+    metrics.counter("jobs_total").inc(kind="batch")
+    second = _worker_snapshot()
+
+    metrics.merge(first)
+    metrics.merge(second)
+    metrics.merge(first)
+
+    assert metrics.counter("jobs_total").values == {(("kind", "parse"),): 8, (("kind", "batch"),): 1}
+    series = metrics.histogram("stage_seconds").values[(("stage", "hash"),)]
+    assert sum(series[:-1]) == 2
+    assert series[-1] == pytest.approx(0.04)
+
+
+def test_merge_creates_metrics_unknown_to_the_api_process():
+    metrics.histogram("docling_page_seconds", "Per page", buckets=(1, 10)).observe(5, ocr="true")
+    snapshot = _worker_snapshot()
+    metrics._registry.clear()
+
+    metrics.merge(snapshot)
+    histogram = metrics.histogram("docling_page_seconds")
+    assert histogram.buckets == (1, 10)
+    assert histogram.help == "Per page"
+    assert histogram.values[(("ocr", "true"),)] == [0, 1, 0, 5]
+
+
+def test_render_prometheus_text():
+    metrics.counter("cache_requests_total", "Cache lookups").inc(cache="parse", result="hit")
+    metrics.histogram("stage_seconds", "Stages", buckets=(0.1, 1)).observe(0.5, stage="convert")
+
+    text = metrics.render()
+    assert "# TYPE cache_requests_total counter" in text
+    assert 'cache_requests_total{cache="parse",result="hit"} 1' in text
+    assert 'stage_seconds_bucket{stage="convert",le="0.1"} 0' in text
+    assert 'stage_seconds_bucket{stage="convert",le="1"} 1' in text
+    assert 'stage_seconds_bucket{stage="convert",le="+Inf"} 1' in text
+    assert 'stage_seconds_count{stage="convert"} 1' in text
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, inspect, text
+
+import migrations
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _state(url):
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            versions = [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY 1"))]
+            columns = {column["name"] for column in inspect(conn).get_columns("documents")}
+        return versions, columns
+    finally:
+        engine.dispose()
+
+
+def test_second_run_is_a_no_op(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(migrations, "engine", create_engine(url))
+
+    assert migrations.run_migrations() == [version for version, _, _ in migrations.MIGRATIONS]
+    assert migrations.run_migrations() == []
+    versions, columns = _state(url)
+    assert versions == [version for version, _, _ in migrations.MIGRATIONS]
+    assert "company" in columns
+
+
+def test_workers_starting_together_all_succeed(tmp_path):
+    # Separate processes, like uvicorn workers: pysqlite DDL isn't transactional,
+    # so without the lock some of these die with "table ... already exists".
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    procs = [subprocess.Popen([sys.executable, "migrations.py"], cwd=BACKEND_DIR,
+                              env={**os.environ, "DATABASE_URL": url},
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+             for _ in range(6)]
+    outputs = [proc.communicate(timeout=60)[0] for proc in procs]
+
+    assert [proc.returncode for proc in procs] == [0] * len(procs), outputs
+    assert sum("nothing to do" in output for output in outputs) == len(procs) - 1
+    versions, _ = _state(url)
+    assert versions == [version for version, _, _ in migrations.MIGRATIONS]
+
+
+def test_period_order_backfills_existing_facts(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = create_engine(url)
+    monkeypatch.setattr(migrations, "engine", engine)
+    with engine.begin() as conn:  # a database last migrated to version 2
+        migrations._ensure_table(conn)
+        conn.execute(text("INSERT INTO schema_migrations (version) VALUES (1), (2)"))
+        conn.execute(text("CREATE TABLE metric_facts (id INTEGER PRIMARY KEY, owner_id INTEGER, "
+                          "company VARCHAR, metric VARCHAR, period_key VARCHAR)"))
+        conn.execute(text("INSERT INTO metric_facts (owner_id, company, metric, period_key) VALUES "
+                          "(1, 'ACME', 'revenue', '2025-FY'), (1, 'ACME', 'revenue', '2025-H1'), "
+                          "(1, 'ACME', 'cash', '2025-06-30')"))
+
+    assert migrations.run_migrations() == [3]
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT period_key, period_end, period_months FROM metric_facts "
+                                 "ORDER BY period_end, period_months")).all()
+    assert [tuple(row) for row in rows] == [("2025-06-30", "2025-06-30", 0), ("2025-H1", "2025-06-30", 6),
+                                            ("2025-FY", "2025-12-31", 12)]
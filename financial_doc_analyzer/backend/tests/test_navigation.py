@@ -0,0 +1,40 @@
+import pytest
+
+from navigation import DocumentNavigator
+
+
+def test_reading_order_and_structure(docling_doc):
+    nav = DocumentNavigator(docling_doc)
+    assert nav.order[:5] == ["#/texts/0", "#/texts/1", "#/texts/2", "#/groups/0", "#/texts/3"]
+    assert nav.parent["#/texts/3"] == "#/groups/0"
+    assert nav.children["#/groups/0"] == ["#/texts/3", "#/texts/4"]
+    assert nav.next_sibling["#/groups/0"] == "#/tables/0"
+    assert nav.page(2) == ["#/texts/4", "#/tables/0", "#/texts/5"]
+
+
+def test_next_text_skips_furniture_and_non_text(docling_doc):
+    nav = DocumentNavigator(docling_doc)
+    [(match, following)] = nav.next_text_after("free cash flow", count=3)
+    assert match == "#/texts/2"
+    assert following == ["#/texts/3", "#/texts/4", "#/texts/5"]
+    assert nav.next_text_after("no such label") == []
+
+
+def test_sections_and_columns(docling_doc):
+    nav = DocumentNavigator(docling_doc)
+    assert nav.section("#/texts/1") == ["#/texts/2", "#/groups/0", "#/texts/3", "#/texts/4", "#/tables/0"]
+    assert nav.section_of("#/tables/0") == "#/texts/1"
+    cells = nav.column_cells("Q2-2025")
+    assert [(c["row_header"], c["text"]) for c in cells] == [("Total revenues", "22,496"),
+                                                            ("Operating margin", "(3.2)%")]
+
+
+def test_find_next_text_node_tool(docling_json):
+    pytest.importorskip("crewai")
+    from tools.custom_tool import Find_Next_Text_Node
+
+    tool = Find_Next_Text_Node()
+    output = tool._run(f'"{docling_json}"', "FINANCIAL SUMMARY", count=2)
+    assert output.startswith("#/texts/1 (page 1): FINANCIAL SUMMARY")
+    assert "Free cash flow" in output and "Deliveries grew in every region" in output
+    assert tool._run(str(docling_json), "Goodwill").startswith("NO_MATCH")
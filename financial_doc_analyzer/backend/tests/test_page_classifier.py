@@ -0,0 +1,35 @@
+import pytest
+
+fitz = pytest.importorskip("pymupdf")
+from tools.page_classifier import PageInfo, Segment, classify_pages, needs_ocr, plan_segments  # noqa: E402
+
+
+@pytest.mark.parametrize("text_chars, image_coverage, expected", [
+    (0, 0.0, True),          # scan without a text layer
+    (2000, 0.0, False),      # ordinary text page
+    (120, 0.9, True),        # slide: a title over a full-page image
+    (2000, 0.9, False),      # image-heavy but the text layer carries the content
+    (120, 0.1, False),       # short text page, no images
+])
+def test_needs_ocr(text_chars, image_coverage, expected):
+    assert needs_ocr(text_chars, image_coverage) is expected
+
+
+def _page(n, ocr):
+    return PageInfo(page_no=n, text_chars=0 if ocr else 500, image_coverage=0.0, needs_ocr=ocr, classify_ms=0.0)
+
+
+def test_segments_split_where_the_ocr_decision_changes():
+    pages = [_page(1, False), _page(2, False), _page(3, True), _page(4, False)]
+    assert plan_segments(pages, workers=1) == [Segment(0, 2, False), Segment(2, 3, True), Segment(3, 4, False)]
+    assert plan_segments([], workers=4) == []
+
+
+def test_classify_pages(tmp_path):
+    pdf = tmp_path / "mixed.pdf"
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), "Total revenues increased 12% year over year. " * 5)
+        doc.new_page()  # blank: nothing to read without OCR
+        doc.save(pdf)
+    pages = classify_pages(pdf)
+    assert [(p.page_no, p.needs_ocr) for p in pages] == [(1, False), (2, True)]
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("pymupdf")
+from tools.page_parallel import merge_documents, page_ranges  # noqa: E402
+
+
+@pytest.mark.parametrize("pages, workers, min_pages, expected", [
+    (0, 4, 2, []),
+    (1, 4, 2, [(0, 1)]),
+    (10, 4, 2, [(0, 3), (3, 6), (6, 8), (8, 10)]),
+    (5, 8, 2, [(0, 3), (3, 5)]),
+    (10, 0, 2, [(0, 10)]),
+])
+def test_page_ranges(pages, workers, min_pages, expected):
+    assert page_ranges(pages, workers, min_pages) == expected
+
+
+def _part(text, pages):
+    return {
+        "name": "part",
+        "body": {"self_ref": "#/body", "children": [{"$ref": "#/texts/0"}]},
+        "furniture": {"self_ref": "#/furniture", "children": []},
+        "texts": [{"self_ref": "#/texts/0", "parent": {"$ref": "#/body"}, "text": text,
+                   "prov": [{"page_no": 1}]}],
+        "pages": {str(n): {"page_no": n} for n in range(1, pages + 1)},
+    }
+
+
+def test_merge_renumbers_refs_and_pages():
+    merged = merge_documents([(0, _part("first", 2)), (2, _part("second", 3))], name="ACME")
+    assert merged["name"] == "ACME"
+    assert merged["body"]["children"] == [{"$ref": "#/texts/0"}, {"$ref": "#/texts/1"}]
+    assert [(t["self_ref"], t["text"], t["prov"][0]["page_no"]) for t in merged["texts"]] == [
+        ("#/texts/0", "first", 1), ("#/texts/1", "second", 3)]
+    assert sorted(merged["pages"], key=int) == ["1", "2", "3", "4", "5"]
+
+
+def test_worker_count_is_not_part_of_the_cache_key():
+    pytest.importorskip("crewai")
+    from tools.docling_tool import DOCLING_OPTIONS
+
+    assert "workers" not in DOCLING_OPTIONS
@@ -0,0 +1,71 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.parse_cache import ParseCache, cache_key
+
+
+def _entry(cache, n):
+    return cache_key(f"{n:064x}", {"ocr": "auto"})
+
+
+def test_put_and_get(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    key = _entry(cache, 1)
+    assert cache.get(key) is None
+
+    path = cache.put_document(key, {"name": "doc"}, report={"strategy": "text"})
+    assert cache.get(key) == path
+    assert json.loads(path.read_text()) == {"name": "doc"}
+    assert json.loads(cache.report_path(path).read_text()) == {"strategy": "text"}
+    assert list(path.parent.glob("*.tmp")) == []
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (1, 1, 1, 1)
+
+
+def test_key_depends_on_options():
+    assert cache_key("ab" * 32, {"ocr": "auto"}) != cache_key("ab" * 32, {"ocr": "force"})
+    assert cache_key("ab" * 32, {"ocr": "auto", "tables": True}) == cache_key("ab" * 32, {"tables": True, "ocr": "auto"})
+
+
+def test_put_moves_a_converted_file(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    converted = tmp_path / "out.json"
+    converted.write_text("{}")
+    path = cache.put(_entry(cache, 1), converted)
+    assert path.exists() and not converted.exists()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(tmp_path / "cache", max_bytes=250)
+    doc = {"body": "x" * 100}
+    old, recent, new = (_entry(cache, n) for n in range(3))
+    old_path = cache.put_document(old, doc)
+    old_path.with_suffix(".index").mkdir()
+    cache.put_document(recent, doc)
+    past = time.time() - 60
+    os.utime(old_path, (past, past))
+    os.utime(cache.path_for(recent), (past + 1, past + 1))
+    cache.get(recent)  # a hit makes it the most recently used
+
+    cache.put_document(new, doc)
+    assert cache.get(old) is None and not old_path.with_suffix(".index").exists()
+    assert cache.get(recent) and cache.get(new)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_concurrent_puts_of_the_same_key(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    key = _entry(cache, 1)
+
+    def store(n):
+        converted = tmp_path / f"worker-{n}.json"
+        converted.write_text(json.dumps({"worker": n}))
+        return cache.put(key, converted)
+
+    with ThreadPoolExecutor(8) as pool:
+        paths = set(pool.map(store, range(32)))
+    assert paths == {cache.path_for(key)}
+    assert "worker" in json.loads(cache.path_for(key).read_text())
+    assert list(cache.path_for(key).parent.glob("*.tmp")) == []
@@ -0,0 +1,80 @@
+import pytest
+
+from periods import as_period_key, period_key, period_months, period_range
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("Q2-2025", "2025-Q2"),
+    ("Q2 FY25", "2025-Q2"),
+    ("Q2'25", "2025-Q2"),
+    ("2Q25", "2025-Q2"),
+    ("2025 Q2", "2025-Q2"),
+    ("H1 2025", "2025-H1"),
+    ("1H25", "2025-H1"),
+    ("FY 2024", "2024-FY"),
+    ("FY24", "2024-FY"),
+    ("2024", "2024-FY"),
+    ("Three months ended June 30, 2025", "2025-Q2"),
+    ("Six Months Ended Dec. 31, 2024", "2024-H2"),
+    ("Year ended December 31, 2024", "2024-FY"),
+    ("Twelve months ended Dec 31, 2024", "2024-FY"),
+])
+def test_periods(label, expected):
+    assert period_key(label) == expected
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("June 30, 2025", "2025-06-30"),
+    ("Dec 31, 2024", "2024-12-31"),
+    ("As of Dec. 31, 2024", "2024-12-31"),
+    ("2025-06-30", "2025-06-30"),
+])
+def test_dates_are_points_in_time_not_fiscal_years(label, expected):
+    assert period_key(label) == expected
+
+
+@pytest.mark.parametrize("label", [
+    "", "Total", "YoY", "QoQ", "% change", "Q2-2025 vs Q2-2024", "TTM Q2-2025",
+    "Nine months ended Sep 30, 2025", "2024 Annual",
+])
+def test_not_a_period(label):
+    assert period_key(label) is None
+
+
+def test_invalid_dates_are_not_periods():
+    assert period_key("Feb 30, 2025") is None
+    assert period_key("2025-13-01") is None
+
+
+@pytest.mark.parametrize("key, first, last, months", [
+    ("2025-Q1", "2025-01-01", "2025-03-31", 3),
+    ("2024-Q4", "2024-10-01", "2024-12-31", 3),
+    ("2024-H1", "2024-01-01", "2024-06-30", 6),
+    ("2025-H2", "2025-07-01", "2025-12-31", 6),
+    ("2024-FY", "2024-01-01", "2024-12-31", 12),
+    ("2025-06-30", "2025-06-30", "2025-06-30", 0),
+])
+def test_period_range(key, first, last, months):
+    start, end = period_range(key)
+    assert (start.isoformat(), end.isoformat(), period_months(key)) == (first, last, months)
+
+
+@pytest.mark.parametrize("key", ["", "Q2-2025", "2025-Q5", "2025-02-30", "2025"])
+def test_period_range_rejects_non_keys(key):
+    assert period_range(key) is None
+
+
+def test_mixed_periods_sort_by_end_date_then_span():
+    labels = ["FY 2025", "H1 2025", "Q2-2025", "June 30, 2025", "Q1-2025", "FY 2024", "Q4-2024", "2024-12-31"]
+    keys = sorted(map(period_key, labels), key=lambda key: (period_range(key)[1], period_months(key)))
+    assert keys == ["2024-12-31", "2024-Q4", "2024-FY", "2025-Q1",
+                    "2025-06-30", "2025-Q2", "2025-H1", "2025-FY"]
+    assert sorted(keys) != keys  # the keys themselves are not an order
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Q1-2024", "2024-Q1"), ("2024-Q1", "2024-Q1"), ("2025-FY", "2025-FY"), ("2025-H1", "2025-H1"),
+    ("FY24", "2024-FY"), ("2025-06-30", "2025-06-30"), ("last year", None), ("", None),
+])
+def test_as_period_key(text, expected):
+    assert as_period_key(text) == expected
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from tables import CompactTable
+
+
+@pytest.fixture
+def table():
+    return CompactTable.from_numpy(np.array([[10.0, 12.0, np.nan, 15.0],
+                                             [-4.0, -2.0, 1.0, 2.0]]),
+                                   ["Total revenues", "Net income"],
+                                   ["Q1-2025", "Q2-2025", "Q3-2025", "Q4-2025"])
+
+
+def test_row_and_column_lookup(table):
+    assert table.row("total  revenues")["Q2-2025"] == 12.0
+    assert table.column("q4 2025").tolist() == [15.0, 2.0]
+    assert table.row("Gross margin") is None
+
+
+def test_diff(table):
+    np.testing.assert_array_equal(table.diff(), [[np.nan, 2.0, np.nan, np.nan],
+                                                 [np.nan, 2.0, 3.0, 1.0]])
+
+
+def test_pct_change_uses_absolute_base(table):
+    np.testing.assert_allclose(table.pct_change(2)[:, 2:], [[np.nan, 25.0], [125.0, 200.0]])
+
+
+@pytest.mark.parametrize("periods", [0, -1, 1.5])
+def test_invalid_periods(table, periods):
+    with pytest.raises(ValueError, match="periods"):
+        table.diff(periods)
+    with pytest.raises(ValueError, match="periods"):
+        table.pct_change(periods)
+
+
+def test_from_numpy_shape_mismatch():
+    with pytest.raises(ValueError):
+        CompactTable.from_numpy(np.zeros((2, 2)), ["a"], ["Q1", "Q2"])
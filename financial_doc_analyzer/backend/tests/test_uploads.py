@@ -0,0 +1,53 @@
+import asyncio
+import hashlib
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("fastapi")
+from starlette.datastructures import UploadFile  # noqa: E402
+
+import uploads  # noqa: E402
+from uploads import UploadTooLargeError, store_upload  # noqa: E402
+
+
+def _upload(data: bytes, filename="ACME-Q2-2025.PDF", size=None):
+    return UploadFile(BytesIO(data), filename=filename, size=size)
+
+
+def test_stores_by_content_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 4)  # several chunks
+    data = b"%PDF-1.4 quarterly update"
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    first = asyncio.run(store_upload(_upload(data), tmp_path))
+    assert first.path == tmp_path / sha256[:2] / f"{sha256}.pdf"
+    assert first.path.read_bytes() == data and (first.sha256, first.size) == (sha256, len(data))
+    assert not first.already_stored
+
+    again = asyncio.run(store_upload(_upload(data, filename="renamed.pdf"), tmp_path))
+    assert again.path == first.path and again.already_stored
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_rejects_oversized_streams(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 4)
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(store_upload(_upload(b"x" * 11), tmp_path, max_bytes=10))
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert [p for p in tmp_path.iterdir() if p.name != "tmp"] == []
+
+
+def test_rejects_declared_size_before_reading(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(store_upload(_upload(b"", size=11), tmp_path, max_bytes=10))
+    assert not (tmp_path / "tmp").exists()
+
+
+def test_route_answers_413(client, tmp_path, monkeypatch):
+    import analysis
+
+    monkeypatch.setattr(analysis, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(analysis, "store_upload", lambda file, upload_dir: store_upload(file, upload_dir, max_bytes=10))
+    response = client.post("/analysis/documents", files={"file": ("big.pdf", b"x" * 64, "application/pdf")})
+    assert response.status_code == 413
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import vector_index
+from vector_index import chunk_document, build_vectors_for, retrieve, format_chunks, vectors_path_for
+
+
+def test_chunks_group_text_under_headings_and_render_table_rows(docling_doc):
+    chunks = chunk_document(docling_doc)
+    texts = [c for c in chunks if c["kind"] == "text"]
+    tables = [c for c in chunks if c["kind"] == "table"]
+
+    assert all("ACME Corp" not in c["text"] for c in chunks)  # page header skipped
+    assert texts[0]["heading"] == "FINANCIAL SUMMARY"
+    assert "Free cash flow" in texts[0]["text"] and "Energy storage hit a record" in texts[0]["text"]
+    assert texts[0]["page"] == 1
+
+    assert tables[0]["refs"] == ["#/tables/0"]
+    assert tables[0]["page"] == 2
+    assert "Total revenues | Q1-2025: 19,335; Q2-2025: 22,496" in tables[0]["text"]
+    assert [c["id"] for c in chunks] == list(range(len(chunks)))
+
+
+def test_build_persists_vectors_next_to_the_json(docling_json):
+    vectors_dir = build_vectors_for(docling_json, "hashing-256")
+
+    assert vectors_dir == vectors_path_for(docling_json)
+    meta = json.loads((vectors_dir / "meta.json").read_text())
+    assert meta == {"model": "hashing-256", "dim": 256}
+    assert not list(docling_json.parent.glob("*.tmp"))
+
+
+def test_retrieve_ranks_the_matching_chunk_first(docling_json):
+    results = retrieve(docling_json, "total revenues Q2-2025", k=2)
+
+    assert len(results) == 2
+    assert results[0][1]["kind"] == "table"
+    assert results[0][0] >= results[1][0]
+
+
+def test_index_is_rebuilt_for_another_embedder(docling_json):
+    build_vectors_for(docling_json, "hashing-256")
+    index = vector_index.get_vector_index(docling_json)
+    assert index.meta["model"] == vector_index.get_embedder().name
+
+
+def test_format_chunks_tags_page_and_refs(docling_json):
+    block = format_chunks(retrieve(docling_json, "total revenues", k=1))
+    assert block.startswith("[page 2 | #/tables/0 | score ")
+    assert "Total revenues" in block
+    assert len(format_chunks(retrieve(docling_json, "total revenues", k=1), max_chars=20)) == 20
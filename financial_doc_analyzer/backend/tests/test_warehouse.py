@@ -0,0 +1,99 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+import warehouse  # noqa: E402
+from models import Documents, MetricFact  # noqa: E402
+from periods import period_key, period_months, period_range  # noqa: E402
+
+
+def _document(db, user, company, sha256, json_path=None):
+    document = Documents(owner_id=user["id"], filename=f"{company}-report.pdf", sha256=sha256,
+                         company=company, pdf_path="", json_path=json_path, parse_status="parsed")
+    db.add(document)
+    db.commit()
+    return document
+
+
+def _facts(db, document, metric, values):
+    """values: {column header: value}, stored the way index_document() does."""
+    for label, value in values.items():
+        key = period_key(label)
+        db.add(MetricFact(document_id=document.id, owner_id=document.owner_id, company=document.company,
+                          metric=metric, label=metric, period=label, period_key=key,
+                          period_end=period_range(key)[1], period_months=period_months(key),
+                          value=value, unit="$", source_ref="#/tables/0", page=1))
+    db.commit()
+
+
+@pytest.fixture
+def acme(db, user):
+    document = _document(db, user, "ACME", "a" * 64)
+    # FY before H1 before Q2 as strings ('2025-FY' < '2025-H1' < '2025-Q1'); not in time.
+    _facts(db, document, "total revenues", {
+        "FY 2025": 400, "H1 2025": 190, "Q2-2025": 100, "Q1-2025": 90,
+        "FY 2024": 350, "Q4-2024": 95, "June 30, 2025": 7,
+    })
+    return document
+
+
+def _periods(points):
+    return [point["period"] for point in points]
+
+
+def test_timeseries_is_chronological(db, user, acme):
+    series = warehouse.timeseries(db, user["id"], "total revenues")["series"]["ACME"]
+    assert _periods(series) == ["2024-Q4", "2024-FY", "2025-Q1", "2025-06-30", "2025-Q2", "2025-H1", "2025-FY"]
+
+
+def test_timeseries_range_uses_period_dates(db, user, acme):
+    result = warehouse.timeseries(db, user["id"], "total revenues", start="2025-H1", end="Q2-2025")
+    assert _periods(result["series"]["ACME"]) == ["2025-Q1", "2025-06-30", "2025-Q2", "2025-H1"]
+
+    result = warehouse.timeseries(db, user["id"], "total revenues", start="FY 2025")
+    assert _periods(result["series"]["ACME"]) == ["2025-Q1", "2025-06-30", "2025-Q2", "2025-H1", "2025-FY"]
+
+    result = warehouse.timeseries(db, user["id"], "total revenues", end="2024-12-31")
+    assert _periods(result["series"]["ACME"]) == ["2024-Q4", "2024-FY"]
+
+
+def test_timeseries_rejects_a_bad_period(db, user, acme):
+    with pytest.raises(ValueError):
+        warehouse.timeseries(db, user["id"], "total revenues", start="last year")
+
+
+def test_compare_latest_period_is_the_latest_in_time(db, user, acme):
+    other = _document(db, user, "BETA", "b" * 64)
+    _facts(db, other, "total revenues", {"FY 2024": 50, "Q1-2025": 12})
+
+    rows = warehouse.compare(db, user["id"], "revenues", ["ACME", "BETA", "GAMMA"])["companies"]
+    assert rows["ACME"]["period"] == "2025-FY"
+    assert rows["BETA"]["period"] == "2025-Q1"
+    assert rows["GAMMA"] is None
+
+    rows = warehouse.compare(db, user["id"], "revenues", period="2Q25")["companies"]
+    assert list(rows) == ["ACME"] and rows["ACME"]["value"] == 100
+
+
+def test_later_filing_wins_for_the_same_period(db, user, acme):
+    restated = _document(db, user, "ACME", "c" * 64)
+    _facts(db, restated, "total revenues", {"Q2-2025": 101})
+
+    rows = warehouse.compare(db, user["id"], "total revenues", period="Q2-2025")["companies"]
+    assert rows["ACME"]["value"] == 101 and rows["ACME"]["document_id"] == restated.id
+
+
+def test_list_metrics_first_and_last_period(db, user, acme):
+    [row] = warehouse.list_metrics(db, user["id"], q="revenues")
+    assert (row["first_period"], row["last_period"]) == ("2024-Q4", "2025-FY")
+    assert row["periods"] == 7 and row["companies"] == 1
+
+
+def test_index_document_stores_period_dates(db, user, docling_json):
+    document = _document(db, user, "ACME", "d" * 64, json_path=str(docling_json))
+    assert warehouse.index_document(db, document) > 0
+
+    facts = db.query(MetricFact).filter(MetricFact.document_id == document.id,
+                                        MetricFact.metric == "total revenues").all()
+    assert sorted((f.period_key, f.period_end.isoformat(), f.period_months) for f in facts) == [
+        ("2025-Q1", "2025-03-31", 3), ("2025-Q2", "2025-06-30", 3)]
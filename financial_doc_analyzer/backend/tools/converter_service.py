@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pymupdf as fitz
+
+from tools.page_parallel import merge_documents, DOCLING_INGEST_WORKERS
+
+
+# ---------------------------------------------------------------------------
+# In-process docling conversion with warm converters.
+#
+# Building a DocumentConverter loads the layout and OCR weights; that now
+# happens once per process (warm_up), not once per PDF. Converters are kept
+# in a small pool per OCR mode and take PDF bytes directly, returning the
+# DoclingDocument as a dict. Page-parallel work goes to a persistent process
+# pool whose workers warm their own converters at start; its size is this
+# analysis worker's share of the CPUs (DOCLING_INGEST_WORKERS), and with a
+# share of one there is no pool at all.
+# ---------------------------------------------------------------------------
+
+DOCLING_BACKEND = os.getenv("DOCLING_BACKEND", "inprocess")   # inprocess | cli
+DOCLING_CONVERTERS = int(os.getenv("DOCLING_CONVERTERS", 1))   # warm converters per OCR mode
+
+
+def _build_converter(force_ocr: bool):
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    options = PdfPipelineOptions()
+    options.do_ocr = force_ocr
+    if force_ocr:
+        options.ocr_options.force_full_page_ocr = True
+    converter = DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)}
+    )
+    converter.initialize_pipeline(InputFormat.PDF)  # load models now, not on first request
+    return converter
+
+
+class ConverterPool:
+    """Bounded pool of warm DocumentConverters, one queue per OCR mode."""
+
+    def __init__(self, size: int = DOCLING_CONVERTERS):
+        self.size = size
+        self._idle = {True: queue.Queue(), False: queue.Queue()}
+        self._created = {True: 0, False: 0}
+        self._lock = threading.Lock()
+
+    def warm_up(self, modes=(False, True)):
+        for force_ocr in modes:
+            while True:
+                with self._lock:
+                    if self._created[force_ocr] >= self.size:
+                        break
+                    self._created[force_ocr] += 1
+                self._idle[force_ocr].put(_build_converter(force_ocr))
+
+    @contextmanager
+    def acquire(self, force_ocr: bool):
+        idle = self._idle[force_ocr]
+        try:
+            converter = idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created[force_ocr] < self.size
+                if can_create:
+                    self._created[force_ocr] += 1
+            converter = _build_converter(force_ocr) if can_create else idle.get()
+        try:
+            yield converter
+        finally:
+            idle.put(converter)
+
+    def convert_bytes(self, data: bytes, name: str, force_ocr: bool) -> dict:
+        from docling.datamodel.base_models import DocumentStream
+
+        with self.acquire(force_ocr) as converter:
+            result = converter.convert(DocumentStream(name=name, stream=BytesIO(data)))
+        return result.document.export_to_dict()
+
+
+converter_pool = ConverterPool()
+
+
+# ---------------------------------------------------------------------------
+# PAGE-PARALLEL WORKERS
+# ---------------------------------------------------------------------------
+def _init_ingest_worker():
+    converter_pool.warm_up()
+
+
+def _convert_part_bytes(data: bytes, name: str, force_ocr: bool) -> Tuple[dict, float]:
+    start = time.perf_counter()
+    return converter_pool.convert_bytes(data, name, force_ocr), time.perf_counter() - start
+
+
+def split_pdf_bytes(data: bytes, segments) -> List[bytes]:
+    parts = []
+    with fitz.open(stream=data, filetype="pdf") as src:
+        for start, end, *_ in segments:
+            with fitz.open() as part:
+                part.insert_pdf(src, from_page=start, to_page=end - 1)
+                parts.append(part.tobytes())
+    return parts
+
+
+class ConverterService:
+    def __init__(self, workers: int = DOCLING_INGEST_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_ingest_worker,
+                )
+            return self._pool
+
+    def warm_up(self):
+        converter_pool.warm_up()
+        if self.workers > 1:
+            pool = self._get_pool()
+            for _ in range(self.workers):
+                pool.submit(time.sleep, 0)  # spawn workers so their initializers load models
+
+    def convert(self, data: bytes, name: str, segments) -> Tuple[dict, List[float]]:
+        """Convert PDF bytes segment by segment; returns (DoclingDocument dict, seconds per segment)."""
+        if not segments:
+            raise RuntimeError(f"No pages to convert in {name}")
+        if len(segments) == 1:
+            doc, seconds = _convert_part_bytes(data, name, segments[0][2])
+            return doc, [seconds]
+
+        stem = Path(name).stem
+        parts = split_pdf_bytes(data, segments)
+        names = [f"{stem}.p{s[0] + 1}-{s[1]}.pdf" for s in segments]
+        if self.workers <= 1:
+            # OCR changes split the PDF even without page parallelism; the
+            # converters already warm in this process handle every segment.
+            results = [_convert_part_bytes(part, part_name, s[2])
+                       for part, part_name, s in zip(parts, names, segments)]
+        else:
+            futures = [self._get_pool().submit(_convert_part_bytes, part, part_name, s[2])
+                       for part, part_name, s in zip(parts, names, segments)]
+            results = [future.result() for future in futures]
+
+        merged = merge_documents([(s[0], doc) for s, (doc, _) in zip(segments, results)], name=stem)
+        if "origin" in merged:
+            merged["origin"] = {**merged["origin"], "filename": name}
+        return merged, [seconds for _, seconds in results]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+converter_service = ConverterService()
@@ -0,0 +1,40 @@
+from crewai.tools.base_tool import BaseTool
+
+from pydantic import BaseModel, Field
+from typing import Type
+
+import metrics
+
+from navigation import get_navigator
+
+
+class FindNextTextNodeInput(BaseModel):
+    json_file_path: str = Field(..., description="Path of the DoclingDocument JSON file")
+    label: str = Field(..., description="Text of the node to start from, e.g. a label or section header")
+    count: int = Field(3, description="How many following text nodes to return")
+
+
+class Find_Next_Text_Node(BaseTool):
+    name: str = "Find Next Text Node"
+    description: str = ("Finds a text node (label, heading, caption) in a DoclingDocument JSON file and returns "
+                        "the text nodes that follow it in reading order, with page numbers. Use it when a "
+                        "label and its value are separate text items. Returns NO_MATCH when the label is not found.")
+    args_schema: Type[BaseModel] = FindNextTextNodeInput
+
+    @metrics.timed_tool
+    def _run(self, json_file_path: str, label: str, count: int = 3) -> str:
+        """Lookups in the document's precomputed reading order; no tree walk per call."""
+        try:
+            navigator = get_navigator(json_file_path.strip().strip('"'))
+            hits = navigator.next_text_after(label, max(1, min(count, 20)))
+        except Exception as e:
+            return f"Exception occurred: {str(e)}"
+        if not hits:
+            return f"NO_MATCH: no text node matching '{label}' in {json_file_path}"
+        blocks = []
+        for ref, following in hits:
+            lines = [f"{ref} (page {navigator.describe(ref)['page']}): {navigator.items[ref]['text']}"]
+            lines += [f"  → {node['ref']} (page {node['page']}, {node['label']}): {node['text']}"
+                      for node in navigator.describe_all(following)]
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
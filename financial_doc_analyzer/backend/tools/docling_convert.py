@@ -0,0 +1,15 @@
+import subprocess
+from pathlib import Path
+
+
+def run_docling_cli(pdf_path, output_dir, force_ocr: bool = True) -> Path:
+    """Convert one PDF with the docling CLI; returns the JSON path or raises RuntimeError.
+
+    force_ocr=False means the pages have a text layer, so OCR is skipped entirely.
+    """
+    ocr_flag = "--force-ocr" if force_ocr else "--no-ocr"
+    cmd = ["docling", "--to", "json", ocr_flag, "--output", str(output_dir), str(pdf_path)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Error processing document: {result.stderr}")
+    return Path(output_dir) / (Path(pdf_path).stem + ".json")
@@ -1,53 +1,83 @@
-from crewai.tools.base_tool import BaseTool
+import logging
+import tempfile
+from pathlib import Path
+from typing import Type
 
+from crewai.tools.base_tool import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type
 
-import subprocess
-import json
+import metrics
 
-import shutil # Required for moving the file
-from pathlib import Path
+from tools.parse_cache import parse_cache, hash_bytes, cache_key
+from tools.converter_service import converter_service, DOCLING_BACKEND
+from tools.page_parallel import convert_segments, DOCLING_MIN_PAGES_PER_CHUNK
+from tools.page_classifier import (classify_pages, plan_segments, ingest_report, OCR_MIN_TEXT_CHARS,
+                                   OCR_IMAGE_COVERAGE, OCR_IMAGE_MAX_TEXT_CHARS)
+
+logger = logging.getLogger(__name__)
 
-from typing import Dict, Any, List
-import pymupdf as fitz
-import os
-from agentops.sdk.decorators import tool
+# Settings that change docling's output; part of the cache key.
+# The per-page OCR plan is derived from the PDF bytes + these, so it needn't be.
+# The worker count only decides how many page ranges run at once, not the
+# merged output, so it stays out: hosts with different CPU counts share parses.
+DOCLING_OPTIONS = {
+    "to": "json",
+    "backend": DOCLING_BACKEND,
+    "ocr": "selective",
+    "ocr_min_text_chars": OCR_MIN_TEXT_CHARS,
+    "ocr_image_coverage": OCR_IMAGE_COVERAGE,
+    "ocr_image_max_text_chars": OCR_IMAGE_MAX_TEXT_CHARS,
+    "min_pages_per_chunk": DOCLING_MIN_PAGES_PER_CHUNK,
+}
 
 
 class DoclingToolInput(BaseModel):
     pdf_file_name: str = Field(..., description="Path of the PDF file")
-    # output_dir: str = Field(..., description="The desired absolute directory path where the resulting JSON file should be saved.")
 
-# @tool("Docling")
+
 class DoclingTool(BaseTool):
     name: str = "Docling"
     description: str = "Tool used to parse input PDF file and convert it into a JSON file"
     args_schema: Type[BaseModel] = DoclingToolInput
 
+    @metrics.timed_tool
     def _run(self, pdf_file_name: str) -> str:
-        """Uses Docling to process a PDF file and convert it to a JSON file."""
+        """Uses Docling to process a PDF file and convert it to a JSON file.
+
+        Results are served from the content-addressed parse cache when the same
+        PDF bytes were already converted with the same docling version/options.
+        """
         try:
-            cmd = f"docling --to json --force-ocr {pdf_file_name}"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-
-            if result.returncode == 0:
-                # temp_json_file = os.path.splitext(pdf_file_name)[0] + ".json"
-
-                # 3. Calculate the final destination path
-                # final_json_file_name = Path(pdf_file_name).stem + ".json"
-                # final_json_path = Path(output_dir) / final_json_file_name
-                #
-                # # 4. Move the file to the final destination directory
-                # shutil.move(temp_json_file, final_json_path)
-                #
-                # print("Document processed successfully! Output moved to:", str(final_json_path))
-                # return str(final_json_path)
-
-                json_file = os.path.splitext(pdf_file_name)[0] + ".json"
-                print("Document processed successfully! Output saved to file:", json_file)
-                return json_file
-            else:
-                return f"Error processing document: {result.stderr}"
+            data = Path(pdf_file_name).read_bytes()
+            with metrics.stage("hash"):
+                key = cache_key(hash_bytes(data), DOCLING_OPTIONS)
+            cached = parse_cache.get(key)
+            if cached is not None:
+                logger.info("parse cache hit for %s: %s", pdf_file_name, cached)
+                return str(cached)
+
+            # OCR only the pages without a text layer; page ranges run in parallel.
+            pages = classify_pages(pdf_file_name)
+            segments = plan_segments(pages)
+            with metrics.stage("convert"):
+                if DOCLING_BACKEND == "inprocess":
+                    # Warm converters in this process / the ingest pool; no docling subprocess.
+                    doc, seconds = converter_service.convert(data, Path(pdf_file_name).name, segments)
+                    report = ingest_report(pages, segments, seconds)
+                    json_file = parse_cache.put_document(key, doc, report=report)
+                else:
+                    with tempfile.TemporaryDirectory() as output_dir:
+                        temp_json_file = Path(output_dir) / (Path(pdf_file_name).stem + ".json")
+                        seconds = convert_segments(pdf_file_name, temp_json_file, segments)
+                        report = ingest_report(pages, segments, seconds)
+                        json_file = parse_cache.put(key, temp_json_file, report=report)
+            page_seconds = metrics.histogram("docling_page_seconds", "Docling conversion time per page")
+            for page in report["pages"]:
+                if "convert_ms" in page:
+                    page_seconds.observe(page["convert_ms"] / 1000, ocr=str(page["needs_ocr"]).lower())
+            logger.info("converted %s (OCR: %s) to %s", pdf_file_name, report["ocr_strategy"], json_file)
+            return str(json_file)
+        except RuntimeError as e:
+            return str(e)
         except Exception as e:
             return f"Exception occurred: {str(e)}"
@@ -0,0 +1,32 @@
+from crewai.tools.base_tool import BaseTool
+
+from pydantic import BaseModel, Field
+from typing import Type
+
+import metrics
+
+from vector_index import retrieve, format_chunks, RETRIEVAL_TOP_K
+
+
+class DocumentSearchToolInput(BaseModel):
+    json_file_path: str = Field(..., description="Path of the DoclingDocument JSON file")
+    query: str = Field(..., description="What to look for, e.g. 'energy storage deployments Q2'")
+    top_k: int = Field(RETRIEVAL_TOP_K, description="Number of passages to return")
+
+
+class DocumentSearchTool(BaseTool):
+    name: str = "Document Search"
+    description: str = ("Semantic search over a parsed DoclingDocument JSON file. Returns only the most "
+                        "relevant text passages and table rows, with page numbers, instead of the whole file.")
+    args_schema: Type[BaseModel] = DocumentSearchToolInput
+
+    @metrics.timed_tool
+    def _run(self, json_file_path: str, query: str, top_k: int = RETRIEVAL_TOP_K) -> str:
+        """Top-k chunks from the local vector index (built on first use)."""
+        try:
+            results = retrieve(json_file_path.strip().strip('"'), query, top_k)
+        except Exception as e:
+            return f"Exception occurred: {str(e)}"
+        if not results:
+            return f"NO_MATCH: nothing relevant to '{query}' in {json_file_path}"
+        return format_chunks(results)
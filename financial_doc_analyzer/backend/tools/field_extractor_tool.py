@@ -0,0 +1,32 @@
+from crewai.tools.base_tool import BaseTool
+
+from pydantic import BaseModel, Field
+from typing import Type
+
+import metrics
+
+from extraction import extract_field_from_file, format_matches
+
+
+class FieldExtractorToolInput(BaseModel):
+    json_file_path: str = Field(..., description="Path of the DoclingDocument JSON file")
+    input_field: str = Field(..., description="Row or column label to extract, e.g. 'Total gross profit'")
+
+
+class FieldExtractorTool(BaseTool):
+    name: str = "Field Extractor"
+    description: str = ("Deterministically finds a financial field in a DoclingDocument JSON file and "
+                        "returns every period/value pair of the matching table row or text. "
+                        "Returns NO_MATCH when the field is not found.")
+    args_schema: Type[BaseModel] = FieldExtractorToolInput
+
+    @metrics.timed_tool
+    def _run(self, json_file_path: str, input_field: str) -> str:
+        """Table/text header matching over the parsed document; no LLM involved."""
+        try:
+            matches = extract_field_from_file(json_file_path.strip().strip('"'), input_field)
+        except Exception as e:
+            return f"Exception occurred: {str(e)}"
+        if not matches:
+            return f"NO_MATCH: '{input_field}' was not found in {json_file_path}"
+        return format_matches(matches)
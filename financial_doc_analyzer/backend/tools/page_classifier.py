@@ -0,0 +1,102 @@
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import List, NamedTuple
+
+import pymupdf as fitz
+
+from tools.page_parallel import page_ranges, DOCLING_INGEST_WORKERS
+
+
+# ---------------------------------------------------------------------------
+# Pre-flight page classification: only pages without a usable text layer
+# (scans, image-only slides) are sent through OCR.
+# ---------------------------------------------------------------------------
+
+OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", 50))
+# Image-heavy pages (slides, scanned exhibits with a typed title) carry a short
+# text layer that passes the check above but holds little of the content.
+OCR_IMAGE_COVERAGE = float(os.getenv("OCR_IMAGE_COVERAGE", 0.5))
+OCR_IMAGE_MAX_TEXT_CHARS = int(os.getenv("OCR_IMAGE_MAX_TEXT_CHARS", 300))
+
+
+@dataclass
+class PageInfo:
+    page_no: int            # 1-based, like docling's prov.page_no
+    text_chars: int
+    image_coverage: float   # fraction of the page area covered by images
+    needs_ocr: bool
+    classify_ms: float
+
+
+class Segment(NamedTuple):
+    start: int              # 0-based, inclusive
+    end: int                # exclusive
+    force_ocr: bool
+
+
+def _image_coverage(page) -> float:
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    for image in page.get_images(full=True):
+        for rect in page.get_image_rects(image[0]):
+            covered += abs(rect & page.rect)
+    return min(covered / page_area, 1.0)
+
+
+def needs_ocr(text_chars: int, image_coverage: float) -> bool:
+    """No usable text layer, or mostly image with only a little text on top."""
+    return text_chars < OCR_MIN_TEXT_CHARS or (image_coverage >= OCR_IMAGE_COVERAGE
+                                              and text_chars < OCR_IMAGE_MAX_TEXT_CHARS)
+
+
+def classify_pages(pdf_path) -> List[PageInfo]:
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            start = time.perf_counter()
+            text_chars = len(page.get_text("text").strip())
+            coverage = _image_coverage(page)
+            pages.append(PageInfo(
+                page_no=page.number + 1,
+                text_chars=text_chars,
+                image_coverage=round(coverage, 3),
+                needs_ocr=needs_ocr(text_chars, coverage),
+                classify_ms=round((time.perf_counter() - start) * 1000, 3),
+            ))
+    return pages
+
+
+def ocr_strategy(pages: List[PageInfo]) -> str:
+    needs = sum(page.needs_ocr for page in pages)
+    if needs == 0:
+        return "none"
+    return "full" if needs == len(pages) else "selective"
+
+
+def plan_segments(pages: List[PageInfo], workers: int = DOCLING_INGEST_WORKERS) -> List[Segment]:
+    """Page-parallel ranges, further split wherever the OCR decision changes."""
+    segments = []
+    for start, end in page_ranges(len(pages), workers):
+        seg_start = start
+        for i in range(start + 1, end + 1):
+            if i == end or pages[i].needs_ocr != pages[seg_start].needs_ocr:
+                segments.append(Segment(seg_start, i, pages[seg_start].needs_ocr))
+                seg_start = i
+    return segments
+
+
+def ingest_report(pages: List[PageInfo], segments: List[Segment], segment_seconds: List[float]) -> dict:
+    """Chosen strategy plus per-page classification/conversion timings."""
+    page_rows = [asdict(page) for page in pages]
+    for segment, seconds in zip(segments, segment_seconds):
+        per_page_ms = seconds * 1000 / max(segment.end - segment.start, 1)
+        for row in page_rows[segment.start:segment.end]:
+            row["convert_ms"] = round(per_page_ms, 1)  # range time amortized over its pages
+    return {
+        "ocr_strategy": ocr_strategy(pages),
+        "ocr_pages": [page.page_no for page in pages if page.needs_ocr],
+        "segments": [{"pages": [s.start + 1, s.end], "force_ocr": s.force_ocr, "seconds": round(t, 3)}
+                     for s, t in zip(segments, segment_seconds)],
+        "pages": page_rows,
+    }
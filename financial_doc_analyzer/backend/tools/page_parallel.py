@@ -0,0 +1,153 @@
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import pymupdf as fitz
+
+from tools.docling_convert import run_docling_cli
+
+
+# ---------------------------------------------------------------------------
+# Page-parallel ingestion: split the PDF into page ranges, convert each range
+# in its own process, then merge the partial DoclingDocuments back into one.
+# ---------------------------------------------------------------------------
+
+# Every analysis worker (ANALYSIS_WORKERS, see jobs.py) runs its own ingest
+# pool, and every ingest process loads its own docling models, so the CPUs are
+# split between the analysis workers rather than handed to each of them.
+_ANALYSIS_WORKERS = max(1, int(os.getenv("ANALYSIS_WORKERS", 2)))
+DOCLING_INGEST_WORKERS = int(os.getenv("DOCLING_INGEST_WORKERS", max(1, (os.cpu_count() or 1) // _ANALYSIS_WORKERS)))
+DOCLING_MIN_PAGES_PER_CHUNK = int(os.getenv("DOCLING_MIN_PAGES_PER_CHUNK", 2))
+
+ITEM_SECTIONS = ("texts", "tables", "groups", "pictures", "key_value_items", "form_items")
+_REF = re.compile(r"^#/(\w+)/(\d+)$")
+
+
+def page_ranges(pages: int, workers: int = DOCLING_INGEST_WORKERS,
+                min_pages: int = DOCLING_MIN_PAGES_PER_CHUNK) -> List[Tuple[int, int]]:
+    """Split [0, pages) into at most `workers` contiguous ranges of at least `min_pages`."""
+    if pages <= 0:
+        return []
+    chunks = max(1, min(workers, pages // max(min_pages, 1)))
+    size, extra = divmod(pages, chunks)
+    ranges, start = [], 0
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def split_pdf(pdf_path, ranges, output_dir) -> List[Path]:
+    parts = []
+    with fitz.open(pdf_path) as src:
+        for start, end, *_ in ranges:
+            part_path = Path(output_dir) / f"{Path(pdf_path).stem}.p{start + 1:04d}-{end:04d}.pdf"
+            with fitz.open() as part:
+                part.insert_pdf(src, from_page=start, to_page=end - 1)
+                part.save(part_path)
+            parts.append(part_path)
+    return parts
+
+
+def _convert_part(part_path: str, force_ocr: bool) -> Tuple[dict, float]:
+    """Runs in a pool process: convert one page range, return (DoclingDocument dict, seconds)."""
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        json_file = run_docling_cli(part_path, output_dir, force_ocr=force_ocr)
+        with open(json_file) as f:
+            return json.load(f), time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# MERGE
+# ---------------------------------------------------------------------------
+def _shift(node, offsets: dict, page_offset: int):
+    """Copy of node with every '#/<section>/<n>' ref and page_no shifted into the merged document."""
+    if isinstance(node, dict):
+        out = {}
+        for key, value in node.items():
+            if key in ("$ref", "self_ref") and isinstance(value, str):
+                match = _REF.match(value)
+                if match and match.group(1) in offsets:
+                    value = f"#/{match.group(1)}/{int(match.group(2)) + offsets[match.group(1)]}"
+                out[key] = value
+            elif key == "page_no" and isinstance(value, int):
+                out[key] = value + page_offset
+            else:
+                out[key] = _shift(value, offsets, page_offset)
+        return out
+    if isinstance(node, list):
+        return [_shift(value, offsets, page_offset) for value in node]
+    return node
+
+
+def merge_documents(parts: List[Tuple[int, dict]], name: str = None) -> dict:
+    """
+    Merge partial DoclingDocuments converted from page ranges.
+
+    parts: (page_offset, document) in page order, where page_offset is the
+    number of pages before the range. Item refs are renumbered so each
+    section stays one contiguous array, and page numbers become absolute.
+    """
+    first = parts[0][1]
+    merged = {key: value for key, value in first.items()
+              if key not in ITEM_SECTIONS and key not in ("body", "furniture", "pages")}
+    if name:
+        merged["name"] = name
+    merged["body"] = {**first.get("body", {}), "children": []}
+    merged["furniture"] = {**first.get("furniture", {}), "children": []}
+    merged["pages"] = {}
+    for section in ITEM_SECTIONS:
+        merged[section] = []
+
+    for page_offset, doc in parts:
+        offsets = {section: len(merged[section]) for section in ITEM_SECTIONS}
+        for section in ITEM_SECTIONS:
+            merged[section].extend(_shift(doc.get(section) or [], offsets, page_offset))
+        for root in ("body", "furniture"):
+            merged[root]["children"].extend(
+                _shift((doc.get(root) or {}).get("children") or [], offsets, page_offset))
+        for page in (doc.get("pages") or {}).values():
+            page = _shift(page, offsets, page_offset)
+            merged["pages"][str(page["page_no"])] = page
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# ENTRY POINT
+# ---------------------------------------------------------------------------
+def convert_segments(pdf_path, output_json, segments, workers: int = DOCLING_INGEST_WORKERS) -> List[float]:
+    """
+    Convert (start, end, force_ocr) page segments, in parallel when there are
+    several, and write the merged JSON. Returns the conversion seconds per segment.
+    """
+    if not segments:
+        raise RuntimeError(f"No pages to convert in {pdf_path}")
+    if len(segments) == 1:
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as output_dir:
+            json_file = run_docling_cli(pdf_path, output_dir, force_ocr=segments[0][2])
+            shutil.move(str(json_file), output_json)
+        return [time.perf_counter() - start]
+
+    with tempfile.TemporaryDirectory() as split_dir:
+        part_paths = split_pdf(pdf_path, segments, split_dir)
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(part_paths))),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_convert_part, map(str, part_paths), [s[2] for s in segments]))
+
+    merged = merge_documents([(segment[0], doc) for segment, (doc, _) in zip(segments, results)],
+                             name=Path(pdf_path).stem)
+    if "origin" in merged:
+        merged["origin"] = {**merged["origin"], "filename": Path(pdf_path).name}
+    with open(output_json, "w") as f:
+        json.dump(merged, f)
+    return [seconds for _, seconds in results]
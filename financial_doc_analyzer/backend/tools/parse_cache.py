@@ -0,0 +1,183 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from importlib import metadata
+from pathlib import Path
+from typing import Optional
+
+import metrics
+
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+BASE_DIR = Path(__file__).resolve().parent.parent
+PARSE_CACHE_DIR = Path(os.getenv("PARSE_CACHE_DIR", BASE_DIR / "parse_cache"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", 2 * 1024 ** 3))  # 2 GiB
+
+STATS_FILE = "stats.json"
+STATS_LOCK_FILE = "stats.lock"
+
+
+def docling_version() -> str:
+    try:
+        return metadata.version("docling")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_key(content_hash: str, options: dict) -> str:
+    """Content hash + docling version + conversion options -> cache key."""
+    material = json.dumps(
+        {"sha256": content_hash, "docling": docling_version(), "options": options},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of DoclingDocument JSON keyed by PDF content hash.
+
+    Each entry lives in <root>/<key[:2]>/<key>.json. The file mtime is bumped on
+    every hit, so eviction (oldest mtime first) is LRU and survives restarts.
+    """
+
+    def __init__(self, root: Path = PARSE_CACHE_DIR, max_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------------------
+    # LOOKUP / STORE
+    # --------------------------------------------------------------------
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    @staticmethod
+    def report_path(json_path) -> Path:
+        """Sidecar holding the ingestion report (OCR strategy, per-page timings)."""
+        return Path(json_path).with_suffix(".ingest.json")
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path_for(key)
+        with self._lock:
+            if path.exists():
+                os.utime(path, None)  # mark as most recently used
+                self._record("hits")
+                return path
+            self._record("misses")
+            return None
+
+    def put(self, key: str, json_file, report: Optional[dict] = None) -> Path:
+        """Move a freshly converted JSON file into the cache and return its cached path."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if report is not None:
+            tmp_path = self._temp_path(path)
+            tmp_path.write_text(json.dumps(report))
+            os.replace(tmp_path, self.report_path(path))
+        tmp_path = self._temp_path(path)
+        shutil.move(str(json_file), tmp_path)
+        os.replace(tmp_path, path)  # atomic, so readers never see a half-written entry
+        with self._lock:
+            self._record("stores")
+            self._evict()
+        return path
+
+    def put_document(self, key: str, doc: dict, report: Optional[dict] = None) -> Path:
+        """Store an in-memory DoclingDocument dict (in-process converter output)."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._temp_path(path)
+        with open(tmp_path, "w") as f:
+            json.dump(doc, f)
+        return self.put(key, tmp_path, report=report)
+
+    @staticmethod
+    def _temp_path(path: Path) -> Path:
+        """A temp file of our own next to `path`: workers converting the same PDF at
+        the same time each stage their own file, and the last os.replace wins."""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp")
+        os.close(fd)
+        return Path(tmp_path)
+
+    # --------------------------------------------------------------------
+    # EVICTION
+    # --------------------------------------------------------------------
+    def _entries(self):
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            if "." in path.stem:
+                continue  # sidecar (<key>.ingest.json), evicted with its entry
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self.report_path(path).unlink(missing_ok=True)
+            shutil.rmtree(path.with_suffix(".index"), ignore_errors=True)  # see doc_index.py
+            shutil.rmtree(path.with_suffix(".vectors"), ignore_errors=True)  # see vector_index.py
+            total -= size
+            self._record("evictions")
+
+    # --------------------------------------------------------------------
+    # STATS
+    # --------------------------------------------------------------------
+    # Every worker process has its own ParseCache, so counters are kept in
+    # stats.json only and updated read-modify-write under an flock; an
+    # in-memory copy per process would overwrite the other workers' counts.
+    def _load_stats(self) -> dict:
+        stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        try:
+            stats.update(json.loads((self.root / STATS_FILE).read_text()))
+        except (FileNotFoundError, ValueError):
+            pass
+        return stats
+
+    def _record(self, counter: str):
+        with open(self.root / STATS_LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            stats = self._load_stats()
+            stats[counter] += 1
+            stats["updated_at"] = time.time()
+            tmp_path = self.root / f"{STATS_FILE}.{os.getpid()}.tmp"
+            tmp_path.write_text(json.dumps(stats))
+            os.replace(tmp_path, self.root / STATS_FILE)
+        if counter in ("hits", "misses"):
+            metrics.cache_lookup("parse", counter == "hits")
+
+    def stats(self) -> dict:
+        stats = self._load_stats()
+        entries = self._entries()
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "docling_version": docling_version(),
+        }
+
+
+parse_cache = ParseCache()
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+
+
+# ---------------------------------------------------------------------------
+# Streaming, content-addressed upload storage.
+#
+# The upload is read in chunks, hashed on the fly and written to a temp file
+# in the same directory tree, then atomically renamed to <sha[:2]>/<sha>.<ext>.
+# Same-named files from different users can't clobber each other, and the
+# bytes are never held in memory or re-read for hashing.
+# ---------------------------------------------------------------------------
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))  # 100 MiB
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    path: Path
+    sha256: str
+    size: int
+    already_stored: bool
+
+
+async def store_upload(file: UploadFile, upload_dir: Path, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredUpload:
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"{file.filename} is larger than {max_bytes} bytes")
+
+    tmp_dir = upload_dir / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+    tmp_path = Path(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+    hash_seconds = 0.0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"{file.filename} is larger than {max_bytes} bytes")
+                hash_started = time.perf_counter()
+                digest.update(chunk)
+                hash_seconds += time.perf_counter() - hash_started
+                await run_in_threadpool(out.write, chunk)
+
+        sha256 = digest.hexdigest()
+        suffix = Path(file.filename or "").suffix.lower() or ".pdf"
+        final_path = upload_dir / sha256[:2] / f"{sha256}{suffix}"
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        already_stored = final_path.exists()
+        if already_stored:
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    metrics.observe_stage("upload", time.perf_counter() - started)
+    metrics.observe_stage("upload_hash", hash_seconds)
+    metrics.counter("upload_bytes_total", "Bytes received in uploads").inc(size)
+    metrics.cache_lookup("upload", already_stored)
+    return StoredUpload(filename=file.filename, path=final_path, sha256=sha256,
+                        size=size, already_stored=already_stored)
@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import get_embedder, EMBEDDING_MODEL
+from extraction import table_grid, header_row_count, label_column_count, column_headers, item_page
+
+
+# ---------------------------------------------------------------------------
+# Local vector retrieval over a DoclingDocument.
+#
+# Body texts are grouped into chunks under their section header; tables are
+# rendered row by row ("label | period: value; ...") and split into blocks of
+# rows with the column headers repeated. Chunks are embedded with
+# embeddings.get_embedder() and persisted next to the JSON as <stem>.vectors/:
+#   vectors.npy   float32 (n_chunks x dim), L2-normalized, memory-mapped on load
+#   chunks.json   one record per chunk (refs, page, heading, text)
+#   meta.json     embedder name and dimension; a different model rebuilds
+# Search is one matrix-vector product plus a partial sort.
+# ---------------------------------------------------------------------------
+
+VECTORS_SUFFIX = ".vectors"
+CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", 1000))
+TABLE_ROWS_PER_CHUNK = int(os.getenv("RETRIEVAL_TABLE_ROWS_PER_CHUNK", 20))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 6))
+
+_SKIP_LABELS = {"page_header", "page_footer"}
+_HEADING_LABELS = {"section_header", "title"}
+
+
+def vectors_path_for(json_path) -> Path:
+    return Path(json_path).with_suffix(VECTORS_SUFFIX)
+
+
+# ---------------------------------------------------------------------------
+# CHUNKING
+# ---------------------------------------------------------------------------
+def _text_chunks(doc: dict) -> List[dict]:
+    chunks = []
+    heading, parts, refs, page = "", [], [], None
+
+    def flush():
+        if parts:
+            chunks.append({"kind": "text", "refs": list(refs), "page": page,
+                           "heading": heading, "text": "\n".join(parts)})
+        parts.clear()
+        refs.clear()
+
+    for item in doc.get("texts") or []:
+        text = (item.get("text") or "").strip()
+        if not text or item.get("content_layer") == "furniture" or item.get("label") in _SKIP_LABELS:
+            continue
+        if item.get("label") in _HEADING_LABELS:
+            flush()
+            heading = text
+            continue
+        if parts and sum(len(p) for p in parts) + len(text) > CHUNK_CHARS:
+            flush()
+        if not parts:
+            page = item_page(item)
+        parts.append(text)
+        refs.append(item.get("self_ref", ""))
+    flush()
+    return chunks
+
+
+def _table_chunks(doc: dict) -> List[dict]:
+    chunks = []
+    for table in doc.get("tables") or []:
+        grid = table_grid(table)
+        if not grid:
+            continue
+        header_rows = header_row_count(grid)
+        label_cols = label_column_count(grid, header_rows)
+        headers = column_headers(grid, header_rows)
+        lines = []
+        for row in grid[header_rows:]:
+            label = " ".join(dict.fromkeys(c["text"].strip() for c in row[:label_cols] if c["text"].strip()))
+            cells = [f"{headers[c]}: {cell['text'].strip()}" if headers[c] else cell["text"].strip()
+                     for c, cell in enumerate(row) if c >= label_cols and cell["text"].strip()]
+            if label or cells:
+                lines.append(f"{label} | {'; '.join(cells)}")
+        header_line = " | ".join(h for h in headers[label_cols:] if h)
+        for start in range(0, len(lines), TABLE_ROWS_PER_CHUNK):
+            chunks.append({"kind": "table", "refs": [table.get("self_ref", "")], "page": item_page(table),
+                           "heading": header_line, "text": "\n".join(lines[start:start + TABLE_ROWS_PER_CHUNK])})
+    return chunks
+
+
+def chunk_document(doc: dict) -> List[dict]:
+    chunks = _text_chunks(doc) + _table_chunks(doc)
+    for i, chunk in enumerate(chunks):
+        chunk["id"] = i
+    return chunks
+
+
+def _embedding_text(chunk: dict) -> str:
+    return f"{chunk['heading']}\n{chunk['text']}" if chunk["heading"] else chunk["text"]
+
+
+# ---------------------------------------------------------------------------
+# BUILD
+# ---------------------------------------------------------------------------
+def build_vectors(doc: dict, vectors_dir, model_name: str = EMBEDDING_MODEL) -> Path:
+    """Chunk, embed and persist a parsed document."""
+    vectors_dir = Path(vectors_dir)
+    embedder = get_embedder(model_name)
+    chunks = chunk_document(doc)
+    vectors = (embedder.encode([_embedding_text(c) for c in chunks]) if chunks
+               else np.zeros((0, embedder.dim), dtype=np.float32))
+
+    # Same temp-dir swap as doc_index.build_index.
+    tmp_dir = vectors_dir.with_name(f"{vectors_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / "vectors.npy", vectors)
+    (tmp_dir / "chunks.json").write_text(json.dumps(chunks))
+    (tmp_dir / "meta.json").write_text(json.dumps({"model": embedder.name, "dim": int(vectors.shape[1])}))
+    shutil.rmtree(vectors_dir, ignore_errors=True)
+    os.replace(tmp_dir, vectors_dir)
+    return vectors_dir
+
+
+def build_vectors_for(json_path, model_name: str = EMBEDDING_MODEL) -> Path:
+    from extraction import load_document
+    return build_vectors(load_document(json_path), vectors_path_for(json_path), model_name)
+
+
+# ---------------------------------------------------------------------------
+# QUERY
+# ---------------------------------------------------------------------------
+class VectorIndex:
+    def __init__(self, vectors_dir):
+        self.vectors_dir = Path(vectors_dir)
+        self.meta = json.loads((self.vectors_dir / "meta.json").read_text())
+        self.vectors = np.load(self.vectors_dir / "vectors.npy", mmap_mode="r")
+        self.chunks = json.loads((self.vectors_dir / "chunks.json").read_text())
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[float, dict]]:
+        """Top-k chunks by cosine similarity, best first."""
+        if not len(self.chunks):
+            return []
+        embedder = get_embedder(self.meta["model"])  # the model the chunks were embedded with
+        scores = self.vectors @ embedder.encode([query])[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.chunks[i]) for i in top]
+
+
+@lru_cache(maxsize=256)
+def _open_vectors(vectors_dir: str, mtime: float) -> VectorIndex:
+    return VectorIndex(vectors_dir)
+
+
+def get_vector_index(json_path) -> VectorIndex:
+    """Open the vector index for a parsed document, (re)building it when missing or from another model."""
+    vectors_dir = vectors_path_for(json_path)
+    meta_path = vectors_dir / "meta.json"
+    if not meta_path.exists() or json.loads(meta_path.read_text())["model"] != get_embedder().name:
+        build_vectors_for(json_path)
+    return _open_vectors(str(vectors_dir), meta_path.stat().st_mtime)
+
+
+def retrieve(json_path, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[float, dict]]:
+    return get_vector_index(json_path).search(query, k)
+
+
+def format_chunks(results: List[Tuple[float, dict]], max_chars: Optional[int] = None) -> str:
+    """Retrieved chunks as a prompt block, each tagged with its page and source refs."""
+    blocks = []
+    for score, chunk in results:
+        header = f"[page {chunk['page']} | {', '.join(chunk['refs'][:3])} | score {score:.2f}]"
+        if chunk["heading"]:
+            header += f" {chunk['heading']}"
+        blocks.append(f"{header}\n{chunk['text']}")
+    text = "\n\n".join(blocks)
+    return text[:max_chars] if max_chars else text
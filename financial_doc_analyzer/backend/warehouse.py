@@ -0,0 +1,264 @@
+import re
+import math
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from extraction import normalize
+from models import Documents, MetricFact
+from periods import as_period_key, period_key, period_months, period_range
+from tables import UNITS, CompactTable, compact_tables
+
+
+# ---------------------------------------------------------------------------
+# Cross-filing metrics warehouse.
+#
+# Every numeric cell of every parsed table whose column header is a period
+# (Q2-2025, FY 2024, 1H25, ...) becomes one MetricFact row: company, metric
+# (normalized row label), period, value, unit and the table's self_ref/page
+# as provenance. Rows are written when a document reaches PARSED and are
+# keyed by composite indexes on (owner, metric, company, period) and
+# (owner, company, period), so time series and cross-company comparisons are
+# index range scans instead of agent runs over every filing.
+#
+#     python warehouse.py            # backfill documents parsed before the warehouse existed
+#     python warehouse.py --reindex  # rebuild facts for every parsed document
+# ---------------------------------------------------------------------------
+
+_COMPANY_TOKEN = re.compile(r"[A-Za-z][A-Za-z0-9&.]*")
+
+
+def company_from_filename(filename: str) -> Optional[str]:
+    """'TSLA-Q2-2025-Update.pdf' → 'TSLA'; the upload can pass the company explicitly instead."""
+    match = _COMPANY_TOKEN.match(Path(filename or "").stem)
+    return match.group(0).upper() if match else None
+
+
+def document_company(document: Documents) -> Optional[str]:
+    company = document.company or company_from_filename(document.filename)
+    return company.upper() if company else None
+
+
+# ---------------------------------------------------------------------------
+# INDEXING
+# ---------------------------------------------------------------------------
+def facts_from_tables(tables: Iterable[CompactTable]) -> List[dict]:
+    """MetricFact rows (without owner/document/company) for every period cell.
+
+    A metric repeated for the same period in a later table (a summary table
+    followed by its detail) keeps the first occurrence, in reading order.
+    """
+    facts, seen = [], set()
+    for table in tables:
+        periods = [(j, label, period_key(label)) for j, label in enumerate(table.column_labels)]
+        periods = [(j, label, key, period_range(key)[1], period_months(key))
+                   for j, label, key in periods if key is not None]
+        if not periods:
+            continue
+        values = table.values.tolist()
+        for i, row_label in enumerate(table.row_labels):
+            metric = normalize(row_label)
+            if not metric:
+                continue
+            for j, label, key, end, months in periods:
+                value = values[i][j]
+                if math.isnan(value) or (metric, key) in seen:
+                    continue
+                seen.add((metric, key))
+                facts.append({
+                    "metric": metric,
+                    "label": row_label,
+                    "period": label,
+                    "period_key": key,
+                    "period_end": end,
+                    "period_months": months,
+                    "value": value,
+                    "unit": UNITS[table.unit_codes[i, j]],
+                    "source_ref": table.ref,
+                    "page": table.page,
+                })
+    return facts
+
+
+def index_document(db: Session, document: Documents) -> int:
+    """Replace the document's facts with those of its current parse; returns the fact count."""
+    db.execute(delete(MetricFact).where(MetricFact.document_id == document.id))
+    facts = []
+    if document.json_path and Path(document.json_path).exists():
+        company = document_company(document)
+        facts = [{**fact, "document_id": document.id, "owner_id": document.owner_id, "company": company}
+                 for fact in facts_from_tables(compact_tables(document.json_path))]
+    if facts:
+        db.execute(insert(MetricFact), facts)
+    db.commit()
+    return len(facts)
+
+
+def index_document_id(document_id: int) -> int:
+    """index_document() with its own session, for job workers."""
+    db = SessionLocal()
+    try:
+        document = db.get(Documents, document_id)
+        return 0 if document is None else index_document(db, document)
+    finally:
+        db.close()
+
+
+def set_company(db: Session, document: Documents, company: str) -> int:
+    """Rename the document's company, in the registry and its facts; returns the facts updated."""
+    document.company = company = company.upper()
+    updated = (db.query(MetricFact).filter(MetricFact.document_id == document.id)
+               .update({MetricFact.company: company}, synchronize_session=False))
+    db.commit()
+    db.refresh(document)  # reloaded here, not lazily by whoever reads it next (maybe the event loop)
+    return updated
+
+
+def backfill(reindex: bool = False) -> Dict[int, int]:
+    """Index parsed documents that have no facts yet (all of them with reindex=True)."""
+    import documents
+
+    db = SessionLocal()
+    try:
+        indexed = {document_id for (document_id,) in db.query(MetricFact.document_id).distinct()}
+        counts = {}
+        for document in db.query(Documents).filter(Documents.parse_status == documents.PARSED).all():
+            if documents.is_parsed(document) and (reindex or document.id not in indexed):
+                counts[document.id] = index_document(db, document)
+        return counts
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# QUERIES
+# ---------------------------------------------------------------------------
+def resolve_metric(db: Session, owner_id: int, metric: str) -> Optional[str]:
+    """The stored metric key for a user-typed name: exact after normalize(), else the
+    shortest stored key containing it ('gross profit' → 'total gross profit')."""
+    target = normalize(metric)
+    if not target:
+        return None
+    facts = db.query(MetricFact.metric).filter(MetricFact.owner_id == owner_id)
+    if facts.filter(MetricFact.metric == target).first() is not None:
+        return target
+    match = (facts.filter(MetricFact.metric.contains(target, autoescape=True))
+             .order_by(func.length(MetricFact.metric), MetricFact.metric).first())
+    return match[0] if match else None
+
+
+def _point(fact: MetricFact) -> dict:
+    return {
+        "period": fact.period_key,
+        "period_label": fact.period,
+        "value": fact.value,
+        "unit": fact.unit,
+        "document_id": fact.document_id,
+        "source_ref": fact.source_ref,
+        "page": fact.page,
+    }
+
+
+def _chronological(fact: MetricFact) -> tuple:
+    """Order of periods: by end date, then the shorter span (date, quarter, half, year)."""
+    return fact.period_end or date.min, fact.period_months or 0
+
+
+def _latest_per_period(facts: Sequence[MetricFact]) -> Dict[tuple, MetricFact]:
+    """One fact per (company, period); a later filing's (restated) value wins."""
+    latest = {}
+    for fact in facts:
+        key = (fact.company, fact.period_key)
+        if key not in latest or fact.document_id > latest[key].document_id:
+            latest[key] = fact
+    return latest
+
+
+def _period_bounds(period: str) -> tuple:
+    bounds = period_range(as_period_key(period))
+    if bounds is None:
+        raise ValueError(f"not a period: {period!r}")
+    return bounds
+
+
+def timeseries(db: Session, owner_id: int, metric: str, company: str = None,
+               start: str = None, end: str = None) -> dict:
+    """{company: [points in chronological order]} for one metric across all the owner's filings.
+
+    `start`/`end` are periods ('Q1-2024', '2024-FY', '2025-06-30'); a point is kept when its
+    period ends within [first day of start, last day of end]. ValueError for anything else.
+    """
+    key = resolve_metric(db, owner_id, metric)
+    series: Dict[str, List[dict]] = {}
+    if key is not None:
+        query = db.query(MetricFact).filter(MetricFact.owner_id == owner_id, MetricFact.metric == key)
+        if company:
+            query = query.filter(MetricFact.company == company.upper())
+        if start:
+            query = query.filter(MetricFact.period_end >= _period_bounds(start)[0])
+        if end:
+            query = query.filter(MetricFact.period_end <= _period_bounds(end)[1])
+        for fact in sorted(_latest_per_period(query.all()).values(),
+                           key=lambda fact: (str(fact.company), *_chronological(fact))):
+            series.setdefault(fact.company, []).append(_point(fact))
+    return {"metric": key, "series": series}
+
+
+def compare(db: Session, owner_id: int, metric: str, companies: Sequence[str] = (),
+            period: str = None) -> dict:
+    """One value per company for `period` (a header like 'Q2-2025', or its key), or each
+    company's latest period when no period is given."""
+    key = resolve_metric(db, owner_id, metric)
+    wanted = (as_period_key(period) or period) if period else None
+    rows: Dict[str, Optional[dict]] = {company.upper(): None for company in companies}
+    if key is not None:
+        query = db.query(MetricFact).filter(MetricFact.owner_id == owner_id, MetricFact.metric == key)
+        if rows:
+            query = query.filter(MetricFact.company.in_(list(rows)))
+        if wanted:
+            query = query.filter(MetricFact.period_key == wanted)
+        for fact in sorted(_latest_per_period(query.all()).values(), key=_chronological):
+            rows[fact.company] = _point(fact)  # in period order, so the latest one stays
+    return {"metric": key, "period": wanted, "companies": rows}
+
+
+def list_metrics(db: Session, owner_id: int, q: str = None, company: str = None,
+                 limit: int = 100) -> List[dict]:
+    """Metrics in the owner's warehouse with how many companies/periods/facts each has."""
+    def scoped(query):
+        query = query.filter(MetricFact.owner_id == owner_id)
+        if q:
+            query = query.filter(MetricFact.metric.contains(normalize(q), autoescape=True))
+        if company:
+            query = query.filter(MetricFact.company == company.upper())
+        return query
+
+    rows = (scoped(db.query(MetricFact.metric, func.min(MetricFact.label),
+                            func.count(func.distinct(MetricFact.company)),
+                            func.count(func.distinct(MetricFact.period_key)),
+                            func.count(MetricFact.id)))
+            .group_by(MetricFact.metric)
+            .order_by(func.count(MetricFact.id).desc(), MetricFact.metric).limit(limit).all())
+    # First/last period in chronological order; min()/max() of the keys would compare strings.
+    spans: Dict[str, list] = {}
+    periods = (scoped(db.query(MetricFact.metric, MetricFact.period_key, MetricFact.period_end,
+                               MetricFact.period_months))
+               .filter(MetricFact.metric.in_([row[0] for row in rows])).distinct())
+    for metric, key, end, months in periods:
+        order = (end or date.min, months or 0)
+        span = spans.setdefault(metric, [(order, key), (order, key)])
+        span[0], span[1] = min(span[0], (order, key)), max(span[1], (order, key))
+    return [{"metric": metric, "label": label, "companies": companies, "periods": period_count,
+             "first_period": spans[metric][0][1], "last_period": spans[metric][1][1], "facts": facts}
+            for metric, label, companies, period_count, facts in rows]
+
+
+if __name__ == "__main__":
+    import sys
+
+    counts = backfill(reindex="--reindex" in sys.argv)
+    print(f"indexed {len(counts)} documents, {sum(counts.values())} facts")
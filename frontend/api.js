@@ -50,6 +50,35 @@ export const analyzeDocument = (docId) => API.post(`/analyze/${docId}`);
 export const getResults = (docId) => API.get(`/results/${docId}`);
 
 
+// Analysis jobs (upload-and-analyze enqueues, then poll these)
+export const getJob = (jobId) => API.get(`/analysis/jobs/${jobId}`);
+export const getJobResult = (jobId) => API.get(`/analysis/jobs/${jobId}/result`);
+
+// Live progress (server-sent events). EventSource can't send the Bearer
+// header, so the stream is read with fetch; resolves when the job ends.
+export async function streamJobEvents(jobId, onEvent) {
+  const res = await fetch(`${API.defaults.baseURL}/analysis/jobs/${jobId}/events`, {
+    headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+  });
+  if (!res.ok) throw new Error(`event stream failed: ${res.status}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) return;
+    buffer += decoder.decode(value, { stream: true });
+    const blocks = buffer.split("\n\n");
+    buffer = blocks.pop();
+    for (const block of blocks) {
+      const data = block.split("\n").find((line) => line.startsWith("data: "));
+      if (data) onEvent(JSON.parse(data.slice(6)));
+    }
+  }
+}
+
+
 // ----------------------------------------------------
 // 4. DIRECT QUERY ENDPOINT
 // ----------------------------------------------------
@@ -65,6 +94,8 @@ export const queryPDF = (data) => {
   return API.post("/query", data);
 };
 
+export default API;
+
 // ----------------------------------------------------
 // 5. OLD/UNUSED FUNCTIONS (Removed for cleanliness)
 // ----------------------------------------------------
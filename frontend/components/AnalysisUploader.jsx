@@ -1,5 +1,41 @@
 import React, { useState } from "react";
-import api from "../api";
+import api, { getJobResult, streamJobEvents } from "../api";
+
+const POLL_INTERVAL_MS = 2000;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Poll the job result endpoint until the crew finishes (202 = still pending)
+async function waitForResult(jobId) {
+  while (true) {
+    const res = await getJobResult(jobId);
+    if (res.status !== 202) return res.data;
+    await sleep(POLL_INTERVAL_MS);
+  }
+}
+
+// One line per progress event for the log under the form
+function describeEvent(event) {
+  switch (event.type) {
+    case "job_started":
+      return "Job started";
+    case "task_started":
+      return `▶ ${event.task}`;
+    case "task_completed":
+      return `✔ ${event.task}`;
+    case "step":
+      return event.kind === "tool_call" ? `  ↳ ${event.tool}` : "  ↳ agent answered";
+    case "extraction":
+      return `Extraction: ${event.matches} match(es), ${event.mode}`;
+    case "token_usage":
+      return `Tokens: ${event.total_tokens}`;
+    case "job_failed":
+      return `✖ ${event.error}`;
+    case "job_finished":
+      return "Done";
+    default:
+      return event.type;
+  }
+}
 
 export default function AnalysisUploader() {
   const [file, setFile] = useState(null);
@@ -8,6 +44,7 @@ export default function AnalysisUploader() {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState("");
   const [agentOpsLink, setAgentOpsLink] = useState("");
+  const [progress, setProgress] = useState([]);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -23,14 +60,34 @@ export default function AnalysisUploader() {
     formData.append("user_query", query);
 
     setLoading(true);
+    setProgress([]);
+    setResult("");
 
     try {
       const res = await api.post("/analysis/upload-and-analyze", formData);
+      if (res.data.cached) {
+        // Same question on the same file was answered before — no crew run
+        setLoading(false);
+        setProgress(["Answered from cache"]);
+        setResult(res.data.final_answer || "No summary returned.");
+        return;
+      }
+      const jobId = res.data.job_id;
+      try {
+        await streamJobEvents(jobId, (event) => {
+          setProgress((lines) => [...lines, describeEvent(event)]);
+          // Show each task's output as it lands instead of waiting for the whole crew
+          if (event.type === "task_completed" && event.output) setResult(event.output);
+        });
+      } catch (streamErr) {
+        // no stream (proxy, old server): fall back to polling below
+      }
+      const data = await waitForResult(jobId);
       setLoading(false);
 
-      setResult(res.data.final_answer || "No summary returned.");
-      if (res.data.agentops_dashboard) {
-        setAgentOpsLink(res.data.agentops_dashboard);
+      setResult(data.final_answer || "No summary returned.");
+      if (data.agentops_dashboard) {
+        setAgentOpsLink(data.agentops_dashboard);
       }
     } catch (err) {
       setLoading(false);
@@ -105,6 +162,16 @@ export default function AnalysisUploader() {
           </div>
         </form>
 
+        {/* Progress */}
+        {progress.length > 0 && (
+          <div className="mt-6">
+            <h3 className="text-lg font-semibold text-gray-100 mb-2">Progress</h3>
+            <pre className="bg-black/30 p-4 rounded-lg max-h-48 overflow-auto border border-white/10 text-sm">
+              {progress.join("\n")}
+            </pre>
+          </div>
+        )}
+
         {/* Results */}
         {result && (
           <div className="mt-6">